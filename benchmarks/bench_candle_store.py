@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CSV vs memory-mapped binary candle loading
+
+Usage: python benchmarks/bench_candle_store.py [--bars 1000000]
+"""
+
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+
+from common import make_frames, timed
+from data_loader import load_candles_csv, load_candles_bin, save_candles_bin
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    m1, _, _ = make_frames(args.bars)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'm1.csv')
+        bin_path = os.path.join(tmp, 'm1.candles')
+        bin32_path = os.path.join(tmp, 'm1_f32.candles')
+        m1.to_csv(csv_path, index=False)
+        save_candles_bin(m1, bin_path)
+        save_candles_bin(m1, bin32_path, price_dtype='float32')
+
+        _, csv_s = timed(load_candles_csv, csv_path)
+        _, bin_s = timed(lambda: load_candles_bin(bin_path)['close'].sum())
+        day = m1['timestamp'].iloc[len(m1) // 2].normalize()
+        end = day + pd.Timedelta(minutes=1439)
+        _, range_s = timed(lambda: load_candles_bin(bin_path, start=day, end=end)['close'].sum())
+
+        print(f"file size   csv {os.path.getsize(csv_path) / 1e6:8.1f} MB   "
+              f"bin f64 {os.path.getsize(bin_path) / 1e6:8.1f} MB   bin f32 {os.path.getsize(bin32_path) / 1e6:8.1f} MB")
+        print(f"load_candles_csv          {args.bars:>10,d} bars  {csv_s * 1e3:10.1f} ms")
+        print(f"load_candles_bin (+scan)  {args.bars:>10,d} bars  {bin_s * 1e3:10.1f} ms")
+        print(f"load_candles_bin one day  {1440:>10,d} bars  {range_s * 1e3:10.1f} ms")
+        print(f"speedup full load: {csv_s / bin_s:.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: retraining as labeled trades arrive, incremental update_models
+vs a full train_models refit. A TrainingStore starts with --rows resampled
+labeled trades and the models are trained once; then --batches batches of
+--batch new trades are appended, and after each one the models are updated
+incrementally and, separately, refitted from scratch on the whole store.
+Reported per batch: seconds for each, and the drift, both models' scores on
+the newest trades, which neither was fitted to (Brier score of p_win, MAE of
+the predicted slippage).
+
+Usage: python benchmarks/bench_incremental_training.py [--rows 100000] [--batches 5] [--batch 5000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import warnings
+
+import numpy as np
+from common import resample_labeled, timed
+from ml_models import TRAINING_BACKENDS, MLInference, load_training_rows, train_models, update_models
+from training_store import TrainingStore
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+def scores(model_dir, rows):
+    """(Brier score, slippage MAE) of model_dir's models on labeled rows"""
+    ml = MLInference(os.path.join(model_dir, 'clf_win.joblib'), os.path.join(model_dir, 'reg_slip.joblib'),
+                     compiled=True)
+    out = ml.predict_batch(rows)
+    brier = np.mean((out['p_win'] - rows['win'].to_numpy(dtype=float)) ** 2)
+    mae = np.mean(np.abs(out['pred_slippage'] - rows['slippage_pts'].fillna(0).to_numpy()))
+    return brier, mae
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000, help='labeled trades before the first batch')
+    parser.add_argument('--batches', type=int, default=5, help='batches of new trades')
+    parser.add_argument('--batch', type=int, default=5000, help='new trades per batch')
+    parser.add_argument('--backend', choices=TRAINING_BACKENDS, default='hgb')
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    labeled = resample_labeled(os.path.join(ROOT, 'data', 'labeled_trades.csv'), args.rows + args.batches * args.batch)
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()) as quiet:
+        source = os.path.join(tmp, 'store')
+        store = TrainingStore(source)
+        store.append(labeled.iloc[:args.rows])
+        incremental, refit = os.path.join(tmp, 'incremental'), os.path.join(tmp, 'refit')
+        train_models(source, incremental, backend=args.backend)
+        results = []
+        for k in range(args.batches):
+            lo = args.rows + k * args.batch
+            store.append(labeled.iloc[lo:lo + args.batch])
+            report, update_s = timed(update_models, source, incremental)
+            _, refit_s = timed(train_models, source, refit, backend=args.backend)
+            newest = load_training_rows(source, start=store.rows - report['val_rows'])
+            results.append((store.rows, update_s, refit_s, scores(incremental, newest), scores(refit, newest)))
+        quiet.truncate(0)
+
+    print(f"backend {args.backend}: {args.rows:,} trades, then {args.batches} batches of {args.batch:,}")
+    print(f"{'trades':>9}{'update s':>10}{'refit s':>9}{'Brier upd':>11}{'Brier refit':>13}"
+          f"{'MAE upd':>9}{'MAE refit':>11}")
+    for rows, update_s, refit_s, (brier_u, mae_u), (brier_r, mae_r) in results:
+        print(f"{rows:>9,}{update_s:>10.2f}{refit_s:>9.2f}{brier_u:>11.4f}{brier_r:>13.4f}{mae_u:>9.3f}{mae_r:>11.3f}")
+    update_total = sum(r[1] for r in results)
+    refit_total = sum(r[2] for r in results)
+    print(f"retraining time: {update_total:.2f} s incremental vs {refit_total:.2f} s full refits")
+
+if __name__ == "__main__":
+    main()
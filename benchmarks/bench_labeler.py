@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-pass vs re-slicing BacktestLabeler
+
+The re-slicing reference is quadratic, so it only runs on a prefix of the data;
+its full-size time is projected linearly from that prefix, which understates it.
+
+Usage: python benchmarks/bench_labeler.py [--bars 1000000] [--reference-bars 20000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+
+import numpy as np
+from common import DEFAULT_PARAMS, make_frames, timed
+from backtester import BacktestLabeler
+
+def run_labeler(m1, m15, d1, incremental, out_dir):
+    np.random.seed(7)
+    out = os.path.join(out_dir, f'labeled_{incremental}.csv')
+    with contextlib.redirect_stdout(io.StringIO()):
+        return BacktestLabeler().label_trades_from_data(m1, m15, d1, DEFAULT_PARAMS, output_csv=out,
+                                                        incremental=incremental)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=1_000_000)
+    parser.add_argument('--reference-bars', type=int, default=20_000)
+    args = parser.parse_args()
+
+    m1, m15, d1 = make_frames(args.bars)
+    ref_n = min(args.reference_bars, args.bars)
+    m1_ref = m1.iloc[:ref_n]
+    m15_ref = m15.iloc[:ref_n // 15 + 1]
+    d1_ref = d1.iloc[:ref_n // 1440 + 1]
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        ref_trades, ref_s = timed(run_labeler, m1_ref, m15_ref, d1_ref, False, out_dir)
+        inc_ref_trades, inc_ref_s = timed(run_labeler, m1_ref, m15_ref, d1_ref, True, out_dir)
+        inc_trades, inc_s = timed(run_labeler, m1, m15, d1, True, out_dir)
+
+    projected_ref_s = ref_s * args.bars / ref_n
+    print(f"reference    {ref_n:>10,d} bars  {ref_s:9.2f}s  {len(ref_trades):>8,d} trades")
+    print(f"incremental  {ref_n:>10,d} bars  {inc_ref_s:9.2f}s  {len(inc_ref_trades):>8,d} trades")
+    print(f"incremental  {args.bars:>10,d} bars  {inc_s:9.2f}s  {len(inc_trades):>8,d} trades")
+    print(f"speedup at {ref_n:,d} bars: {ref_s / inc_ref_s:.1f}x")
+    print(f"projected reference at {args.bars:,d} bars: >= {projected_ref_s:.0f}s "
+          f"(speedup >= {projected_ref_s / inc_s:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: labeled-trade output, label_trades_from_data (every trade held as
+a dict, one to_csv at the end) vs label_trades_to_store (row groups streamed
+into a columnar TrainingStore with checkpoints).
+
+Each labeling run is a fresh process; reported are its time and the peak
+memory it adds on top of the loaded candles. Then: reading the training
+columns back (pd.read_csv with parse_dates as train_models used to, the CSV
+with only the needed columns, the store), and a store run killed midway and
+resumed from its last checkpoint. Reads /proc/self/status, so Linux only.
+
+Usage: python benchmarks/bench_labeler_store.py [--bars 500000] [--batch-rows 10000]
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from common import timed
+from ml_models import load_training_rows
+from training_store import STORE_FILE, TrainingStore
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r'''
+import contextlib, io, json, resource, sys, time
+sys.path.insert(0, sys.argv[1])
+import numpy as np
+from common import DEFAULT_PARAMS, make_frames
+from backtester import BacktestLabeler
+
+def rss():
+    with open('/proc/self/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('VmRSS')) * 1024
+
+bars, method, out, batch_rows = int(sys.argv[2]), sys.argv[3], sys.argv[4], int(sys.argv[5])
+m1, m15, d1 = make_frames(bars)
+base = rss()
+np.random.seed(7)
+t0 = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    if method == 'csv':
+        BacktestLabeler().label_trades_from_data(m1, m15, d1, DEFAULT_PARAMS, output_csv=out)
+    else:
+        BacktestLabeler().label_trades_to_store(m1, m15, d1, DEFAULT_PARAMS, out, batch_rows=batch_rows)
+seconds = time.perf_counter() - t0
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+print(json.dumps({'seconds': seconds, 'added': peak - base}))
+'''
+
+def child(bars, method, out, batch_rows, **popen):
+    return subprocess.Popen([sys.executable, '-c', CHILD, HERE, str(bars), method, out, str(batch_rows)],
+                            stdout=subprocess.PIPE, text=True, **popen)
+
+def run_child(*args):
+    out, _ = child(*args).communicate()
+    return json.loads(out.strip().splitlines()[-1])
+
+def stored_rows(store_dir):
+    try:
+        with open(os.path.join(store_dir, STORE_FILE)) as f:
+            return json.load(f)['rows']
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=500_000, help='M1 bars labeled')
+    parser.add_argument('--batch-rows', type=int, default=10_000, help='trades per stored row group')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv, store_dir = os.path.join(tmp, 'labeled.csv'), os.path.join(tmp, 'store')
+        results = {'csv': run_child(args.bars, 'csv', csv, args.batch_rows),
+                   'store': run_child(args.bars, 'store', store_dir, args.batch_rows)}
+        store = TrainingStore(store_dir)
+        print(f"{args.bars:,} M1 bars, {store.rows:,} labeled trades, row groups of {args.batch_rows:,}")
+        print(f"{'output':<34}{'label s':>9}{'peak MB added':>15}{'on disk MB':>12}")
+        disk = {'csv': os.path.getsize(csv),
+                'store': sum(os.path.getsize(os.path.join(store_dir, f)) for f in os.listdir(store_dir))}
+        for method, label in (('csv', 'dict list + to_csv'), ('store', 'streamed TrainingStore')):
+            r = results[method]
+            print(f"{label:<34}{r['seconds']:>9.2f}{r['added'] / 2**20:>15.1f}{disk[method] / 2**20:>12.1f}")
+
+        print(f"{'training columns read':<34}{'ms':>9}")
+        for label, fn in (('read_csv, all columns, parse_dates', lambda: pd.read_csv(csv, parse_dates=['timestamp'])),
+                          ('read_csv, needed columns', lambda: load_training_rows(csv)),
+                          ('TrainingStore, needed columns', lambda: load_training_rows(store_dir))):
+            print(f"{label:<34}{min(timed(fn)[1] for _ in range(3)) * 1000:>9.1f}")
+
+        # kill a run once about half the trades are stored, then resume it
+        resumed = os.path.join(tmp, 'resumed')
+        proc = child(args.bars, 'store', resumed, args.batch_rows)
+        while stored_rows(resumed) < store.rows // 2 and proc.poll() is None:
+            time.sleep(0.05)
+        proc.send_signal(signal.SIGKILL)
+        proc.wait()
+        killed_at = stored_rows(resumed)
+        resume = run_child(args.bars, 'store', resumed, args.batch_rows)
+        same = all(np.array_equal(a, b) for a, b in zip(TrainingStore(resumed).read().to_numpy().T,
+                                                         store.read().to_numpy().T))
+        print(f"killed with {killed_at:,} trades stored; resume took {resume['seconds']:.2f} s "
+              f"(full run {results['store']['seconds']:.2f} s), same trades: {same}")
+
+if __name__ == "__main__":
+    main()
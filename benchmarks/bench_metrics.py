@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark: instrumentation overhead per stage (disabled vs enabled), then
+the per-stage p50/p95/p99 report of engine evaluations on synthetic candles
+
+Usage: python benchmarks/bench_metrics.py [--calls 200000] [--evaluations 300]
+"""
+
+import argparse
+import logging
+
+from common import make_frames, timed
+from metrics import Metrics, METRICS
+from engine import TradingEngine
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=200_000, help='timer calls per overhead measurement')
+    parser.add_argument('--evaluations', type=int, default=300, help='engine evaluations to profile')
+    args = parser.parse_args()
+
+    def bare():
+        for _ in range(args.calls):
+            pass
+
+    def with_timer(m):
+        def run():
+            for _ in range(args.calls):
+                with m.timer('stage'):
+                    pass
+        return run
+
+    _, bare_s = timed(bare)
+    _, off_s = timed(with_timer(Metrics(enabled=False)))
+    _, on_s = timed(with_timer(Metrics(enabled=True)))
+    per_call = lambda s: (s - bare_s) / args.calls * 1e9
+    print(f"timer overhead: disabled {per_call(off_s):6.0f} ns/stage, enabled {per_call(on_s):6.0f} ns/stage")
+
+    logging.disable(logging.INFO)
+    engine = TradingEngine(load_data=False, candle_capacity=None)  # growing DataFrames, sliced below
+    m1, _, _ = make_frames(20 * 1440)
+    engine.set_m1_history(m1.iloc[:10 * 1440])
+    METRICS.enable()
+    for n in range(10 * 1440, 10 * 1440 + args.evaluations):
+        engine.m1 = m1.iloc[:n + 1]
+        engine.evaluate()
+    print(f"\n{args.evaluations} engine evaluations, one new M1 bar each:")
+    print(METRICS.report())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: MLInference scoring paths
+
+- batch: per-candidate predict vs one predict_batch call
+- latency: p50/p99 of single predict() calls, sklearn vs compiled forests
+
+Usage: python benchmarks/bench_ml_inference.py [--rows 2000] [--latency-calls 300] [--models models]
+"""
+
+import argparse
+import os
+import time
+import warnings
+
+import numpy as np
+from common import timed
+from ml_models import MLInference
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+def sample_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{
+        'atr_m1': rng.uniform(0.00005, 0.0002),
+        'dist_zone_pts': rng.uniform(5, 50),
+        'zone_width_pts': rng.uniform(3, 15),
+        'planned_rr': rng.uniform(1.2, 2.5),
+        'spread_pts': rng.uniform(0.5, 2.5),
+        'hour_of_day': int(rng.integers(0, 24))
+    } for _ in range(n)]
+
+def latency_percentiles(predict, rows):
+    """p50/p99 of single-call latency in microseconds"""
+    predict(rows[0])  # warm up
+    samples = []
+    for row in rows:
+        t0 = time.perf_counter()
+        predict(row)
+        samples.append(time.perf_counter() - t0)
+    return np.percentile(samples, [50, 99]) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--latency-calls', type=int, default=300)
+    parser.add_argument('--models', default=os.path.join(ROOT, 'models'))
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    paths = (os.path.join(args.models, 'clf_win.joblib'), os.path.join(args.models, 'reg_slip.joblib'))
+    ml = MLInference(*paths)
+    ml_compiled = MLInference(*paths, compiled=True)
+    rows = sample_rows(args.rows)
+
+    n_loop = min(args.rows, args.latency_calls)
+    _, loop_s = timed(lambda: [ml.predict(r) for r in rows[:n_loop]])
+    _, batch_s = timed(ml.predict_batch, rows)
+    _, compiled_batch_s = timed(ml_compiled.predict_batch, rows)
+    print(f"predict loop (sklearn)     {n_loop:>7,d} rows  {loop_s / n_loop * 1e6:10.1f} us/row")
+    print(f"predict_batch (sklearn)    {args.rows:>7,d} rows  {batch_s / args.rows * 1e6:10.1f} us/row")
+    print(f"predict_batch (compiled)   {args.rows:>7,d} rows  {compiled_batch_s / args.rows * 1e6:10.1f} us/row")
+
+    latency_rows = sample_rows(args.latency_calls, seed=1)
+    print(f"\nsingle predict() latency over {args.latency_calls} calls:")
+    for name, inference in (('sklearn', ml), ('compiled', ml_compiled)):
+        p50, p99 = latency_percentiles(inference.predict, latency_rows)
+        print(f"  {name:<9} p50 {p50:10.1f} us   p99 {p99:10.1f} us")
+
+if __name__ == "__main__":
+    main()
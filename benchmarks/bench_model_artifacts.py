@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: model cold start, unpickling the joblib forests (and compiling
+them) vs memory-mapping the compiled export (ml_models.export_compiled_models).
+
+Each load runs in a fresh process, which then scores a batch of candidates so
+the trees are paged in. Reported per process: load time, private (anonymous)
+memory added by the load and the scoring, and file-backed memory, which
+every process mapping the same files shares through the page cache.
+Reads /proc/self/status, so Linux only.
+
+Usage: python benchmarks/bench_model_artifacts.py [--models models] [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import common  # noqa: F401  (puts src/ on sys.path)
+from ml_models import export_compiled_models, compiled_models_current
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+CHILD = r'''
+import json, sys, time, warnings
+sys.path.append(sys.argv[1])
+warnings.filterwarnings('ignore')
+import numpy as np
+from ml_models import MLInference
+
+def status():
+    fields = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('RssAnon', 'RssFile'):
+                fields[key] = int(value.split()[0]) * 1024
+    return fields
+
+model_dir, method = sys.argv[2], sys.argv[3]
+before = status()
+t0 = time.perf_counter()
+if method == 'joblib':
+    ml = MLInference(model_dir + '/clf_win.joblib', model_dir + '/reg_slip.joblib', compiled=True)
+else:
+    ml = MLInference.from_compiled(model_dir)
+load_s = time.perf_counter() - t0
+X = np.random.default_rng(0).uniform(0, 50, (2000, len(ml.features)))
+p_win = ml.predict_batch(X)['p_win']
+after = status()
+print(json.dumps({'load_s': load_s, 'anon': after['RssAnon'] - before['RssAnon'],
+                  'file': after['RssFile'] - before['RssFile'], 'checksum': float(p_win.sum())}))
+'''
+
+def run_child(model_dir, method):
+    out = subprocess.run([sys.executable, '-c', CHILD, os.path.join(ROOT, 'src'), model_dir, method],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models', default=os.path.join(ROOT, 'models'), help='directory with the joblib models')
+    parser.add_argument('--runs', type=int, default=5, help='fresh processes per method')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = args.models
+        if not compiled_models_current(model_dir):
+            # export a copy rather than writing into the models directory
+            for name in ('clf_win.joblib', 'reg_slip.joblib', 'feature_schema.json'):
+                if os.path.exists(os.path.join(args.models, name)):
+                    shutil.copy(os.path.join(args.models, name), tmp)
+            model_dir = tmp
+            export_compiled_models(model_dir)
+
+        print(f"{args.runs} fresh processes per method, 2000 rows scored after loading")
+        print(f"{'method':<28}{'load ms':>10}{'private MB':>12}{'shared MB':>11}")
+        results = {}
+        for method, label in (('joblib', 'joblib + CompiledForest'), ('mmap', 'memory-mapped export')):
+            runs = [run_child(model_dir, method) for _ in range(args.runs)]
+            results[method] = runs
+            load = np.median([r['load_s'] for r in runs]) * 1000
+            anon = np.median([r['anon'] for r in runs]) / 2**20
+            shared = np.median([r['file'] for r in runs]) / 2**20
+            print(f"{label:<28}{load:>10.1f}{anon:>12.2f}{shared:>11.2f}")
+        same = results['joblib'][0]['checksum'] == results['mmap'][0]['checksum']
+        load_s = {method: np.median([r['load_s'] for r in runs]) for method, runs in results.items()}
+        speedup = load_s['joblib'] / load_s['mmap']
+        print(f"cold start {speedup:.0f}x faster, identical predictions: {same}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-candidate scoring latency through a ModelRegistry while
+new model versions are loaded, validated and swapped in from another
+thread, against the same scoring with no reloads. The versions are exported
+beforehand (training runs elsewhere); publishing one is replacing the
+manifest, as export_compiled_models does last. A restart-based reload
+(unpickling the joblib models) is timed for comparison.
+
+Usage: python benchmarks/bench_model_reload.py [--seconds 3] [--reloads 10]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+import warnings
+
+import joblib
+import numpy as np
+from common import timed
+from ml_models import MLInference, export_compiled_models
+from model_registry import ModelRegistry, load_holdout
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+def score_loop(registry, row, seconds):
+    """Per-call predict() latencies over `seconds`"""
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        registry.predict(row)
+        latencies.append(time.perf_counter() - t0)
+    return np.array(latencies) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=3.0, help='scoring time per scenario')
+    parser.add_argument('--reloads', type=int, default=10, help='versions swapped in during the reload scenario')
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    models = os.path.join(ROOT, 'models')
+    holdout = load_holdout(os.path.join(ROOT, 'data', 'labeled_trades.csv'))
+    row = holdout.iloc[0].to_dict()
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ('clf_win.joblib', 'reg_slip.joblib', 'feature_schema.json'):
+            shutil.copy(os.path.join(models, name), tmp)
+        export_compiled_models(tmp)
+        registry = ModelRegistry(tmp, holdout=holdout, max_brier_increase=1.0)
+        clf = joblib.load(os.path.join(tmp, 'clf_win.joblib'))
+        manifest = os.path.join(tmp, 'compiled', 'manifest.json')
+        versions = []
+        for k in range(args.reloads):
+            clf.random_state = k  # same trees, new joblib bytes: a new version
+            joblib.dump(clf, os.path.join(tmp, 'clf_win.joblib'))
+            versions.append(export_compiled_models(tmp, keep=args.reloads + 1)['version'])
+        shutil.copy(os.path.join(tmp, 'compiled', registry.version, 'manifest.json'), manifest)
+
+        quiet = score_loop(registry, row, args.seconds)
+
+        swaps = []
+        def reload_versions():
+            pause = args.seconds / (args.reloads + 1)
+            for version in versions:
+                time.sleep(pause)
+                shutil.copy(os.path.join(tmp, 'compiled', version, 'manifest.json'), manifest + '.tmp')
+                os.replace(manifest + '.tmp', manifest)
+                swaps.append(timed(registry.check))
+        reloader = threading.Thread(target=reload_versions)
+        reloader.start()
+        busy = score_loop(registry, row, args.seconds)
+        reloader.join()
+
+        _, restart_s = timed(MLInference, os.path.join(tmp, 'clf_win.joblib'), os.path.join(tmp, 'reg_slip.joblib'),
+                             compiled=True)
+
+    print(f"{'scenario':<32}{'calls':>9}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    swapped = sum(ok for ok, _ in swaps)
+    for label, lat in (('no reloads', quiet), (f"{swapped} hot swaps", busy)):
+        print(f"{label:<32}{len(lat):>9}{np.percentile(lat, 50):>9.3f}{np.percentile(lat, 99):>9.3f}{lat.max():>9.3f}")
+    check_ms = np.median([seconds for _, seconds in swaps]) * 1000
+    print(f"load + validate + swap in the background: {check_ms:.1f} ms per version (median)")
+    print(f"restart-style reload (joblib + compile), scoring blocked: {restart_s * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark: evaluating N symbols per round, one after another vs
+MultiSymbolEngine.evaluate_all, with one symbol stalled on a blocking call
+(standing in for a slow broker/data request)
+
+Usage: python benchmarks/bench_multi_symbol.py [--symbols 20] [--rounds 5] [--stall 0.2]
+"""
+
+import argparse
+import logging
+import time
+
+from common import make_frames, timed
+from engine import MultiSymbolEngine
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=20, help='symbols traded')
+    parser.add_argument('--rounds', type=int, default=5, help='evaluation rounds')
+    parser.add_argument('--stall', type=float, default=0.2, help='seconds the slow symbol blocks per evaluation')
+    parser.add_argument('--bars', type=int, default=5 * 1440, help='M1 history per symbol')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    symbols = [f"SYM{k:02d}" for k in range(args.symbols)]
+    multi = MultiSymbolEngine(symbols, load_data=False)
+    for k, symbol in enumerate(symbols):
+        multi[symbol].set_m1_history(make_frames(args.bars, seed=k)[0])
+    slow = multi[symbols[0]]
+    evaluate = slow._evaluate
+    slow._evaluate = lambda: (time.sleep(args.stall), evaluate())[1]
+    multi.evaluate_all()  # warm the zone indexes and rolling ATRs
+
+    def sequential():
+        for _ in range(args.rounds):
+            for engine in multi.engines.values():
+                engine.evaluate()
+
+    def concurrent():
+        for _ in range(args.rounds):
+            multi.evaluate_all()
+
+    _, seq_s = timed(sequential)
+    for engine in multi.engines.values():
+        engine.eval_latencies.clear()
+    _, conc_s = timed(concurrent)
+    multi.stop()
+
+    stats = multi.latency_stats()
+    fast = [stats[s]['p50_ms'] for s in symbols[1:]]
+    print(f"{args.symbols} symbols, {args.rounds} rounds, one symbol stalls {args.stall * 1000:.0f} ms")
+    print(f"sequential:   {seq_s / args.rounds * 1000:8.1f} ms/round")
+    print(f"evaluate_all: {conc_s / args.rounds * 1000:8.1f} ms/round ({seq_s / conc_s:.1f}x)")
+    print(f"slow symbol p50 {stats[symbols[0]]['p50_ms']:.1f} ms, "
+          f"other symbols p50 {min(fast):.1f}..{max(fast):.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Benchmark: parameter sweep with shared precomputation vs one labeler run per combination
+
+Usage: python benchmarks/bench_optimizer.py [--bars 50000] [--workers N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+
+from common import DEFAULT_PARAMS, make_frames, timed
+from backtester import BacktestLabeler
+from optimizer import ParameterSweep
+
+SPACE = {
+    'sr_lookback': [60, 120],
+    'sr_cluster_pips': [10, 20],
+    'zone_buffer_points': [5, 10],
+    'rejection_wick_pts': [4, 6],
+    'tp_mult': [1.5, 1.8, 2.4],
+    'sl_mult': [0.9, 1.2],
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=50_000, help='M1 bars of history')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    m1, m15, d1 = make_frames(args.bars)
+    sweep, setup_s = timed(ParameterSweep, m1, m15, d1, base_params=DEFAULT_PARAMS, workers=args.workers)
+    combos = sweep.grid(SPACE)
+    results, sweep_s = timed(sweep.run, combos)
+    print(f"sweep: {len(combos)} combinations in {setup_s + sweep_s:.2f}s "
+          f"({(setup_s + sweep_s) / len(combos) * 1e3:.1f} ms each, workers={args.workers})")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, label_s = timed(BacktestLabeler().label_trades, m1, m15, d1, combos[0])
+    print(f"labeler: {label_s:.2f}s per combination, ~{label_s * len(combos):.0f}s for the grid "
+          f"({label_s * len(combos) / (setup_s + sweep_s):.0f}x)")
+    print(results.head(5).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
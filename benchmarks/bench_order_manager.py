@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark: submitting a burst of orders, blocking one-at-a-time calls vs
+AsyncOrderManager over one persistent MockBroker session
+
+Usage: python benchmarks/bench_order_manager.py [--orders 200] [--latency 0.02] [--in-flight 16]
+"""
+
+import argparse
+import asyncio
+
+import numpy as np
+from common import timed
+from order_manager import AsyncOrderManager, MockBroker
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=200, help='orders in the burst')
+    parser.add_argument('--latency', type=float, default=0.02, help='broker round-trip in seconds')
+    parser.add_argument('--in-flight', type=int, default=16, help='max concurrent orders')
+    args = parser.parse_args()
+
+    def blocking():
+        # A fresh connection per order, the caller waits for each fill
+        async def one():
+            broker = MockBroker(latency=args.latency, seed=0)
+            await broker.connect()
+            result = await broker.send_order({'side': 'buy', 'volume': 0.01, 'symbol': 'EURUSD'})
+            await broker.close()
+            return result
+        return [asyncio.run(one()) for _ in range(args.orders)]
+
+    broker = MockBroker(latency=args.latency, latency_jitter=args.latency / 2, seed=0)
+
+    def non_blocking():
+        with AsyncOrderManager(broker, max_in_flight=args.in_flight) as manager:
+            futures = [manager.submit('buy', 0.01, 'EURUSD') for _ in range(args.orders)]
+            return [f.result() for f in futures], manager.latencies
+
+    _, blocking_s = timed(blocking)
+    (results, latencies), async_s = timed(non_blocking)
+    assert len(results) == args.orders and broker.connects == 1
+    lat_ms = np.array(latencies) * 1000
+    print(f"{args.orders} orders, {args.latency * 1000:.0f} ms round-trip")
+    print(f"blocking: {blocking_s:6.2f}s  {args.orders / blocking_s:8.1f} orders/s")
+    print(f"async:    {async_s:6.2f}s  {args.orders / async_s:8.1f} orders/s ({blocking_s / async_s:.1f}x)")
+    print(f"submit-to-result latency p50 {np.percentile(lat_ms, 50):.1f} ms, p99 {np.percentile(lat_ms, 99):.1f} ms")
+
+if __name__ == "__main__":
+    main()
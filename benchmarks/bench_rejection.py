@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark: M1 rejection check, iterrows loop vs vectorized scan vs precomputed-mask window lookup
+
+Usage: python benchmarks/bench_rejection.py [--bars 100000] [--candles 3] [--repeat 2000]
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+from common import make_frames
+from indicators import check_rejection_m1, _check_rejection_m1_loop, rejection_masks, find_rejection
+
+POINT = 0.00001
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=100_000, help='M1 bars')
+    parser.add_argument('--candles', type=int, default=3, help='rejection_candles window')
+    parser.add_argument('--repeat', type=int, default=2000, help='checks per timing run')
+    args = parser.parse_args()
+
+    m1, _, _ = make_frames(args.bars)
+    high, low = m1['high'].to_numpy(), m1['low'].to_numpy()
+    rng = np.random.default_rng(0)
+    ends = rng.integers(args.candles, len(m1), args.repeat)
+    zones = [(m1['close'].iloc[e] - 0.0001, m1['close'].iloc[e] + 0.0001) for e in ends]
+    windows = [m1.iloc[e + 1 - args.candles:e + 1] for e in ends]
+
+    masks = min(timeit.repeat(lambda: rejection_masks(m1['open'], high, low, m1['close'], 6, POINT),
+                              number=1, repeat=3))
+    long_mask, short_mask = rejection_masks(m1['open'], high, low, m1['close'], 6, POINT)
+
+    def run_loop():
+        return [_check_rejection_m1_loop(w, z, 6, POINT) for w, z in zip(windows, zones)]
+    def run_scan():
+        return [check_rejection_m1(w, z, 6, POINT) for w, z in zip(windows, zones)]
+    def run_lookup():
+        return [find_rejection(long_mask, short_mask, low, high, e, args.candles, z, POINT) >= 0
+                for e, z in zip(ends, zones)]
+
+    assert run_loop() == run_scan() == run_lookup()
+    print(f"masks for {args.bars:,} bars: {masks * 1e3:.1f} ms (once per dataset)")
+    for name, fn in (('iterrows loop', run_loop), ('vectorized scan', run_scan), ('mask lookup', run_lookup)):
+        seconds = min(timeit.repeat(fn, number=1, repeat=3))
+        print(f"{name:>16}: {seconds / args.repeat * 1e6:8.1f} us/check")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark: reading the latest ATR / 60-bar volatility per new M1 bar,
+full recompute on the growing history vs RollingATR / RollingVolatility
+
+Usage: python benchmarks/bench_rolling.py [--history 100000] [--bars 200]
+"""
+
+import argparse
+
+import pandas as pd
+from common import make_frames, timed
+from indicators import atr, RollingATR, RollingVolatility
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--history', type=int, default=100_000, help='M1 bars already loaded')
+    parser.add_argument('--bars', type=int, default=200, help='new bars to process')
+    args = parser.parse_args()
+
+    m1, _, _ = make_frames(args.history + args.bars)
+    high, low, close = m1['high'].to_numpy(), m1['low'].to_numpy(), m1['close'].to_numpy()
+    n0 = args.history
+
+    def recompute():
+        out = []
+        for i in range(n0, n0 + args.bars):
+            out.append((atr(high[:i + 1], low[:i + 1], close[:i + 1], period=14)[-1],
+                        pd.Series(close[i - 59:i + 1]).pct_change().dropna().std()))
+        return out
+
+    rolling_atr, rolling_vol = RollingATR(14), RollingVolatility(60)
+    _, warmup_s = timed(lambda: (rolling_atr.extend(high[:n0], low[:n0], close[:n0]), rolling_vol.extend(close[:n0])))
+
+    def streaming():
+        out = []
+        for i in range(n0, n0 + args.bars):
+            rolling_vol.update(close[i])
+            out.append((rolling_atr.update(high[i], low[i], close[i]), rolling_vol.value))
+        return out
+
+    expected, recompute_s = timed(recompute)
+    result, stream_s = timed(streaming)
+    assert result == expected
+    print(f"history {n0:,} bars, one-time warm-up {warmup_s:.2f}s")
+    print(f"recompute: {recompute_s / args.bars * 1e6:10.1f} us/bar")
+    print(f"rolling:   {stream_s / args.bars * 1e6:10.1f} us/bar ({recompute_s / stream_s:.0f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: the pipeline's hot functions on seeded SampleDataGenerator
+M1 data of one day, one month and one year, with a JSON baseline and a
+regression check.
+
+Timed: atr, find_swings_levels, cluster_levels, check_rejection_m1,
+generate_candidate, MLInference.predict (sklearn and compiled),
+load_candles_csv and BacktestLabeler.label_trades_from_data.
+Each case runs enough calls to fill --min-time, --repeat times; the best
+per-call time is kept.
+
+Usage:
+  python benchmarks/bench_suite.py --save benchmarks/baseline.json
+  python benchmarks/bench_suite.py --compare benchmarks/baseline.json [--threshold 0.2]
+  python benchmarks/bench_suite.py --sizes day,month --cases atr,generate_candidate
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from common import DEFAULT_PARAMS
+from backtester import BacktestLabeler
+from data_generator import SampleDataGenerator
+from data_loader import load_candles_csv
+from indicators import atr, find_swings_levels, cluster_levels, check_rejection_m1
+from ml_models import MLInference
+from resampler import MultiTimeframe
+from signal_generator import generate_candidate
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+SIZES = {'day': 1, 'month': 30, 'year': 365}
+SEED = 42
+START = pd.Timestamp('2024-01-01')
+POINT = 0.00001
+
+def make_data(days, seed=SEED):
+    """Seeded driftless M1 candles (10s ticks) plus M15/D1 resampled from them"""
+    end = START + pd.Timedelta(days=days) - pd.Timedelta(seconds=10)
+    m1 = SampleDataGenerator(seed=seed, trend_amplitude=0.0).generate_m1(START, end)
+    mtf = MultiTimeframe(m1, timeframes=('M15', 'D1'))
+    return {'m1': m1, 'm15': mtf.frames['M15'], 'd1': mtf.frames['D1']}
+
+def measure(fn, min_time, repeat):
+    """Best seconds per call over `repeat` rounds of as many calls as fill min_time"""
+    t0 = time.perf_counter()
+    fn()
+    first = time.perf_counter() - t0
+    number = max(1, int(min_time / max(first, 1e-9)))
+    best = first
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best, number
+
+def _quiet(fn):
+    """fn with its stdout (progress prints) discarded"""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+    return run
+
+# Size-dependent cases: name -> builder(data, tmp) returning the callable to time
+def _atr(data, tmp):
+    m1 = data['m1']
+    return lambda: atr(m1['high'], m1['low'], m1['close'], period=14)
+
+def _swings(data, tmp):
+    m15 = data['m15']
+    return lambda: find_swings_levels(m15, lookback=len(m15))
+
+def _cluster(data, tmp):
+    levels = find_swings_levels(data['m15'], lookback=len(data['m15']))
+    return lambda: cluster_levels(levels, 20, POINT)
+
+def _generate_candidate(data, tmp):
+    m1, m15, d1 = data['m1'], data['m15'], data['d1']
+    params = {**DEFAULT_PARAMS, 'daily_bias': 1, 'use_daily_bias_only': False, 'p_threshold': 0.0,
+              'max_pred_slippage_pts': 1e9, 'require_rejection': False}
+    # put the last close inside the nearest zone below so the full path (features + ML call) runs
+    zones = cluster_levels(find_swings_levels(m15, lookback=params['sr_lookback']), params['sr_cluster_pips'], POINT)
+    below = [z for z in zones if (z[0] + z[1]) / 2.0 < m1['close'].iloc[-1]]
+    if below:
+        m1 = m1.copy()
+        m1.loc[m1.index[-1], 'close'] = (below[-1][0] + below[-1][1]) / 2.0 + POINT
+    ml = lambda features: {'p_win': 1.0, 'pred_slippage': 0.0}
+    assert generate_candidate(m1, m15, d1, POINT, ml, params) is not None
+    return lambda: generate_candidate(m1, m15, d1, POINT, ml, params)
+
+def _load_csv(data, tmp):
+    path = os.path.join(tmp, f"m1_{len(data['m1'])}.csv")
+    data['m1'].to_csv(path, index=False)
+    return lambda: load_candles_csv(path)
+
+def _label(data, tmp):
+    m1, m15, d1 = data['m1'], data['m15'], data['d1']
+    out = os.path.join(tmp, 'labeled.csv')
+    labeler = BacktestLabeler()
+
+    def run():
+        np.random.seed(SEED)
+        labeler.label_trades_from_data(m1, m15, d1, DEFAULT_PARAMS, output_csv=out)
+    return _quiet(run)
+
+SIZED_CASES = {
+    'atr': _atr,
+    'find_swings_levels': _swings,
+    'cluster_levels': _cluster,
+    'generate_candidate': _generate_candidate,
+    'load_candles_csv': _load_csv,
+    'label_trades_from_data': _label,
+}
+
+# Size-independent cases: name -> builder(models_dir) returning the callable to time
+def _rejection(models):
+    m1 = make_data(1)['m1'].tail(3)
+    low, high = m1['low'].min(), m1['low'].min() + 0.0002
+    return lambda: check_rejection_m1(m1, (low, high), 6, POINT)
+
+def _predict(compiled):
+    def build(models):
+        paths = (os.path.join(models, 'clf_win.joblib'), os.path.join(models, 'reg_slip.joblib'))
+        if not all(os.path.exists(p) for p in paths):
+            return None
+        ml = MLInference(*paths, compiled=compiled)
+        row = {'atr_m1': 0.0001, 'distance_to_nearest_zone_pts': 15, 'zone_width_pts': 8, 'planned_rr': 2.0,
+               'spread_pts': 1.0, 'hour_of_day': 10}
+        return lambda: ml.predict(row)
+    return build
+
+FIXED_CASES = {
+    'check_rejection_m1': _rejection,
+    'predict_sklearn': _predict(False),
+    'predict_compiled': _predict(True),
+}
+
+def run_suite(sizes, cases, min_time, repeat, models):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in cases:
+            if name in FIXED_CASES:
+                fn = FIXED_CASES[name](models)
+                if fn is None:
+                    print(f"  {name:<36} skipped (no models in {models})")
+                    continue
+                seconds, number = measure(fn, min_time, repeat)
+                results[name] = {'seconds': seconds, 'calls': number}
+                print(f"  {name:<36} {_fmt(seconds):>12}")
+        for size in sizes:
+            data = make_data(SIZES[size])
+            print(f"{size}: {len(data['m1']):,} M1 bars")
+            for name in cases:
+                if name not in SIZED_CASES:
+                    continue
+                seconds, number = measure(SIZED_CASES[name](data, tmp), min_time, repeat)
+                key = f"{name}/{size}"
+                results[key] = {'seconds': seconds, 'calls': number, 'bars': len(data['m1'])}
+                print(f"  {key:<36} {_fmt(seconds):>12}")
+    return results
+
+def compare(results, baseline, threshold):
+    """Print current vs baseline per case; returns the names slower than baseline * (1 + threshold)"""
+    regressions = []
+    print(f"\n{'case':<38}{'baseline':>12}{'current':>12}{'change':>9}")
+    for key, current in results.items():
+        base = baseline['results'].get(key)
+        if base is None:
+            print(f"{key:<38}{'-':>12}{_fmt(current['seconds']):>12}{'new':>9}")
+            continue
+        change = current['seconds'] / base['seconds'] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(key)
+            flag = '  REGRESSION'
+        print(f"{key:<38}{_fmt(base['seconds']):>12}{_fmt(current['seconds']):>12}{change:>+9.1%}{flag}")
+    return regressions
+
+def _fmt(seconds):
+    if seconds >= 1:
+        return f"{seconds:.3f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.2f} us"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=','.join(SIZES), help='comma-separated subset of day,month,year')
+    parser.add_argument('--cases', default=None, help='comma-separated case names (default: all)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds of calls per round')
+    parser.add_argument('--repeat', type=int, default=3, help='rounds per case, best kept')
+    parser.add_argument('--models', default=os.path.join(ROOT, 'models'))
+    parser.add_argument('--save', help='write the results to this JSON baseline')
+    parser.add_argument('--compare', help='JSON baseline to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown counted as a regression (0.2 = 20%%)')
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    sizes = args.sizes.split(',')
+    unknown = set(sizes) - set(SIZES)
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(sorted(unknown))}")
+    all_cases = list(FIXED_CASES) + list(SIZED_CASES)
+    cases = args.cases.split(',') if args.cases else all_cases
+    unknown = set(cases) - set(all_cases)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    results = run_suite(sizes, cases, args.min_time, args.repeat, args.models)
+    report = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'seed': SEED,
+        },
+        'results': results,
+    }
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nsaved {len(results)} results to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nno regressions beyond {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Benchmark: find_swings_levels loop vs NumPy implementations
+
+Usage: python benchmarks/bench_swings.py [--bars 20000] [--repeat 20]
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+from common import make_frames
+from indicators import find_swings_levels, find_swings_levels_arrays, _find_swings_levels_loop
+
+def per_call_us(stmt, repeat):
+    number = max(1, repeat)
+    return min(timeit.repeat(stmt, number=number, repeat=3)) / number * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=20_000, help='M15 bars in the frame')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    _, m15, _ = make_frames(args.bars * 15)
+    high = m15['high'].to_numpy()
+    low = m15['low'].to_numpy()
+
+    print(f"{'lookback':>8}  {'loop':>12}  {'frame':>12}  {'arrays':>12}  {'speedup':>8}")
+    for lookback in (120, 500, 5000):
+        assert find_swings_levels(m15, lookback) == _find_swings_levels_loop(m15, lookback)
+        loop_us = per_call_us(lambda: _find_swings_levels_loop(m15, lookback), max(1, args.repeat // 10))
+        frame_us = per_call_us(lambda: find_swings_levels(m15, lookback), args.repeat)
+        arrays_us = per_call_us(lambda: find_swings_levels_arrays(high, low, lookback), args.repeat)
+        print(f"{lookback:>8}  {loop_us:>10.1f}us  {frame_us:>10.1f}us  {arrays_us:>10.1f}us  "
+              f"{loop_us / arrays_us:>7.0f}x")
+
+if __name__ == "__main__":
+    main()
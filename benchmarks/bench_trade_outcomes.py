@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-bar iloc trade simulation vs batched simulate_trade_outcomes
+
+Usage: python benchmarks/bench_trade_outcomes.py [--bars 200000] [--trades 20000] [--loop-trades 2000]
+"""
+
+import argparse
+import contextlib
+import io
+
+import numpy as np
+from common import DEFAULT_PARAMS, make_frames, timed
+from backtester import BacktestLabeler, simulate_trade_outcomes
+
+def run_loop(labeler, m1, entry_idx, sides):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [labeler._simulate_trade_outcome(m1, int(i), {'side': 'buy' if s == 1 else 'sell'}, DEFAULT_PARAMS)
+                for i, s in zip(entry_idx, sides)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=200_000)
+    parser.add_argument('--trades', type=int, default=20_000)
+    parser.add_argument('--loop-trades', type=int, default=2_000)
+    args = parser.parse_args()
+
+    m1, _, _ = make_frames(args.bars)
+    rng = np.random.default_rng(5)
+    entry_idx = np.sort(rng.integers(DEFAULT_PARAMS['atr_period'], args.bars - 1, args.trades))
+    sides = rng.choice([1, -1], args.trades)
+    high = m1['high'].to_numpy()
+    low = m1['low'].to_numpy()
+    close = m1['close'].to_numpy()
+    dist = 0.0002
+    sl = close[entry_idx] - sides * DEFAULT_PARAMS['sl_mult'] * dist
+    tp = close[entry_idx] + sides * DEFAULT_PARAMS['tp_mult'] * dist
+
+    n_loop = min(args.loop_trades, args.trades)
+    _, loop_s = timed(run_loop, BacktestLabeler(), m1, entry_idx[:n_loop], sides[:n_loop])
+    _, batch_s = timed(simulate_trade_outcomes, high, low, entry_idx, sides, sl, tp)
+
+    loop_us = loop_s / n_loop * 1e6
+    batch_us = batch_s / args.trades * 1e6
+    print(f"per-bar loop  {n_loop:>8,d} trades  {loop_s:8.3f}s  {loop_us:9.1f} us/trade")
+    print(f"batched       {args.trades:>8,d} trades  {batch_s:8.3f}s  {batch_us:9.1f} us/trade")
+    print(f"speedup: {loop_us / batch_us:.0f}x per trade")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: model training per backend. The labeled trades are resampled
+with jittered features to --rows rows; each backend trains the win
+classifier and slippage regressor through train_models. The baseline is the
+original pipeline: both random forests on one core, one after the other.
+Reported per backend: training wall-clock, boosting rounds or trees, joblib
+size, validation log loss of p_win and single-candidate latency (sklearn
+predict and the compiled export). LightGBM is skipped when not installed.
+
+Usage: python benchmarks/bench_training.py [--rows 100000] [--calls 300]
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from common import resample_labeled
+from ml_models import FEATURE_COLUMNS, MLInference, train_models
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+def single_row_ms(ml, rows, calls):
+    """Median predict() latency over `calls` candidates"""
+    latencies = []
+    for i in range(calls):
+        row = rows[i % len(rows)]
+        t0 = time.perf_counter()
+        ml.predict(row)
+        latencies.append(time.perf_counter() - t0)
+    return np.median(latencies) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000, help='labeled trades to train on')
+    parser.add_argument('--calls', type=int, default=300, help='single-candidate predictions timed per backend')
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')
+
+    runs = [('rf, 1 core, sequential', dict(backend='rf', n_jobs=1, concurrent=False)),
+            ('rf, all cores, concurrent', dict(backend='rf')),
+            ('hgb, early stopping', dict(backend='hgb'))]
+    if importlib.util.find_spec('lightgbm') is not None:
+        runs.append(('lightgbm, early stopping', dict(backend='lightgbm')))
+    else:
+        print("lightgbm not installed: skipped")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        labeled = os.path.join(tmp, 'labeled.csv')
+        resample_labeled(os.path.join(ROOT, 'data', 'labeled_trades.csv'), args.rows).to_csv(labeled, index=False)
+        rows = pd.read_csv(labeled, nrows=args.calls)[FEATURE_COLUMNS].to_dict('records')
+        print(f"{args.rows:,} labeled trades, {os.cpu_count()} CPUs")
+        print(f"{'backend':<28}{'train s':>9}{'rounds':>12}{'MB':>7}{'val logloss':>13}"
+              f"{'sklearn ms':>12}{'compiled ms':>13}")
+        for label, kwargs in runs:
+            out = os.path.join(tmp, label.split(',')[0] + str(len(os.listdir(tmp))))
+            with contextlib.redirect_stdout(io.StringIO()):
+                report = train_models(labeled, out, **kwargs)
+            models = report['models']
+            ml = MLInference(os.path.join(out, 'clf_win.joblib'), os.path.join(out, 'reg_slip.joblib'))
+            sklearn_ms = single_row_ms(ml, rows, args.calls)
+            compiled = MLInference(os.path.join(out, 'clf_win.joblib'), os.path.join(out, 'reg_slip.joblib'),
+                                   compiled=True)
+            compiled_ms = f"{single_row_ms(compiled, rows, args.calls):.3f}" if compiled.compiled else '-'
+            rounds = f"{models['clf_win']['rounds']}/{models['reg_slip']['rounds']}"
+            size = sum(m['size_bytes'] for m in models.values()) / 2**20
+            print(f"{label:<28}{report['wall_s']:>9.2f}{rounds:>12}{size:>7.1f}"
+                  f"{models['clf_win']['val_logloss']:>13.4f}{sklearn_ms:>12.3f}{compiled_ms:>13}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serial vs process-pool walk-forward labeling
+
+Usage: python benchmarks/bench_walk_forward.py [--bars 500000] [--shard-days 30] [--workers N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+
+import pandas as pd
+from common import DEFAULT_PARAMS, make_frames, timed
+from walk_forward import WalkForwardBacktester
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, default=500_000, help='M1 bars of history')
+    parser.add_argument('--shard-days', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    m1, m15, d1 = make_frames(args.bars)
+    results = {}
+    for workers in sorted({1, args.workers}):
+        runner = WalkForwardBacktester(shard_days=args.shard_days, workers=workers, seed=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            labeled, seconds = timed(runner.label, m1, m15, d1, DEFAULT_PARAMS)
+        results[workers] = (pd.DataFrame(labeled), seconds)
+        print(f"workers={workers:>3}: {len(labeled):,} trades in {seconds:.2f}s "
+              f"({args.bars / seconds / 1e3:.0f}k bars/s, speedup {results[1][1] / seconds:.2f}x)")
+    assert all(df.equals(results[1][0]) for df, _ in results.values()), "parallel output differs from serial"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+from testing_utils import random_walk_frames as make_frames  # seeded M1 candles with M15/D1 aggregates
+
+DEFAULT_PARAMS = {
+    'sr_lookback': 120,
+    'sr_cluster_pips': 20,
+    'zone_buffer_points': 5,
+    'require_rejection': True,
+    'rejection_candles': 3,
+    'rejection_wick_pts': 6,
+    'atr_period': 14,
+    'tp_mult': 1.8,
+    'sl_mult': 0.9
+}
+
+def resample_labeled(labeled_csv, rows, seed=0):
+    """
+    `rows` labeled trades drawn with replacement, features jittered by 5%.
+    Draws stay in time order, so the validation split still holds later trades.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.read_csv(labeled_csv, parse_dates=['timestamp'])
+    out = df.iloc[np.sort(rng.integers(0, len(df), rows))].reset_index(drop=True)
+    for col in ('atr_m1', 'distance_to_nearest_zone_pts', 'zone_width_pts', 'planned_rr', 'spread_pts'):
+        out[col] = out[col] * rng.normal(1.0, 0.05, rows)
+    out['timestamp'] = pd.date_range(df['timestamp'].min(), periods=rows, freq='1min')
+    return out
+
+def timed(fn, *args, **kwargs):
+    """Run fn once, return (result, seconds)"""
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
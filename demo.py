@@ -44,16 +44,18 @@ def demo_full_pipeline():
     
     from signal_generator import generate_candidate
     from indicators import daily_bias_from_D1
+    from candle_buffer import as_frame
+    m1 = as_frame(engine.m1)
     
     test_runs = 3
     signals_found = 0
     
     for i in range(test_runs):
-        current_price = engine.m1.iloc[-(i+1)]['close']
+        current_price = m1.iloc[-(i+1)]['close']
         bias = daily_bias_from_D1(engine.d1, current_price)
         
         candidate = generate_candidate(
-            engine.m1.iloc[:max(1, len(engine.m1)-(i*10))], engine.m15, engine.d1,
+            m1.iloc[:max(1, len(m1)-(i*10))], engine.m15, engine.d1,
             point=0.00001,
             ml_inference_func=engine.ml.predict,
             params={
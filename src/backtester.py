@@ -2,39 +2,207 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from indicators import daily_bias_from_D1, find_swings_levels, cluster_levels, is_price_touch_zone, check_rejection_m1, atr
+import json
+from indicators import (daily_bias_from_D1, daily_bias_rule, find_swings_levels, cluster_levels,
+                        is_price_touch_zone, target_zone_index, rejection_candle, candle_anatomy,
+                        shape_rejection_masks, find_rejection, rejection_features, atr, entry_atr)
+from zone_index import ZoneIndex
+from feature_store import FeatureStore, zone_features
+from resampler import MultiTimeframe, closed_bar_counts
+from training_store import TrainingStore
 import os
 
+# Labeled-trade columns stored as integers; every other numeric column is float64
+INT_COLUMNS = ('daily_bias', 'hour_of_day', 'weekday', 'win', 'time_to_hit')
+
 class BacktestLabeler:
     """Generate labeled training data from historical tick/candle data"""
     
-    def __init__(self, point=0.00001):
+    def __init__(self, point=0.00001, feature_cache_dir=None):
+        """feature_cache_dir: reuse per-bar feature matrices cached there (see feature_store)"""
         self.point = point
+        self.feature_cache_dir = feature_cache_dir
         self.labeled_trades = []
     
-    def label_trades_from_data(self, df_m1, df_m15, df_d1, params, output_csv='data/labeled_trades.csv'):
+    def label_trades_from_data(self, df_m1, df_m15, df_d1, params, output_csv='data/labeled_trades.csv',
+                               incremental=True):
         """
         Generate labeled training data by simulating trades on historical data
         
         Parameters:
         - df_m1: M1 candle data
-        - df_m15: M15 candle data  
-        - df_d1: Daily candle data
+        - df_m15: M15 candle data (None: resampled from df_m1)
+        - df_d1: Daily candle data (None: resampled from df_m1)
         - params: Trading parameters
         - output_csv: Output path for labeled data
+        - incremental: single pass over rolling state (O(n)); False re-slices
+          the history on every bar (quadratic, kept as the reference path)
+        
+        At M1 bar i only M15/D1 bars closed by that bar's close are used; the
+        current day enters the daily bias as a forming bar built from M1.
+        Long runs: label_trades_to_store streams the trades to disk instead.
+        """
+        labeled_data = self.label_trades(df_m1, df_m15, df_d1, params, incremental=incremental)
+        
+        # Save to CSV
+        if labeled_data:
+            df_labeled = pd.DataFrame(labeled_data)
+            os.makedirs(os.path.dirname(output_csv), exist_ok=True)
+            df_labeled.to_csv(output_csv, index=False)
+            print(f"Saved {len(labeled_data)} labeled trades to {output_csv}")
+        else:
+            print("No valid trades found for labeling")
+            
+        return labeled_data
+
+    def label_trades_to_store(self, df_m1, df_m15, df_d1, params, store_dir, batch_rows=10000, resume=True):
+        """
+        Label trades like label_trades_from_data (single-pass labeler), but
+        stream them into a TrainingStore (training_store) in row groups of
+        batch_rows trades instead of holding them all in memory.
+
+        Each row group is stored together with a checkpoint (next M1 bar to
+        label, NumPy RNG state), in one atomic update. After a crash the same
+        call continues from the last row group and stores the same trades an
+        uninterrupted run would; resume=False refuses a non-empty store.
+        Returns the TrainingStore.
+        """
+        store = TrainingStore(store_dir)
+        timestamps = df_m1['timestamp']
+        run = json.loads(json.dumps({'params': params, 'bars': len(df_m1), 'first': str(timestamps.iloc[0]),
+                                     'last': str(timestamps.iloc[-1])}, default=str))
+        first = 0
+        checkpoint = store.meta
+        if store.rows or checkpoint is not None:
+            if not resume:
+                raise FileExistsError(f"{store_dir} already holds labeled trades")
+            if checkpoint is None or checkpoint.get('run') != run:
+                raise ValueError(f"{store_dir} holds trades labeled from other data or parameters")
+            if checkpoint['next_bar'] >= len(df_m1):
+                return store
+            first = checkpoint['next_bar']
+            np.random.set_state(_rng_state_from_json(checkpoint['rng']))
+            print(f"Resuming labeling at bar {first} ({store.rows} trades stored)")
+
+        def write(records, next_bar):
+            store.append(_typed_frame(records), meta={'run': run, 'next_bar': next_bar, 'rng': _rng_state_json()})
+            print(f"Stored {store.rows} labeled trades in {store_dir}")
+
+        align = align_timeframes(df_m1, df_m15, df_d1)
+        self._label_trades_incremental(df_m1, align, params, first, len(df_m1), sink=write, batch_rows=batch_rows)
+        return store
+
+    def label_trades(self, df_m1, df_m15, df_d1, params, incremental=True, label_range=None):
+        """
+        Labeled trade records without writing them (see label_trades_from_data).
+        label_range: (first, stop) M1 indices of the signal bars to label; bars
+        before first only warm up the indicators, bars from stop on are only
+        used to resolve trade outcomes
         """
         print("Starting trade labeling process...")
+        align = align_timeframes(df_m1, df_m15, df_d1)
+        first, stop = label_range if label_range is not None else (0, len(df_m1))
+        if incremental:
+            return self._label_trades_incremental(df_m1, align, params, first, stop)
+        return self._label_trades_resliced(df_m1, align, params, first, stop)
+
+    def _label_trades_incremental(self, df_m1, align, params, first=0, stop=None, sink=None, batch_rows=10000):
+        """
+        Label trades in one pass, advancing _LabelState one M1 bar at a time.
+        sink(records, next_bar): if given, receives the records every
+        batch_rows trades and the rest at the end (next_bar: first M1 bar not
+        labeled yet) instead of their being returned
+        """
         labeled_data = []
+        pending = []
+        labeled = 0
+        state = _LabelState(df_m1, align, params, self.point, self.feature_cache_dir)
+        timestamps = df_m1['timestamp']
+        stop = len(df_m1) if stop is None else stop
+        
+        for i in signal_bars(len(df_m1), params, first, stop):
+            try:
+                state.advance(i)
+                if state.m15_len < params['sr_lookback'] or state.d1_len < 3:
+                    continue
+                
+                current_price = state.close[i]
+                bias = int(state.bias[i])
+                
+                target_zone = state.target_zone(bias, current_price)
+                if not target_zone:
+                    continue
+                if not is_price_touch_zone(current_price, target_zone, params['zone_buffer_points'] * self.point):
+                    continue
+                rejection = state.rejection(i, target_zone)
+                if params['require_rejection'] and rejection is None:
+                    continue
+                
+                candidate = {
+                    'side': 'buy' if bias == 1 else 'sell',
+                    'bias': bias,
+                    'target_zone': target_zone,
+                    'zones': state.zone_index.zones,
+                    'rejection': rejection
+                }
+                current_time = timestamps.iloc[i]
+                features = self._build_features(candidate, current_price, current_time, params,
+                                                state.features.row(i))
+                # Entry plan now (keeps the RNG draw order of the reference path),
+                # first TP/SL hit resolved for all trades at once below
+                plan = self._plan_trade(current_price, state.entry_atr[i], candidate['side'], params)
+                
+                if plan:
+                    pending.append((features, i, candidate['side'], plan))
+                    labeled += 1
+                    
+                    if labeled % 100 == 0:
+                        print(f"Labeled {labeled} trades...")
+                        
+            except Exception as e:
+                print(f"Error processing candle {i}: {e}")
+                continue
+            
+            if sink is not None and len(pending) >= batch_rows:
+                sink(self._resolve_trades(state, pending), i + 1)
+                pending = []
         
-        # Start from a point where we have enough history
-        start_idx = max(params['sr_lookback'], params['atr_period'], 100)
+        if sink is not None:
+            sink(self._resolve_trades(state, pending), stop)
+            return labeled_data
+        return self._resolve_trades(state, pending)
+
+    def _resolve_trades(self, state, pending):
+        """Trade records of (features, entry bar, side, plan) tuples, first TP/SL hit resolved for all at once"""
+        labeled_data = []
+        if pending:
+            entry_idx = np.array([p[1] for p in pending])
+            sides = np.array([1 if p[2] == 'buy' else -1 for p in pending])
+            sl_prices = np.array([p[3]['sl_price'] for p in pending])
+            tp_prices = np.array([p[3]['tp_price'] for p in pending])
+            win, bars_to_hit = simulate_trade_outcomes(state.high, state.low, entry_idx, sides,
+                                                       sl_prices, tp_prices, max_bars=100)
+            for (features, _, _, plan), w, bars in zip(pending, win, bars_to_hit):
+                trade_record = {**features,
+                                'win': 1 if w else 0,
+                                'time_to_hit': int(bars) * 60,  # Convert to seconds (M1 = 60 seconds)
+                                **plan}
+                labeled_data.append(trade_record)
+        return labeled_data
+
+    def _label_trades_resliced(self, df_m1, align, params, first=0, stop=None):
+        """Reference labeler: rebuilds every indicator from a fresh history slice per bar"""
+        labeled_data = []
+        df_m15, df_d1, today = align['m15'], align['d1'], align['today']
         
-        for i in range(start_idx, len(df_m1) - 100):  # Leave room for trade simulation
+        for i in signal_bars(len(df_m1), params, first, len(df_m1) if stop is None else stop):
             try:
                 # Get historical data up to current point
                 m1_hist = df_m1.iloc[:i+1].copy()
-                m15_hist = df_m15.iloc[:i//15+1].copy()  # Approximate M15 alignment
-                d1_hist = df_d1.iloc[:i//1440+1].copy()  # Approximate D1 alignment
+                m15_hist = df_m15.iloc[:align['m15_closed'][i]].copy()
+                today_bar = pd.DataFrame([{'timestamp': align['day_start'][i],
+                                           **{k: v[i] for k, v in today.items()}}])
+                d1_hist = pd.concat([df_d1.iloc[:align['d1_prior'][i]], today_bar], ignore_index=True)
                 
                 # Ensure we have minimum required history
                 if len(m15_hist) < params['sr_lookback'] or len(d1_hist) < 3:
@@ -72,17 +240,15 @@ class BacktestLabeler:
                 print(f"Error processing candle {i}: {e}")
                 continue
         
-        # Save to CSV
-        if labeled_data:
-            df_labeled = pd.DataFrame(labeled_data)
-            os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-            df_labeled.to_csv(output_csv, index=False)
-            print(f"Saved {len(labeled_data)} labeled trades to {output_csv}")
-        else:
-            print("No valid trades found for labeling")
-            
         return labeled_data
     
+    def _pick_target_zone(self, zones, bias, price):
+        """Nearest zone below price for long bias, above price for short bias"""
+        if not zones:
+            return None
+        k = int(target_zone_index([(z[0]+z[1])/2.0 for z in zones], price, bias))
+        return zones[k] if k >= 0 else None
+    
     def _check_base_signal(self, df_m1, df_m15, bias, price, params):
         """Check if base trading rules would trigger a signal"""
         try:
@@ -90,19 +256,8 @@ class BacktestLabeler:
             levels = find_swings_levels(df_m15, lookback=params['sr_lookback'])
             zones = cluster_levels(levels, params['sr_cluster_pips'], self.point)
             
-            if not zones:
-                return None
-            
             # Find target zone based on bias
-            target_zone = None
-            if bias == 1:
-                below = [z for z in zones if (z[0]+z[1])/2.0 < price]
-                if below:
-                    target_zone = sorted(below, key=lambda z: price - (z[0]+z[1])/2.0)[0]
-            elif bias == -1:
-                above = [z for z in zones if (z[0]+z[1])/2.0 > price]
-                if above:
-                    target_zone = sorted(above, key=lambda z: (z[0]+z[1])/2.0 - price)[0]
+            target_zone = self._pick_target_zone(zones, bias, price)
             
             if not target_zone:
                 return None
@@ -112,16 +267,17 @@ class BacktestLabeler:
                 return None
                 
             # Check rejection if required
-            if params['require_rejection']:
-                df_recent = df_m1.tail(params['rejection_candles'])
-                if not check_rejection_m1(df_recent, target_zone, params['rejection_wick_pts'], self.point):
-                    return None
+            df_recent = df_m1.tail(params['rejection_candles'])
+            rejection = rejection_candle(df_recent, target_zone, params['rejection_wick_pts'], self.point)
+            if params['require_rejection'] and rejection is None:
+                return None
             
             return {
                 'side': 'buy' if bias == 1 else 'sell',
                 'bias': bias,
                 'target_zone': target_zone,
-                'zones': zones
+                'zones': zones,
+                'rejection': rejection
             }
             
         except Exception as e:
@@ -129,6 +285,47 @@ class BacktestLabeler:
     
     def _extract_features(self, df_m1, df_m15, df_d1, candidate, price, timestamp, params):
         """Extract ML features from market state"""
+        try:
+            # ATR features
+            try:
+                atr_m1 = atr(df_m1['high'], df_m1['low'], df_m1['close'], period=params['atr_period'])
+                atr_m1_val = atr_m1[-1] if len(atr_m1) > 0 else 0
+                
+                if len(df_m15) >= params['atr_period']:
+                    atr_m15 = atr(df_m15['high'], df_m15['low'], df_m15['close'], period=params['atr_period'])
+                    atr_m15_val = atr_m15[-1] if len(atr_m15) > 0 else 0
+                else:
+                    atr_m15_val = 0
+            except:
+                atr_m1_val = 0
+                atr_m15_val = 0
+            
+            # Volatility
+            if len(df_m1) >= 60:
+                recent_returns = df_m1['close'].tail(60).pct_change().dropna()
+                volatility = recent_returns.std()
+            else:
+                volatility = 0
+            
+            # Momentum features
+            if len(df_m1) >= 5:
+                momentum_1m = df_m1['close'].iloc[-1] - df_m1['close'].iloc[-2]
+                momentum_5m = df_m1['close'].iloc[-1] - df_m1['close'].iloc[-6] if len(df_m1) >= 6 else 0
+            else:
+                momentum_1m = 0
+                momentum_5m = 0
+            
+            bar = {'atr_m1': atr_m1_val, 'atr_m15': atr_m15_val, 'volatility_lookback': volatility,
+                   'momentum_1m': momentum_1m, 'momentum_5m': momentum_5m,
+                   'hour_of_day': timestamp.hour, 'weekday': timestamp.weekday()}
+            return self._build_features(candidate, price, timestamp, params, bar)
+            
+        except Exception as e:
+            print(f"Error extracting features: {e}")
+            return {}
+    
+    def _build_features(self, candidate, price, timestamp, params, bar):
+        """Assemble the feature record from the bar's feature_store.BAR_FEATURES values"""
         features = {}
         
         try:
@@ -140,46 +337,25 @@ class BacktestLabeler:
             features['price_at_signal'] = price
             
             # Zone features
-            zone = candidate['target_zone']
-            zone_mid = (zone[0] + zone[1]) / 2.0
-            features['distance_to_nearest_zone_pts'] = abs(price - zone_mid) / self.point
-            features['zone_width_pts'] = (zone[1] - zone[0]) / self.point
+            features.update(zone_features(price, candidate['target_zone'], self.point))
             
             # ATR features
-            try:
-                atr_m1 = atr(df_m1['high'], df_m1['low'], df_m1['close'], period=params['atr_period'])
-                features['atr_m1'] = atr_m1[-1] if len(atr_m1) > 0 else 0
-                
-                if len(df_m15) >= params['atr_period']:
-                    atr_m15 = atr(df_m15['high'], df_m15['low'], df_m15['close'], period=params['atr_period'])
-                    features['atr_m15'] = atr_m15[-1] if len(atr_m15) > 0 else 0
-                else:
-                    features['atr_m15'] = 0
-            except:
-                features['atr_m1'] = 0
-                features['atr_m15'] = 0
+            features['atr_m1'] = bar['atr_m1']
+            features['atr_m15'] = bar['atr_m15']
             
             # Spread (simulated)
             features['spread_pts'] = np.random.uniform(0.5, 2.0)  # Typical EUR/USD spread
             
             # Volatility
-            if len(df_m1) >= 60:
-                recent_returns = df_m1['close'].tail(60).pct_change().dropna()
-                features['volatility_lookback'] = recent_returns.std()
-            else:
-                features['volatility_lookback'] = 0
+            features['volatility_lookback'] = bar['volatility_lookback']
             
             # Time features
-            features['hour_of_day'] = timestamp.hour
-            features['weekday'] = timestamp.weekday()
+            features['hour_of_day'] = bar['hour_of_day']
+            features['weekday'] = bar['weekday']
             
             # Momentum features
-            if len(df_m1) >= 5:
-                features['momentum_1m'] = df_m1['close'].iloc[-1] - df_m1['close'].iloc[-2]
-                features['momentum_5m'] = df_m1['close'].iloc[-1] - df_m1['close'].iloc[-6] if len(df_m1) >= 6 else 0
-            else:
-                features['momentum_1m'] = 0
-                features['momentum_5m'] = 0
+            features['momentum_1m'] = bar['momentum_1m']
+            features['momentum_5m'] = bar['momentum_5m']
             
             # Trade plan features
             features['sl_pips'] = params['sl_mult'] * features['atr_m1'] / self.point if features['atr_m1'] > 0 else 10
@@ -188,8 +364,8 @@ class BacktestLabeler:
             
             # Additional features
             features['tick_density_last_30s'] = np.random.uniform(10, 50)  # Simulated tick density
-            features['rejection_wick_pts'] = 0  # Will be calculated if rejection found
-            features['rejection_body_pct'] = 0
+            # Shape of the candle that rejected the zone (0 when none did)
+            features['rejection_wick_pts'], features['rejection_body_pct'] = candidate.get('rejection') or (0, 0)
             
             return features
             
@@ -197,6 +373,33 @@ class BacktestLabeler:
             print(f"Error extracting features: {e}")
             return {}
     
+    def _plan_trade(self, entry_price, atr_val, side, params):
+        """SL/TP prices and simulated entry slippage for a trade opened at entry_price (see entry_atr)"""
+        try:
+            sl_distance = params['sl_mult'] * atr_val
+            tp_distance = params['tp_mult'] * atr_val
+            
+            if side == 'buy':
+                sl_price = entry_price - sl_distance
+                tp_price = entry_price + tp_distance
+            else:
+                sl_price = entry_price + sl_distance
+                tp_price = entry_price - tp_distance
+            
+            simulated_slippage = np.random.normal(0, 1.5)  # Mean 0, std 1.5 points
+            actual_entry = entry_price + (simulated_slippage * self.point * (1 if side == 'buy' else -1))
+            
+            return {
+                'slippage_pts': abs(simulated_slippage),
+                'entry_price_actual': actual_entry,
+                'sl_price': sl_price,
+                'tp_price': tp_price
+            }
+            
+        except Exception as e:
+            print(f"Error simulating trade: {e}")
+            return None
+    
     def _simulate_trade_outcome(self, df_m1, start_idx, candidate, params, max_bars=100):
         """Simulate trade outcome to generate labels"""
         try:
@@ -270,12 +473,197 @@ class BacktestLabeler:
             return None
 
 
-def generate_sample_training_data():
-    """Generate sample training data for testing ML models"""
+def align_timeframes(df_m1, df_m15, df_d1):
+    """
+    Map every M1 bar to the higher-timeframe bars known at its close:
+    - m15_closed[i]: M15 bars closed by the close of M1 bar i
+    - d1_prior[i]: D1 bars closed before the day of M1 bar i started
+    - today: forming D1 bar as of each M1 close (open/high/low/close/volume arrays)
+    df_m15 / df_d1 may be None (resampled from df_m1).
+    """
+    timeframes = ('M15', 'D1') if df_m15 is None else ('D1',)
+    mtf = MultiTimeframe(df_m1, timeframes=timeframes)
+    if df_m15 is None:
+        df_m15 = mtf.frames['M15']
+    if df_d1 is None:
+        df_d1 = mtf.frames['D1']
+    day_start = mtf.frames['D1']['timestamp'].to_numpy()[mtf.bar_index['D1']]
+    d1_close = np.asarray(df_d1['timestamp'], dtype='datetime64[ns]') + np.timedelta64(1, 'D')
+    return {
+        'm15': df_m15,
+        'd1': df_d1,
+        'm15_closed': closed_bar_counts(df_m15['timestamp'], 15, df_m1['timestamp']),
+        'd1_prior': np.searchsorted(d1_close, np.asarray(day_start, dtype='datetime64[ns]'), side='right'),
+        'day_start': day_start,
+        'today': mtf.partial_arrays('D1'),
+    }
+
+def signal_bars(n_bars, params, first=0, stop=None):
+    """M1 indices that may generate a signal: enough history before, room for the trade after"""
+    start_idx = max(params['sr_lookback'], params['atr_period'], 100)
+    return range(max(start_idx, first), min(n_bars - 100, n_bars if stop is None else stop))
+
+def daily_bias_per_bar(align, close):
+    """
+    Daily bias at the close of every M1 bar (align from align_timeframes),
+    from the two closed days before and today's forming bar; 0 where fewer
+    than three days are known
+    """
+    d1, today = align['d1'], align['today']
+    if len(d1) < 2:
+        return np.zeros(len(close), dtype=int)
+    p = np.maximum(align['d1_prior'], 2)
+    d1_high = np.asarray(d1['high'], dtype=float)
+    d1_low = np.asarray(d1['low'], dtype=float)
+    d1_close = np.asarray(d1['close'], dtype=float)
+    bias = daily_bias_rule(np.asarray(close, dtype=float), today['open'], d1_high[p - 1], d1_low[p - 1],
+                           today['close'], d1_close[p - 1], d1_close[p - 2])
+    return np.where(align['d1_prior'] + 1 >= 3, bias, 0)
+
+def simulate_trade_outcomes(high, low, entry_idx, sides, sl_prices, tp_prices, max_bars=100,
+                            chunk_size=10000):
+    """
+    Resolve many trades at once: which of TP or SL is hit first.
+
+    Trade k opens at the close of bar entry_idx[k] and is checked on the next
+    max_bars bars (fewer at the end of the data). sides holds 1 (buy) or -1
+    (sell). On a bar that touches both levels TP wins, like the per-bar loop
+    in BacktestLabeler._simulate_trade_outcome.
+
+    Returns (win, bars_to_hit): bool and int arrays aligned with entry_idx;
+    bars_to_hit is max_bars when neither level is hit.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    entry_idx = np.asarray(entry_idx, dtype=np.int64)
+    is_buy = np.asarray(sides) == 1
+    sl_prices = np.asarray(sl_prices, dtype=float)
+    tp_prices = np.asarray(tp_prices, dtype=float)
+    n_trades = len(entry_idx)
+
+    win = np.zeros(n_trades, dtype=bool)
+    bars_to_hit = np.full(n_trades, max_bars, dtype=np.int64)
+    if n_trades == 0:
+        return win, bars_to_hit
+
+    # Pad past the last bar with values that can never trigger a level, so every
+    # trade gets a full window; window w of the view covers bars w..w+max_bars-1
+    high_windows = np.lib.stride_tricks.sliding_window_view(
+        np.concatenate([high, np.full(max_bars, -np.inf)]), max_bars)
+    low_windows = np.lib.stride_tricks.sliding_window_view(
+        np.concatenate([low, np.full(max_bars, np.inf)]), max_bars)
+
+    for s in range(0, n_trades, chunk_size):
+        e = min(s + chunk_size, n_trades)
+        h = high_windows[entry_idx[s:e] + 1]
+        l = low_windows[entry_idx[s:e] + 1]
+        buy = is_buy[s:e, None]
+        tp = tp_prices[s:e, None]
+        sl = sl_prices[s:e, None]
+
+        tp_hit = np.where(buy, h >= tp, l <= tp)
+        sl_hit = np.where(buy, l <= sl, h >= sl)
+        hit = tp_hit | sl_hit
+        any_hit = hit.any(axis=1)
+        first = hit.argmax(axis=1)
+
+        win[s:e] = any_hit & tp_hit[np.arange(e - s), first]
+        bars_to_hit[s:e] = np.where(any_hit, first + 1, max_bars)
+
+    return win, bars_to_hit
+
+def _typed_frame(records):
+    """Trade records as a DataFrame with the stored column types (INT_COLUMNS int64, other numbers float64)"""
+    df = pd.DataFrame(records)
+    for col in df.columns:
+        if col in INT_COLUMNS:
+            df[col] = df[col].astype(np.int64)
+        elif col != 'timestamp' and pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype(np.float64)
+    return df
+
+def _rng_state_json():
+    name, keys, pos, has_gauss, cached = np.random.get_state()
+    return {'name': name, 'keys': keys.tolist(), 'pos': int(pos), 'has_gauss': int(has_gauss),
+            'cached_gaussian': float(cached)}
+
+def _rng_state_from_json(state):
+    return (state['name'], np.array(state['keys'], dtype=np.uint32), state['pos'], state['has_gauss'],
+            state['cached_gaussian'])
+
+
+class _LabelState:
+    """
+    Rolling market state for the single-pass labeler.
+    advance(i) moves the state to M1 bar i; every accessor then answers from
+    the M1 history up to i, the M15 bars closed by then and the daily bars
+    before today plus today's forming bar, like the reference labeler's slices.
+    """
+    
+    def __init__(self, df_m1, align, params, point, feature_cache_dir=None):
+        self.params = params
+        self.point = point
+        df_m15 = align['m15']
+        self.m15_closed = align['m15_closed']
+        self.d1_prior = align['d1_prior']
+        
+        self.high = np.asarray(df_m1['high'])
+        self.low = np.asarray(df_m1['low'])
+        self.close = np.asarray(df_m1['close'])
+        self.m15_high = np.asarray(df_m15['high'])
+        self.m15_low = np.asarray(df_m15['low'])
+        self.n_m15 = len(df_m15)
+        self.bias = daily_bias_per_bar(align, self.close)
+        self.entry_atr = entry_atr(self.high, self.low, self.close, params['atr_period'])
+        
+        # ATR, volatility and momentum are causal, so one pass over the full
+        # history gives row i == the values over df_m1[:i+1] for every i
+        self.features = FeatureStore(df_m1, df_m15, params['atr_period'], m15_closed=self.m15_closed,
+                                     cache_dir=feature_cache_dir)
+        
+        # Candle shapes and the zone-independent rejection rule for every M1 bar
+        self.rejection_candles = params['rejection_candles']
+        self.shape = candle_anatomy(df_m1['open'], self.high, self.low, self.close, point)
+        self.long_rejection, self.short_rejection = shape_rejection_masks(self.shape, params['rejection_wick_pts'])
+        
+        self.i = -1
+        self.m15_len = 0
+        self.d1_len = 0
+        self.zone_index = ZoneIndex(params['sr_lookback'], params['sr_cluster_pips'], point)
+    
+    def advance(self, i):
+        """Move to M1 bar i; M15 bars that closed since the last bar are fed to the zone index"""
+        self.i = i
+        self.m15_len = self.m15_closed[i]
+        self.d1_len = self.d1_prior[i] + 1  # closed days + today's forming bar
+        seen = self.zone_index.bars_seen
+        if self.m15_len > seen:
+            self.zone_index.extend(self.m15_high[seen:self.m15_len], self.m15_low[seen:self.m15_len])
+    
+    def target_zone(self, bias, price):
+        """Nearest zone below price for long bias, above for short, None otherwise"""
+        k = int(target_zone_index(self.zone_index.mids, price, bias))
+        return self.zone_index.zones[k] if k >= 0 else None
+    
+    def rejection(self, i, zone):
+        """(wick_pts, body_pct) of the oldest of the last rejection_candles bars rejecting zone, or None"""
+        k = find_rejection(self.long_rejection, self.short_rejection, self.low, self.high, i,
+                           self.rejection_candles, zone, self.point)
+        if k < 0:
+            return None
+        return rejection_features(self.shape, self.long_rejection, k)
+
+
+def generate_sample_training_data(workers=1):
+    """
+    Generate sample training data for testing ML models
+    workers > 1 labels date shards in parallel (walk_forward); its output is
+    the same for any workers > 1 but uses per-shard RNG seeds
+    """
     from engine import TradingEngine
     
-    # Create engine to get sample data
-    engine = TradingEngine()
+    # Create engine to get sample data (the whole history, not just the bars a live engine keeps)
+    engine = TradingEngine(candle_capacity=None)
     
     # Parameters for backtesting
     params = {
@@ -291,6 +679,10 @@ def generate_sample_training_data():
     }
     
     # Generate labels
+    if workers > 1:
+        from walk_forward import WalkForwardBacktester
+        return WalkForwardBacktester(workers=workers).label(engine.m1, engine.m15, engine.d1, params,
+                                                            output_csv='data/labeled_trades.csv')
     labeler = BacktestLabeler()
     labeled_data = labeler.label_trades_from_data(
         engine.m1, engine.m15, engine.d1, 
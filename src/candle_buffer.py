@@ -0,0 +1,178 @@
+# src/candle_buffer.py
+"""
+Fixed-capacity candle storage for the live engine.
+
+A CandleBuffer keeps the last `capacity` bars of one timeframe in
+preallocated NumPy columns. append() is O(1) and never allocates, so an
+engine fed bar by bar for weeks holds the same memory on the last bar as on
+the first. Every column is stored twice (at k and k + capacity, k = bar
+number % capacity), which keeps the latest `capacity` bars contiguous: the
+last n bars are a plain slice, handed out as zero-copy CandleViews.
+
+Views and buffers answer buffer['close'] with a NumPy array, len() and
+.columns like a DataFrame, so generate_candidate, daily_bias_from_D1, the
+indicators and FeatureStore take them in place of frames.
+"""
+import numpy as np
+import pandas as pd
+
+CANDLE_COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+_TIME_DTYPE = np.dtype('datetime64[ns]')
+
+def bars_since(candles, i):
+    """
+    Bars from bar number i on. A DataFrame numbers its rows from 0, a
+    CandleBuffer/CandleView counts every bar ever appended (see .start).
+    """
+    if isinstance(candles, pd.DataFrame):
+        return candles.iloc[i:]
+    return candles.since(i)
+
+def as_frame(candles):
+    """The candles as a DataFrame: a DataFrame as it is, a buffer or view copied"""
+    return candles if isinstance(candles, pd.DataFrame) else candles.to_frame()
+
+def first_bar(candles):
+    """Bar number of the first bar held (0 for a DataFrame)"""
+    return getattr(candles, 'start', 0)
+
+
+class CandleView:
+    """
+    Read-only window onto consecutive bars: {column: array} plus the bar
+    number of its first bar. The arrays share memory with the buffer, so a
+    view of the last n bars stays valid for capacity - n further appends.
+    """
+
+    __slots__ = ('_columns', 'start')
+
+    def __init__(self, columns, start=0):
+        self._columns = columns
+        self.start = start
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    def __len__(self):
+        return len(next(iter(self._columns.values()))) if self._columns else 0
+
+    def __getitem__(self, column):
+        return self._columns[column]
+
+    def __contains__(self, column):
+        return column in self._columns
+
+    def tail(self, n):
+        """View of the last n bars"""
+        size = len(self)
+        n = min(max(n, 0), size)
+        return CandleView({c: a[size - n:] for c, a in self._columns.items()}, self.start + size - n)
+
+    def since(self, i):
+        """View of the bars numbered i and later"""
+        if i < self.start:
+            raise IndexError(f"bar {i} is not held (first held bar is {self.start})")
+        return self.tail(self.start + len(self) - i)
+
+    def to_frame(self):
+        """Copy as a DataFrame"""
+        return pd.DataFrame({c: np.array(a) for c, a in self._columns.items()})
+
+
+class CandleBuffer:
+    """
+    Ring buffer of the last `capacity` bars of one timeframe.
+
+    total: bars appended since creation; bar k of the stream is bar number k
+    start: bar number of the oldest bar still held (total - len(self))
+    """
+
+    def __init__(self, capacity, columns=CANDLE_COLUMNS):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.total = 0
+        self._data = {c: np.zeros(2 * capacity, dtype=_TIME_DTYPE if c == 'timestamp' else np.float64)
+                      for c in columns}
+
+    @classmethod
+    def from_frame(cls, frame, capacity):
+        """Buffer holding the last `capacity` rows of a candle DataFrame"""
+        buffer = cls(capacity)
+        buffer.extend(frame)
+        return buffer
+
+    @property
+    def columns(self):
+        return list(self._data)
+
+    @property
+    def start(self):
+        return self.total - len(self)
+
+    @property
+    def empty(self):
+        return self.total == 0
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in self._data.values())
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def __getitem__(self, column):
+        return self.view()[column]
+
+    def __contains__(self, column):
+        return column in self._data
+
+    def append(self, bar):
+        """Add one closed bar (a dict or row with every column); O(1)"""
+        k = self.total % self.capacity
+        for c, a in self._data.items():
+            a[k] = a[k + self.capacity] = bar[c]
+        self.total += 1
+
+    def extend(self, frame):
+        """Add the rows of a candle DataFrame (or view), oldest first"""
+        n = len(frame)
+        if n == 0:
+            return
+        keep = min(n, self.capacity)
+        pos = (self.total + n - keep + np.arange(keep)) % self.capacity
+        for c, a in self._data.items():
+            values = np.asarray(frame[c])[n - keep:]
+            a[pos] = values
+            a[pos + self.capacity] = values
+        self.total += n
+
+    def view(self, n=None):
+        """Zero-copy read-only view of the last n bars (all held bars when None)"""
+        size = len(self)
+        n = size if n is None else min(max(n, 0), size)
+        end = (self.total - 1) % self.capacity + self.capacity + 1 if self.total else 0
+        columns = {}
+        for c, a in self._data.items():
+            v = a[end - n:end]
+            v.flags.writeable = False
+            columns[c] = v
+        return CandleView(columns, self.total - n)
+
+    def tail(self, n):
+        return self.view(n)
+
+    def since(self, i):
+        """View of the bars numbered i and later; IndexError if some were already overwritten"""
+        if i < self.start:
+            raise IndexError(f"bar {i} is no longer held (oldest held bar is {self.start})")
+        return self.view(self.total - i)
+
+    def to_frame(self):
+        """Copy of the held bars as a DataFrame"""
+        return self.view().to_frame()
@@ -0,0 +1,217 @@
+# src/compiled_forest.py
+"""
+Random-forest and histogram gradient boosting inference on flat NumPy node arrays.
+Avoids sklearn's per-call input validation and joblib dispatch, which
+dominate the cost of scoring one candidate at a time.
+
+save()/load() store the arrays as .npy files that load memory-mapped: no
+unpickling at start-up, and processes mapping the same files share one
+read-only copy of the trees in the page cache.
+"""
+import os
+import numpy as np
+
+ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots', 'split_feature')
+SETTINGS = ('aggregate', 'baseline', 'link', 'float32_inputs')
+
+class CompiledForest:
+    """
+    All trees of a fitted RandomForestClassifier/Regressor or
+    HistGradientBoostingClassifier/Regressor packed into flat arrays.
+    Node k of the forest splits on feature[k] <= threshold[k] (left) or goes
+    right; leaves have feature -1 and point to themselves, so every tree can be
+    walked in lockstep for max_depth steps. value[k] is the leaf output:
+    P(positive class) for classifiers, the mean target for regressors.
+
+    Boosted models sum their leaf values onto `baseline` instead of averaging
+    (aggregate='sum'), classifiers through a sigmoid link; missing_left[k]
+    sends NaN inputs left, and inputs are not rounded to float32.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, split_feature=None,
+                 missing_left=None, aggregate='mean', baseline=0.0, link=None, float32_inputs=True):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        # leaves need a valid column to index; the comparison result is ignored there
+        self._split_feature = np.where(feature < 0, 0, feature) if split_feature is None else split_feature
+        self.missing_left = missing_left
+        self.aggregate = aggregate
+        self.baseline = float(baseline)
+        self.link = link
+        self.float32_inputs = bool(float32_inputs)
+
+    @staticmethod
+    def supports(model):
+        """True if from_sklearn can compile model"""
+        from sklearn.ensemble import (RandomForestClassifier, RandomForestRegressor, ExtraTreesClassifier,
+                                      ExtraTreesRegressor, HistGradientBoostingClassifier,
+                                      HistGradientBoostingRegressor)
+        return isinstance(model, (RandomForestClassifier, RandomForestRegressor, ExtraTreesClassifier,
+                                  ExtraTreesRegressor, HistGradientBoostingClassifier, HistGradientBoostingRegressor))
+
+    @classmethod
+    def from_sklearn(cls, model, positive_class=1):
+        """Flatten a fitted sklearn forest or boosted model (classifier: P(positive_class))"""
+        if hasattr(model, '_predictors'):
+            return cls._from_hist_gradient_boosting(model, positive_class)
+        is_classifier = hasattr(model, 'classes_')
+        if is_classifier:
+            classes = list(model.classes_)
+            class_col = classes.index(positive_class) if positive_class in classes else None
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for est in model.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left < 0
+            node_ids = np.arange(n)
+            features.append(np.where(is_leaf, -1, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            if is_classifier:
+                # forest trees are fitted on the forest-wide class encoding
+                if class_col is None:
+                    values.append(np.zeros(n))
+                else:
+                    counts = tree.value[:, 0, :]
+                    total = counts.sum(axis=1)
+                    values.append(counts[:, class_col] / np.where(total == 0, 1.0, total))
+            else:
+                values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(np.concatenate(features).astype(np.int32),
+                   np.concatenate(thresholds).astype(np.float64),
+                   np.concatenate(lefts).astype(np.int32),
+                   np.concatenate(rights).astype(np.int32),
+                   np.concatenate(values).astype(np.float64),
+                   np.asarray(roots, dtype=np.int32),
+                   max_depth)
+
+    @classmethod
+    def _from_hist_gradient_boosting(cls, model, positive_class=1):
+        """Flatten a fitted HistGradientBoosting model (binary classifier or regressor, numeric features)"""
+        link = None
+        if hasattr(model, 'classes_'):
+            classes = list(model.classes_)
+            if len(classes) != 2:
+                raise ValueError("only binary HistGradientBoostingClassifier models can be compiled")
+            link = 'sigmoid' if positive_class != classes[0] else 'sigmoid_neg'
+        features, thresholds, lefts, rights, values, missing, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for iteration in model._predictors:
+            nodes = iteration[0].nodes
+            if nodes['is_categorical'].any():
+                raise ValueError("categorical splits cannot be compiled")
+            n = len(nodes)
+            is_leaf = nodes['is_leaf'].astype(bool)
+            node_ids = np.arange(n)
+            features.append(np.where(is_leaf, -1, nodes['feature_idx']))
+            thresholds.append(nodes['num_threshold'])
+            lefts.append(np.where(is_leaf, node_ids, nodes['left']) + offset)
+            rights.append(np.where(is_leaf, node_ids, nodes['right']) + offset)
+            values.append(nodes['value'])
+            missing.append(nodes['missing_go_to_left'].astype(bool))
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, int(nodes['depth'].max()))
+
+        return cls(np.concatenate(features).astype(np.int32),
+                   np.concatenate(thresholds).astype(np.float64),
+                   np.concatenate(lefts).astype(np.int32),
+                   np.concatenate(rights).astype(np.int32),
+                   np.concatenate(values).astype(np.float64),
+                   np.asarray(roots, dtype=np.int32),
+                   max_depth,
+                   missing_left=np.concatenate(missing),
+                   aggregate='sum',
+                   baseline=float(np.ravel(model._baseline_prediction)[0]),
+                   link=link,
+                   float32_inputs=False)
+
+    @classmethod
+    def load(cls, directory, entry, mmap=True):
+        """
+        Forest written by save(); entry is the dict save() returned. With mmap
+        the arrays are read-only views of the files, paged in on first use.
+        """
+        arrays = {}
+        for name, fname in entry['arrays'].items():
+            array = np.load(os.path.join(directory, fname), mmap_mode='r' if mmap else None)
+            arrays[name] = np.asarray(array)  # plain ndarray over the mapping: no memmap overhead per index
+        settings = {k: entry[k] for k in SETTINGS if k in entry}
+        return cls(**arrays, max_depth=entry['max_depth'], **settings)
+
+    def save(self, directory, name):
+        """
+        Write every node array to <directory>/<name>.<array>.npy; returns the
+        manifest entry load() needs
+        """
+        os.makedirs(directory, exist_ok=True)
+        arrays = {a: self._split_feature if a == 'split_feature' else getattr(self, a) for a in ARRAYS}
+        if self.missing_left is not None:
+            arrays['missing_left'] = self.missing_left
+        files = {}
+        for array, values in arrays.items():
+            files[array] = f"{name}.{array}.npy"
+            np.save(os.path.join(directory, files[array]), values)
+        return {'n_trees': self.n_trees, 'n_nodes': int(len(self.feature)), 'max_depth': self.max_depth,
+                'aggregate': self.aggregate, 'baseline': self.baseline, 'link': self.link,
+                'float32_inputs': self.float32_inputs, 'arrays': files}
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _inputs(self, X):
+        # sklearn forest trees compare float32 inputs against float64 thresholds
+        if self.float32_inputs:
+            return np.asarray(X, dtype=np.float32).astype(np.float64)
+        return np.asarray(X, dtype=np.float64)
+
+    def _go_left(self, x, node):
+        if self.missing_left is None:
+            return x <= self.threshold[node]
+        return np.where(np.isnan(x), self.missing_left[node], x <= self.threshold[node])
+
+    def _output(self, leaf_values, axis=None):
+        if self.aggregate == 'mean':
+            return leaf_values.mean(axis=axis)
+        raw = self.baseline + leaf_values.sum(axis=axis)
+        if self.link == 'sigmoid':
+            return 1.0 / (1.0 + np.exp(-raw))
+        if self.link == 'sigmoid_neg':
+            return 1.0 / (1.0 + np.exp(raw))
+        return raw
+
+    def predict(self, X):
+        """Model output for each row of 2D X"""
+        X = self._inputs(X)
+        if X.ndim == 1:
+            X = X[None, :]
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_left = self._go_left(X[rows, self._split_feature[node]], node)
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self._output(self.value[node], axis=1)
+
+    def predict_one(self, x):
+        """Model output for a single feature vector"""
+        x = self._inputs(x)
+        node = self.roots
+        for _ in range(self.max_depth):
+            go_left = self._go_left(x[self._split_feature[node]], node)
+            node = np.where(go_left, self.left[node], self.right[node])
+        return float(self._output(self.value[node]))
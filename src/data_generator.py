@@ -8,54 +8,126 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
+from resampler import MultiTimeframe
 
 class SampleDataGenerator:
     """Generate realistic sample trading data"""
     
-    def __init__(self, symbol='EURUSD', base_price=1.10000):
+    def __init__(self, symbol='EURUSD', base_price=1.10000, seed=None, trend_amplitude=0.0005):
+        """
+        seed: makes every generated series reproducible (None draws fresh entropy)
+        trend_amplitude: per-tick size of the two-cycle sine trend over the
+                         whole series (0 gives a driftless random walk)
+        """
         self.symbol = symbol
         self.base_price = base_price
+        self.seed = seed
+        self.trend_amplitude = trend_amplitude
     
     def generate_tick_data(self, start_time, end_time, tick_interval_seconds=1):
         """Generate tick-level data with realistic price movements"""
-        timestamps = []
-        current_time = start_time
-        
-        while current_time <= end_time:
-            timestamps.append(current_time)
-            current_time += timedelta(seconds=tick_interval_seconds)
-        
-        # Generate price series with realistic characteristics
-        n_ticks = len(timestamps)
-        returns = np.random.normal(0, 0.00008, n_ticks)  # Small random returns
-        
-        # Add some trend and mean reversion
-        trend = np.sin(np.linspace(0, 4*np.pi, n_ticks)) * 0.0005
-        mean_reversion = np.random.normal(0, 0.00003, n_ticks)
-        
-        prices = [self.base_price]
-        for i in range(1, n_ticks):
-            new_price = prices[-1] + returns[i] + trend[i] + mean_reversion[i]
-            prices.append(new_price)
-        
-        # Create bid/ask spread (typically 0.5-2.0 pips for EUR/USD)
-        spread = np.random.uniform(0.00005, 0.00020, n_ticks)  # 0.5-2.0 pips
-        
-        tick_data = []
-        for i, ts in enumerate(timestamps):
-            mid_price = prices[i]
-            bid = mid_price - spread[i]/2
-            ask = mid_price + spread[i]/2
+        chunks = list(self.iter_tick_chunks(start_time, end_time, tick_interval_seconds, chunk_size=None))
+        if not chunks:
+            return pd.DataFrame(columns=['timestamp', 'bid', 'ask', 'mid', 'volume'])
+        return chunks[0]
+    
+    def iter_tick_chunks(self, start_time, end_time, tick_interval_seconds=1, chunk_size=1_000_000):
+        """
+        Generate the same ticks as generate_tick_data as a sequence of DataFrames
+        of at most chunk_size rows (None: one chunk), so memory stays bounded.
+        Every random stream has its own generator and the price walk carries
+        over between chunks, so the output does not depend on chunk_size.
+        """
+        start = pd.Timestamp(start_time)
+        interval = pd.Timedelta(seconds=tick_interval_seconds)
+        n_ticks = max(int((pd.Timestamp(end_time) - start) // interval) + 1, 0)
+        chunk_size = chunk_size or max(n_ticks, 1)
+        returns_rng, reversion_rng, spread_rng, volume_rng = [
+            np.random.default_rng(s) for s in np.random.SeedSequence(self.seed).spawn(4)]
+        trend_step = 4*np.pi / (n_ticks - 1) if n_ticks > 1 else 0.0
+        
+        last_price = None
+        for first in range(0, n_ticks, chunk_size):
+            k = np.arange(first, min(first + chunk_size, n_ticks))
             
-            tick_data.append({
-                'timestamp': ts,
-                'bid': bid,
-                'ask': ask,
-                'mid': mid_price,
-                'volume': np.random.randint(1, 10)
+            # Small random returns plus some trend and mean reversion
+            returns = returns_rng.normal(0, 0.00008, len(k))
+            trend = np.sin(k * trend_step) * self.trend_amplitude
+            mean_reversion = reversion_rng.normal(0, 0.00003, len(k))
+            steps = returns + trend + mean_reversion
+            steps[0] = self.base_price if last_price is None else last_price + steps[0]
+            prices = np.cumsum(steps)
+            last_price = prices[-1]
+            
+            # Create bid/ask spread (typically 0.5-2.0 pips for EUR/USD)
+            spread = spread_rng.uniform(0.00005, 0.00020, len(k))
+            
+            yield pd.DataFrame({
+                'timestamp': start + interval * k,
+                'bid': prices - spread/2,
+                'ask': prices + spread/2,
+                'mid': prices,
+                'volume': volume_rng.integers(1, 10, len(k))
             })
-        
-        return pd.DataFrame(tick_data)
+    
+    def write_tick_data(self, path, start_time, end_time, tick_interval_seconds=1, chunk_size=1_000_000,
+                        m1_path=None):
+        """
+        Stream ticks to a CSV file chunk by chunk, holding one chunk in memory.
+        With m1_path the M1 candles are written alongside; the last, possibly
+        unfinished minute of a chunk is carried into the next one.
+        Returns (ticks written, M1 candles written).
+        """
+        n_ticks = n_candles = 0
+        carry = None
+        m1_file = open(m1_path, 'w', newline='') if m1_path else None
+        try:
+            with open(path, 'w', newline='') as f:
+                for chunk in self.iter_tick_chunks(start_time, end_time, tick_interval_seconds, chunk_size):
+                    chunk.to_csv(f, index=False, header=(n_ticks == 0))
+                    n_ticks += len(chunk)
+                    if m1_file is None:
+                        continue
+                    if carry is not None:
+                        chunk = pd.concat([carry, chunk], ignore_index=True)
+                    minute = chunk['timestamp'].dt.floor('1min')
+                    done = (minute < minute.iloc[-1]).to_numpy()
+                    carry = chunk[~done]
+                    n_candles = self._write_m1(m1_file, chunk[done], n_candles)
+            if m1_file is not None and carry is not None:
+                n_candles = self._write_m1(m1_file, carry, n_candles)
+        finally:
+            if m1_file is not None:
+                m1_file.close()
+        return n_ticks, n_candles
+    
+    def generate_m1(self, start_time, end_time, tick_interval_seconds=10, chunk_size=1_000_000):
+        """
+        M1 candles built from the ticks of iter_tick_chunks, without holding
+        all ticks in memory (a year at 10s ticks is ~3M ticks, ~0.5M candles)
+        """
+        frames = []
+        carry = None
+        for chunk in self.iter_tick_chunks(start_time, end_time, tick_interval_seconds, chunk_size):
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            minute = chunk['timestamp'].dt.floor('1min')
+            done = (minute < minute.iloc[-1]).to_numpy()
+            carry = chunk[~done]
+            if done.any():
+                frames.append(MultiTimeframe.from_ticks(chunk[done], timeframes=()).frames['M1'])
+        if carry is not None and len(carry):
+            frames.append(MultiTimeframe.from_ticks(carry, timeframes=()).frames['M1'])
+        if not frames:
+            return pd.DataFrame(columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        return pd.concat(frames, ignore_index=True)
+
+    def _write_m1(self, f, ticks, n_written):
+        if len(ticks) == 0:
+            return n_written
+        m1 = MultiTimeframe.from_ticks(ticks, timeframes=()).frames['M1']
+        m1.to_csv(f, index=False, header=(n_written == 0))
+        return n_written + len(m1)
     
     def ticks_to_ohlcv(self, tick_df, timeframe_minutes):
         """Convert tick data to OHLCV candles"""
@@ -84,20 +156,23 @@ class SampleDataGenerator:
         # Generate tick data (1 tick per second for testing - in reality much higher frequency)
         tick_data = self.generate_tick_data(start_time, end_time, tick_interval_seconds=60)
         
+        # All timeframes come from the same ticks in one resampling pass
+        mtf = MultiTimeframe.from_ticks(tick_data, timeframes=('M15', 'D1'))
+        
         # Create M1 candles
-        m1_data = self.ticks_to_ohlcv(tick_data, 1)
+        m1_data = mtf.frames['M1']
         m1_file = os.path.join(output_dir, f'{self.symbol}_M1_sample.csv')
         m1_data.to_csv(m1_file, index=False)
         print(f"Generated M1 data: {m1_file} ({len(m1_data)} candles)")
         
         # Create M15 candles
-        m15_data = self.ticks_to_ohlcv(tick_data, 15)
+        m15_data = mtf.frames['M15']
         m15_file = os.path.join(output_dir, f'{self.symbol}_M15_sample.csv')
         m15_data.to_csv(m15_file, index=False)
         print(f"Generated M15 data: {m15_file} ({len(m15_data)} candles)")
         
         # Create D1 candles
-        d1_data = self.ticks_to_ohlcv(tick_data, 1440)
+        d1_data = mtf.frames['D1']
         d1_file = os.path.join(output_dir, f'{self.symbol}_D1_sample.csv')
         d1_data.to_csv(d1_file, index=False)
         print(f"Generated D1 data: {d1_file} ({len(d1_data)} candles)")
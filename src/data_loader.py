@@ -1,6 +1,14 @@
 # src/data_loader.py
+import json
+import os
+import numpy as np
 import pandas as pd
 
+CANDLE_COLUMNS = ['timestamp','open','high','low','close','volume']
+BIN_MAGIC = b'CANDLES1'
+BIN_EXT = '.candles'
+_ALIGN = 64
+
 def load_candles_csv(path):
     """
     expected csv columns: ['timestamp','open','high','low','close','volume']
@@ -10,6 +18,114 @@ def load_candles_csv(path):
     df = df.sort_values('timestamp').reset_index(drop=True)
     return df
 
+def save_candles_bin(df, path, price_dtype='float64'):
+    """
+    Write candles to the binary columnar format read by load_candles_bin.
+
+    Layout: 8-byte magic, uint32 header length, JSON header, then one
+    contiguous 64-byte aligned block per column. Timestamps are stored as
+    int64 epoch values in the frame's datetime unit; open/high/low/close use
+    price_dtype (float64 or float32); volume keeps its own dtype.
+    Rows are written sorted by timestamp, which range loads rely on.
+    """
+    df = df.sort_values('timestamp').reset_index(drop=True)
+    arrays = {}
+    for name in CANDLE_COLUMNS:
+        if name not in df.columns:
+            continue
+        values = df[name].to_numpy()
+        if name in ('open', 'high', 'low', 'close'):
+            values = values.astype(price_dtype)
+        arrays[name] = np.ascontiguousarray(values)
+
+    columns = []
+    offset = 0
+    for name, values in arrays.items():
+        columns.append({'name': name, 'dtype': values.dtype.str, 'offset': offset})
+        offset += -(-values.nbytes // _ALIGN) * _ALIGN
+    header = {'version': 1, 'rows': len(df), 'columns': columns}
+    header_bytes = json.dumps(header).encode()
+    data_start = -(-(len(BIN_MAGIC) + 4 + len(header_bytes)) // _ALIGN) * _ALIGN
+
+    with open(path, 'wb') as f:
+        f.write(BIN_MAGIC)
+        f.write(np.uint32(len(header_bytes)).tobytes())
+        f.write(header_bytes)
+        for col in columns:
+            f.seek(data_start + col['offset'])
+            f.write(arrays[col['name']].tobytes())
+        # pad the last block so every column is fully backed by the file
+        f.truncate(data_start + offset)
+
+def read_candles_bin_header(path):
+    """(header dict, byte offset of the first column block)"""
+    with open(path, 'rb') as f:
+        if f.read(len(BIN_MAGIC)) != BIN_MAGIC:
+            raise ValueError(f"{path} is not a binary candle file")
+        header_len = int(np.frombuffer(f.read(4), dtype=np.uint32)[0])
+        header = json.loads(f.read(header_len))
+    data_start = -(-(len(BIN_MAGIC) + 4 + header_len) // _ALIGN) * _ALIGN
+    return header, data_start
+
+def load_candles_bin(path, start=None, end=None, as_frame=True):
+    """
+    Memory-map a binary candle file. Nothing is copied: the returned arrays
+    (or DataFrame columns) are read-only views of the file, so only the pages
+    actually touched are read from disk.
+
+    start/end: optional inclusive timestamp bounds; found by binary search on
+               the timestamp column, so a range load only touches its rows
+    as_frame:  DataFrame if True, else a dict of column arrays
+    """
+    header, data_start = read_candles_bin_header(path)
+    n = header['rows']
+    columns = {}
+    if n > 0:
+        mm = np.memmap(path, dtype=np.uint8, mode='r')
+        for col in header['columns']:
+            columns[col['name']] = np.frombuffer(mm, dtype=np.dtype(col['dtype']), count=n,
+                                                 offset=data_start + col['offset'])
+    else:
+        for col in header['columns']:
+            columns[col['name']] = np.empty(0, dtype=np.dtype(col['dtype']))
+
+    if start is not None or end is not None:
+        ts = columns['timestamp']
+        lo = 0 if start is None else np.searchsorted(ts, pd.Timestamp(start).to_datetime64(), side='left')
+        hi = n if end is None else np.searchsorted(ts, pd.Timestamp(end).to_datetime64(), side='right')
+        columns = {name: values[lo:hi] for name, values in columns.items()}
+
+    if not as_frame:
+        return columns
+    return pd.DataFrame(columns, copy=False)
+
+def convert_csv_to_bin(csv_path, bin_path=None, price_dtype='float64'):
+    """Convert a candle CSV to the binary format; returns the output path"""
+    if bin_path is None:
+        bin_path = os.path.splitext(csv_path)[0] + BIN_EXT
+    save_candles_bin(load_candles_csv(csv_path), bin_path, price_dtype=price_dtype)
+    return bin_path
+
+def load_candles(path):
+    """
+    Load candles from `path`, preferring an up-to-date binary copy
+    (same name with the .candles extension) over the CSV
+    """
+    bin_path = os.path.splitext(path)[0] + BIN_EXT
+    if os.path.exists(bin_path) and (not os.path.exists(path) or
+                                     os.path.getmtime(bin_path) >= os.path.getmtime(path)):
+        return load_candles_bin(bin_path)
+    return load_candles_csv(path)
+
 # Example usage:
 # m1 = load_candles_csv('data/EURUSD_M1.csv')
-# m15 = load_candles_csv('data/EURUSD_M15.csv')
\ No newline at end of file
+# m15 = load_candles_csv('data/EURUSD_M15.csv')
+#
+# Convert once, then load memory-mapped:
+# python data_loader.py data/EURUSD_M1_sample.csv data/EURUSD_M15_sample.csv
+# m1 = load_candles('data/EURUSD_M1_sample.csv')
+
+if __name__ == "__main__":
+    import sys
+    for csv_path in sys.argv[1:]:
+        print("Wrote", convert_csv_to_bin(csv_path))
@@ -1,30 +1,111 @@
 # src/engine.py
 import time
 import logging
-from data_loader import load_candles_csv
+import queue
+import threading
+import concurrent.futures
+from collections import deque
+import numpy as np
+from data_loader import load_candles, BIN_EXT
 from signal_generator import generate_candidate
-from indicators import daily_bias_from_D1
+from indicators import daily_bias_intraday
+from feature_store import FeatureStore
+from candle_buffer import CandleBuffer, bars_since, first_bar
 from order_manager import place_market_order
-from ml_models import MLInference
+from ml_models import MLInference, compiled_models_current
+from zone_index import ZoneIndex
+from resampler import MultiTimeframe
+from feeds import BarEvent, bar_close_time
+from metrics import METRICS
 import os
 
+# M1 bars kept by default (90 days); M15/D1 are sized to cover the same span
+DEFAULT_CANDLE_CAPACITY = 90 * 1440
+_NO_EVENT = object()  # nothing held back from the event queue (None is the feed's end marker)
+
 class TradingEngine:
-    def __init__(self):
+    def __init__(self, compiled_models=True, symbol='EURUSD', point=0.00001, spread_pts=None, params=None,
+                 ml=None, load_data=True, candle_capacity=DEFAULT_CANDLE_CAPACITY):
+        """
+        compiled_models: score candidates with the flat-array forest copies (see compiled_forest)
+        symbol, point:   instrument traded and its point size
+        spread_pts:      typical spread fed to the ML features (signal_generator default if None)
+        params:          overrides of the default strategy parameters
+        ml:              already loaded inference object to share, instead of loading the models
+        load_data:       load data/<symbol>_M1_sample.csv (or dummy data); if False the candles
+                         come from set_m1_history() or attach_feed()
+        candle_capacity: M1 bars kept in the fixed-size CandleBuffers holding the candles (M15/D1
+                         sized to match), so a long-running engine neither grows in memory nor
+                         slows down; None keeps the whole history in DataFrames grown bar by bar
+                         (pd.concat, O(history) per bar), for callers that need every bar as frames
+        """
         self.running = False
         self.gui = None
-        self.ml = None
+        self.ml = ml
         self.trades = []
         self.accepted_trades = 0
         self.rejected_trades = 0
+        self.symbol = symbol
+        self.point = point
+        self.params = {
+            'sr_lookback': 120,
+            'sr_cluster_pips': 20,
+            'zone_buffer_points': 5,
+            'require_rejection': True,
+            'rejection_candles': 3,
+            'rejection_wick_pts': 6,
+            'atr_period': 14,
+            'tp_mult': 1.8, 
+            'sl_mult': 0.9,
+            'p_threshold': 0.6, 
+            'max_pred_slippage_pts': 5,
+            'use_daily_bias_only': True
+        }
+        if spread_pts is not None:
+            self.params['spread_pts'] = spread_pts
+        self.params.update(params or {})
+        self.candle_capacity = candle_capacity
+        self.zone_index = None
+        self._zone_origin = 0  # M15 bar number the zone index started from
+        self.features = None  # FeatureStore over self.m1, see sync_indicators
+        self.order_manager = None  # AsyncOrderManager, see attach_order_manager
+        
+        # Event mode (see attach_feed)
+        self.feed = None
+        self.events = queue.Queue()
+        self.evaluate_on = ('M1', 'M15')
+        self.tick_trigger = None
+        self.last_tick = None
+        self.event_latencies = deque(maxlen=1000)  # seconds from event emission to decision
+        self.eval_latencies = deque(maxlen=1000)  # seconds per evaluate() call
+        self._stop_event = threading.Event()
         
         # Initialize logging
         logging.basicConfig(level=logging.INFO)
-        self.logger = logging.getLogger(__name__)
+        self.logger = logging.getLogger(__name__).getChild(symbol)
         
-        # Load models if available
+        # Load models if available, unless the caller shares already loaded ones
+        if self.ml is None:
+            self.load_models(compiled_models)
+        
+        # Load sample data (replace with live data feed in production)
+        self.m1 = self.m15 = self.d1 = None
+        if load_data:
+            self.load_sample_data()
+            self.sync_zone_index()
+
+    def load_models(self, compiled_models=True):
+        """
+        Load the trained models, falling back to dummy inference. Compiled
+        models come memory-mapped from the models/compiled export when it
+        matches the joblib files, skipping the unpickling.
+        """
         try:
-            if os.path.exists('models/clf_win.joblib') and os.path.exists('models/reg_slip.joblib'):
-                self.ml = MLInference('models/clf_win.joblib', 'models/reg_slip.joblib')
+            if compiled_models and compiled_models_current('models'):
+                self.ml = MLInference.from_compiled('models')
+                self.log(f"ML models memory-mapped (version {self.ml.version})")
+            elif os.path.exists('models/clf_win.joblib') and os.path.exists('models/reg_slip.joblib'):
+                self.ml = MLInference('models/clf_win.joblib', 'models/reg_slip.joblib', compiled=compiled_models)
                 self.log("ML models loaded successfully")
             else:
                 self.log("Warning: ML models not found. Using dummy inference.")
@@ -32,18 +113,18 @@ class TradingEngine:
         except Exception as e:
             self.log(f"Error loading ML models: {e}. Using dummy inference.")
             self.ml = DummyMLInference()
-        
-        # Load sample data (replace with live data feed in production)
-        self.load_sample_data()
 
     def load_sample_data(self):
         """Load sample data or create dummy data for testing"""
+        self.zone_index = None
+        self.features = None
         try:
-            if os.path.exists('data/EURUSD_M1_sample.csv'):
-                self.m1 = load_candles_csv('data/EURUSD_M1_sample.csv')
-                self.m15 = load_candles_csv('data/EURUSD_M15_sample.csv')
-                self.d1 = load_candles_csv('data/EURUSD_D1_sample.csv')
-                self.log("Sample data loaded from CSV files")
+            sample = f'data/{self.symbol}_M1_sample'
+            if os.path.exists(sample + '.csv') or os.path.exists(sample + BIN_EXT):
+                # load_candles memory-maps a converted binary copy when there is one;
+                # M15/D1 are resampled from M1 on their real time boundaries
+                self.set_m1_history(load_candles(sample + '.csv'))
+                self.log("Sample data loaded")
             else:
                 self.log("No sample data found, creating dummy data for testing")
                 self.create_dummy_data()
@@ -89,97 +170,245 @@ class TradingEngine:
                 'volume': volume
             })
         
-        self.m1 = pd.DataFrame(m1_data)
-        
-        # Create M15 data (aggregate from M1)
-        self.m15 = self.m1.groupby(self.m1.index // 15).agg({
-            'timestamp': 'first',
-            'open': 'first',
-            'high': 'max',
-            'low': 'min',
-            'close': 'last',
-            'volume': 'sum'
-        }).reset_index(drop=True)
-        
-        # Create D1 data (aggregate from M1)
-        self.d1 = self.m1.groupby(self.m1.index // 1440).agg({
-            'timestamp': 'first',
-            'open': 'first',
-            'high': 'max',
-            'low': 'min',
-            'close': 'last',
-            'volume': 'sum'
-        }).reset_index(drop=True)
+        m1 = pd.DataFrame(m1_data)
+        mtf = MultiTimeframe(m1, timeframes=('M15', 'D1'))
+        d1 = mtf.frames['D1']
         
         # Ensure we have at least 3 daily candles for bias calculation
-        if len(self.d1) < 3:
-            for i in range(3 - len(self.d1)):
-                self.d1 = pd.concat([self.d1.iloc[[0]], self.d1], ignore_index=True)
-                self.d1.loc[0, 'timestamp'] = self.d1.loc[1, 'timestamp'] - timedelta(days=1)
+        if len(d1) < 3:
+            for i in range(3 - len(d1)):
+                d1 = pd.concat([d1.iloc[[0]], d1], ignore_index=True)
+                d1.loc[0, 'timestamp'] = d1.loc[1, 'timestamp'] - timedelta(days=1)
+        
+        self.set_candles(m1, mtf.frames['M15'], d1)
+
+    def set_m1_history(self, m1):
+        """Use m1 as the candle history and derive M15/D1 from it"""
+        mtf = MultiTimeframe(m1, timeframes=('M15', 'D1'))
+        self.set_candles(m1, mtf.frames['M15'], mtf.frames['D1'])
+
+    def set_candles(self, m1, m15, d1):
+        """Replace the candle history (copied into CandleBuffers when candle_capacity is set)"""
+        self.zone_index = None
+        self.features = None
+        if self.candle_capacity:
+            capacity = self.buffer_capacities()
+            m1, m15, d1 = (CandleBuffer.from_frame(df, capacity[tf])
+                           for tf, df in (('M1', m1), ('M15', m15), ('D1', d1)))
+        self.m1, self.m15, self.d1 = m1, m15, d1
+
+    def buffer_capacities(self):
+        """Bars held per timeframe with candle_capacity: M15/D1 cover the M1 span and what the strategy reads"""
+        m1 = self.candle_capacity
+        return {'M1': m1,
+                'M15': max(m1 // 15, self.params['sr_lookback'], self.params['atr_period']) + 1,
+                'D1': max(m1 // 1440, 3) + 1}
+
+    def sync_zone_index(self):
+        """Feed M15 bars closed since the last call into the zone index"""
+        if self.zone_index is None:
+            self.zone_index = ZoneIndex(self.params['sr_lookback'], self.params['sr_cluster_pips'], self.point)
+            self._zone_origin = first_bar(self.m15)
+        new_bars = bars_since(self.m15, self._zone_origin + self.zone_index.bars_seen)
+        if len(new_bars):
+            self.zone_index.extend(new_bars['high'], new_bars['low'])
+
+    def sync_indicators(self):
+        """Add feature rows for the M1 bars appended since the last call"""
+        if self.features is None:
+            self.features = FeatureStore(self.m1, self.m15, self.params['atr_period'],
+                                         max_rows=self.candle_capacity)
+        else:
+            self.features.extend(self.m1, self.m15)
+
+    def attach_feed(self, feed, evaluate_on=('M1', 'M15'), tick_trigger=None):
+        """
+        Switch run() to event mode: evaluate only when a bar of a timeframe in
+        evaluate_on closes, or every tick_trigger ticks if set. Bars closing at
+        the same time (an M1 bar and the M15 bar it completes) are applied
+        together and evaluated once.
+        The engine's candles are replaced by the feed's history.
+        """
+        self.feed = feed
+        self.evaluate_on = tuple(evaluate_on)
+        self.tick_trigger = tick_trigger
+        self.set_candles(*feed.history())
+        self.sync_zone_index()
+        feed.subscribe(self.events.put)
+
+    def attach_order_manager(self, manager):
+        """
+        Submit orders through a started AsyncOrderManager instead of the
+        blocking place_market_order; fills are logged from its callback
+        """
+        self.order_manager = manager
+        manager.add_fill_callback(self._on_order_result)
+
+    def attach_model_registry(self, registry):
+        """
+        Score candidates with a ModelRegistry's current models, so versions it
+        swaps in (or rolls back to) apply from the next evaluation on
+        """
+        self.ml = registry
+
+    def _on_order_result(self, order, result):
+        self.log(f"Order result: {order['side']} {order['volume']} {order['symbol']} -> {result}")
 
     def run(self):
-        """Main trading loop"""
+        """Main trading loop: event-driven when a feed is attached, else polls every 2 seconds"""
         self.running = True
+        self._stop_event.clear()
         self.log("Trading engine started")
         
+        if self.feed is not None:
+            self._run_events()
+            return
+        
         while self.running:
             try:
-                # Calculate daily bias
-                current_price = self.m1.iloc[-1]['close']
-                bias = daily_bias_from_D1(self.d1, current_price)
-                
-                # Generate candidate trade
-                candidate = generate_candidate(
-                    self.m1, self.m15, self.d1, 
-                    point=0.00001,  # EUR/USD point value
-                    ml_inference_func=self.ml.predict,
-                    params={
-                        'daily_bias': bias,
-                        'sr_lookback': 120,
-                        'sr_cluster_pips': 20,
-                        'zone_buffer_points': 5,
-                        'require_rejection': True,
-                        'rejection_candles': 3,
-                        'rejection_wick_pts': 6,
-                        'atr_period': 14,
-                        'tp_mult': 1.8, 
-                        'sl_mult': 0.9,
-                        'p_threshold': 0.6, 
-                        'max_pred_slippage_pts': 5,
-                        'use_daily_bias_only': True
-                    }
-                )
-                
-                if candidate:
-                    self.accepted_trades += 1
-                    self.log(f"Trade candidate accepted: {candidate['side']} at {candidate['entry_price']:.5f}")
-                    self.log(f"ML Score - P(win): {candidate['ml']['p_win']:.3f}, Predicted slippage: {candidate['ml']['pred_slippage']:.2f}pts")
-                    
-                    # Place order (stub implementation)
-                    result = place_market_order(
-                        candidate['side'], 
-                        volume=0.01, 
-                        symbol='EURUSD',
-                        sl=0.0, 
-                        tp=0.0,
-                        comment="ICT-ML"
-                    )
-                    self.log(f"Order placed: {result}")
-                    self.trades.append(candidate)
+                self.evaluate()
+            except Exception as e:
+                self.log(f"Error in trading loop: {e}")
+            
+            # Wait between iterations; stop() wakes this immediately
+            self._stop_event.wait(2)  # Check every 2 seconds
+
+    def _run_events(self):
+        self.feed.start()
+        ticks_since_eval = 0
+        evaluated_close = None  # close time of the bars last evaluated
+        held = _NO_EVENT  # event taken from the queue while collecting bars, handled next
+        while self.running:
+            event, held = (self.events.get() if held is _NO_EVENT else held), _NO_EVENT
+            if event is None:  # feed exhausted or stop() called
+                break
+            try:
+                if isinstance(event, BarEvent):
+                    # apply every bar closing at this time (M1, then M15/D1) before evaluating once,
+                    # so the M1 close is scored once and with the zones of the M15 bar it completes
+                    close_time = bar_close_time(event)
+                    self.append_bar(event.timeframe, event.bar)
+                    trigger = event.timeframe in self.evaluate_on
+                    while True:
+                        try:
+                            held = self.events.get_nowait()
+                        except queue.Empty:
+                            break
+                        if not isinstance(held, BarEvent) or bar_close_time(held) != close_time:
+                            break
+                        self.append_bar(held.timeframe, held.bar)
+                        trigger |= held.timeframe in self.evaluate_on
+                        held = _NO_EVENT
+                    # a bar of the same close arriving after the evaluation only updates the candles
+                    trigger = trigger and close_time != evaluated_close
+                    if trigger:
+                        evaluated_close = close_time
                 else:
-                    self.rejected_trades += 1
-                    if self.rejected_trades % 10 == 0:  # Log every 10th rejection to avoid spam
-                        self.log(f"No valid trade signal. Accepted: {self.accepted_trades}, Rejected: {self.rejected_trades}")
-                
+                    self.last_tick = event
+                    ticks_since_eval += 1
+                    trigger = bool(self.tick_trigger) and ticks_since_eval >= self.tick_trigger
+                # bias needs two closed days before today (see daily_bias_intraday)
+                if trigger and len(self.m1) and len(self.d1) >= 2:
+                    ticks_since_eval = 0
+                    if isinstance(event, BarEvent):
+                        self.evaluate()
+                    else:
+                        # candles are bid prices: score the tick's bid, with its spread as the feature
+                        self.evaluate(price=event.bid, spread_pts=(event.ask - event.bid) / self.point)
+                    self.event_latencies.append(time.perf_counter() - event.created)
             except Exception as e:
                 self.log(f"Error in trading loop: {e}")
+        self.feed.stop()
+        self.running = False
+
+    def append_bar(self, timeframe, bar):
+        """Append a closed bar to the M1/M15/D1 candles"""
+        import pandas as pd
+        attr = {'M1': 'm1', 'M15': 'm15', 'D1': 'd1'}[timeframe]
+        df = getattr(self, attr)
+        if isinstance(df, CandleBuffer):
+            df.append(bar)  # O(1), overwrites the oldest bar once full
+            return
+        row = pd.DataFrame([bar])
+        setattr(self, attr, row if df.empty else pd.concat([df, row], ignore_index=True))
+
+    def evaluate(self, price=None, spread_pts=None):
+        """
+        Run the signal pipeline once on the current candles, at price (e.g. the
+        latest tick's bid) or the last M1 close when None; spread_pts overrides
+        the configured spread feature
+        """
+        t0 = time.perf_counter()
+        try:
+            return self._evaluate(price, spread_pts)
+        finally:
+            latency = time.perf_counter() - t0
+            self.eval_latencies.append(latency)
+            METRICS.observe('evaluate', latency)
+
+    def _evaluate(self, price=None, spread_pts=None):
+        # Zero-copy views of the buffered candles (DataFrames are used as they are)
+        m1, m15, d1 = (c.view() if isinstance(c, CandleBuffer) else c for c in (self.m1, self.m15, self.d1))
+        
+        # Calculate daily bias
+        with METRICS.timer('daily_bias'):
+            current_price = np.asarray(m1['close'])[-1] if price is None else price
+            bias = daily_bias_intraday(m1, d1, current_price)
+        params = {**self.params, 'daily_bias': bias}
+        if spread_pts is not None:
+            params['spread_pts'] = spread_pts
+        
+        # Generate candidate trade
+        with METRICS.timer('sync_indicators'):
+            self.sync_zone_index()
+            self.sync_indicators()
+        candidate = generate_candidate(
+            m1, m15, d1, 
+            point=self.point,
+            ml_inference_func=self.ml.predict,
+            params=params,
+            zone_index=self.zone_index,
+            bar_features=self.features.row(-1),
+            price=current_price
+        )
+        
+        if candidate:
+            METRICS.count('candidates_accepted')
+            self.accepted_trades += 1
+            self.log(f"Trade candidate accepted: {candidate['side']} at {candidate['entry_price']:.5f}")
+            self.log(f"ML Score - P(win): {candidate['ml']['p_win']:.3f}, Predicted slippage: {candidate['ml']['pred_slippage']:.2f}pts")
             
-            # Sleep between iterations
-            time.sleep(2)  # Check every 2 seconds
+            if self.order_manager is not None:
+                # Non-blocking: the result arrives through _on_order_result
+                with METRICS.timer('order_submit'):
+                    candidate['order'] = self.order_manager.submit(candidate['side'], 0.01, self.symbol,
+                                                                   sl=0.0, tp=0.0, comment="ICT-ML")
+            else:
+                # Place order (stub implementation)
+                result = place_market_order(
+                    candidate['side'], 
+                    volume=0.01, 
+                    symbol=self.symbol,
+                    sl=0.0, 
+                    tp=0.0,
+                    comment="ICT-ML"
+                )
+                self.log(f"Order placed: {result}")
+            self.trades.append(candidate)
+        else:
+            METRICS.count('candidates_rejected')
+            self.rejected_trades += 1
+            if self.rejected_trades % 10 == 0:  # Log every 10th rejection to avoid spam
+                self.log(f"No valid trade signal. Accepted: {self.accepted_trades}, Rejected: {self.rejected_trades}")
+        return candidate
 
     def stop(self):
         """Stop the trading engine"""
         self.running = False
+        self._stop_event.set()
+        if self.feed is not None:
+            self.feed.stop()
+            self.events.put(None)  # wake the event loop
         self.log("Trading engine stopped")
 
     def log(self, message):
@@ -189,6 +418,111 @@ class TradingEngine:
             self.gui.log_message(message)
 
 
+class MultiSymbolEngine:
+    """
+    Runs one TradingEngine per symbol in one process. Every symbol keeps its
+    own candles, zone index, point size, spread and parameters; the ML models
+    are loaded once and shared. start() gives each symbol its own worker
+    thread running engine.run(), so a symbol that is slow to evaluate only
+    delays its own events.
+
+    symbols: list of symbol names, or {symbol: {'point': ..., 'spread_pts': ...,
+             'params': {...}}} with any TradingEngine keyword arguments
+    """
+
+    def __init__(self, symbols, compiled_models=True, ml=None, load_data=True):
+        if not isinstance(symbols, dict):
+            symbols = {s: {} for s in symbols}
+        self.engines = {}
+        for symbol, config in symbols.items():
+            config = {'load_data': load_data, **config}
+            engine = TradingEngine(compiled_models, symbol=symbol, ml=ml, **config)
+            ml = engine.ml  # the first engine loads the models, the rest share them
+            self.engines[symbol] = engine
+        self.ml = ml
+        self._threads = {}
+        self._pool = None
+
+    def __getitem__(self, symbol):
+        return self.engines[symbol]
+
+    @property
+    def symbols(self):
+        return list(self.engines)
+
+    @property
+    def running(self):
+        return any(t.is_alive() for t in self._threads.values())
+
+    def attach_feed(self, symbol, feed, **kwargs):
+        """Event mode for one symbol, see TradingEngine.attach_feed"""
+        self.engines[symbol].attach_feed(feed, **kwargs)
+
+    def attach_order_manager(self, manager):
+        """Route every symbol's orders through one shared AsyncOrderManager"""
+        for engine in self.engines.values():
+            engine.attach_order_manager(manager)
+
+    def attach_model_registry(self, registry):
+        """Score every symbol with one ModelRegistry's current models"""
+        self.ml = registry
+        for engine in self.engines.values():
+            engine.attach_model_registry(registry)
+
+    def start(self):
+        """Start one worker thread per symbol running its engine loop"""
+        for symbol, engine in self.engines.items():
+            thread = self._threads.get(symbol)
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(target=engine.run, name=f"engine-{symbol}", daemon=True)
+                self._threads[symbol] = thread
+                thread.start()
+
+    def join(self, timeout=None):
+        """Wait for the symbol workers to finish (e.g. their replay feeds ending)"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for thread in self._threads.values():
+            thread.join(None if deadline is None else max(0.0, deadline - time.perf_counter()))
+
+    def stop(self):
+        for engine in self.engines.values():
+            engine.stop()
+        self.join()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def evaluate_all(self):
+        """
+        Evaluate every symbol once, concurrently on a thread per symbol.
+        Returns {symbol: candidate or None}; an exception is logged and gives None.
+        """
+        if self._pool is None:
+            self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=len(self.engines),
+                                                               thread_name_prefix='evaluate')
+        futures = {symbol: self._pool.submit(engine.evaluate) for symbol, engine in self.engines.items()}
+        results = {}
+        for symbol, future in futures.items():
+            try:
+                results[symbol] = future.result()
+            except Exception as e:
+                self.engines[symbol].log(f"Error evaluating {symbol}: {e}")
+                results[symbol] = None
+        return results
+
+    def latency_stats(self):
+        """{symbol: {'count', 'p50_ms', 'p99_ms', 'max_ms'}} of per-call evaluate() latency"""
+        stats = {}
+        for symbol, engine in self.engines.items():
+            lat = np.array(engine.eval_latencies) * 1000
+            if len(lat):
+                stats[symbol] = {'count': len(lat), 'p50_ms': float(np.percentile(lat, 50)),
+                                 'p99_ms': float(np.percentile(lat, 99)), 'max_ms': float(lat.max())}
+            else:
+                stats[symbol] = {'count': 0, 'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+        return stats
+
+
 class DummyMLInference:
     """Dummy ML inference for testing when models are not available"""
     
@@ -197,4 +531,10 @@ class DummyMLInference:
         # Return random but realistic predictions
         p_win = random.uniform(0.45, 0.75)  # Random probability
         pred_slippage = random.uniform(1, 8)  # Random slippage in points
-        return {'p_win': p_win, 'pred_slippage': pred_slippage}
\ No newline at end of file
+        return {'p_win': p_win, 'pred_slippage': pred_slippage}
+
+    def predict_batch(self, X):
+        import numpy as np
+        preds = [self.predict(None) for _ in range(len(X))]
+        return {'p_win': np.array([p['p_win'] for p in preds]),
+                'pred_slippage': np.array([p['pred_slippage'] for p in preds])}
\ No newline at end of file
@@ -0,0 +1,279 @@
+# src/feature_store.py
+"""
+Per-bar feature matrix shared by the labeler and the live engine.
+
+The zone-independent model inputs (ATR M1/M15, volatility, momentum, time of
+day) are computed for a whole M1 history in one vectorized pass, optionally
+cached on disk, and served row by row. Zone features for a candidate come
+from zone_features(). Every name is the training column name, so the labeler
+and the live engine build the same feature dict for the same bar.
+"""
+import hashlib
+import os
+from collections import deque
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from indicators import atr, RollingATR, RollingVolatility
+from resampler import MultiTimeframe, closed_bar_counts
+from candle_buffer import bars_since, first_bar
+
+BAR_FEATURES = ['atr_m1', 'atr_m15', 'volatility_lookback', 'momentum_1m', 'momentum_5m', 'hour_of_day', 'weekday']
+INT_FEATURES = ('hour_of_day', 'weekday')
+VOLATILITY_WINDOW = 60
+# Bump when a feature definition changes so stale cache files are not reused
+FEATURE_VERSION = 1
+
+def zone_features(price, zone, point):
+    """Distance from price to the zone middle and zone width, in points"""
+    zone_mid = (zone[0] + zone[1]) / 2.0
+    return {
+        'distance_to_nearest_zone_pts': abs(price - zone_mid) / point,
+        'zone_width_pts': (zone[1] - zone[0]) / point,
+    }
+
+def rolling_volatility(close, window=VOLATILITY_WINDOW, chunk=65536):
+    """
+    out[i] = std of the window-1 close-to-close returns ending at bar i (0 for
+    i < window-1); the same two-pass arithmetic as RollingVolatility, so the
+    values are identical. Windows are materialized `chunk` rows at a time.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    out = np.zeros(len(close))
+    n = window - 1
+    if len(close) < window:
+        return out
+    returns = close[1:] / close[:-1] - 1
+    windows = sliding_window_view(returns, n)
+    for lo in range(0, len(windows), chunk):
+        w = np.ascontiguousarray(windows[lo:lo + chunk])
+        avg = w.sum(axis=1) / n
+        out[n + lo:n + lo + len(w)] = np.sqrt(((avg[:, None] - w) ** 2).sum(axis=1) / (n - 1))
+    return out
+
+def compute_bar_features(m1, m15, m15_closed, atr_period=14):
+    """
+    (len(m1), len(BAR_FEATURES)) float matrix; row i only uses M1 bars up to i
+    and the m15_closed[i] M15 bars closed by then
+    """
+    high, low, close = np.asarray(m1['high']), np.asarray(m1['low']), np.asarray(m1['close'])
+    n = len(close)
+    out = np.zeros((n, len(BAR_FEATURES)))
+    if n == 0:
+        return out
+    out[:, 0] = atr(high, low, close, period=atr_period)
+    if len(m15):
+        atr_m15 = atr(m15['high'], m15['low'], m15['close'], period=atr_period)
+        known = m15_closed >= atr_period
+        out[known, 1] = atr_m15[m15_closed[known] - 1]
+    out[:, 2] = rolling_volatility(close)
+    if n >= 5:
+        out[4:, 3] = close[4:] - close[3:-1]
+    if n >= 6:
+        out[5:, 4] = close[5:] - close[:-5]
+    ts = pd.DatetimeIndex(m1['timestamp'])
+    out[:, 5] = ts.hour
+    out[:, 6] = ts.weekday
+    return out
+
+def feature_cache_key(m1, m15, atr_period):
+    """Hash of the candle data and feature settings the matrix depends on"""
+    h = hashlib.sha1(f"v{FEATURE_VERSION}:{atr_period}:{len(m1)}:{len(m15)}".encode())
+    for df in (m1, m15):
+        h.update(np.ascontiguousarray(np.asarray(df['timestamp'], dtype='datetime64[ns]')).tobytes())
+        for col in ('open', 'high', 'low', 'close'):
+            h.update(np.ascontiguousarray(np.asarray(df[col], dtype=np.float64)).tobytes())
+    return h.hexdigest()[:20]
+
+
+class FeatureStore:
+    """
+    Feature matrix of an M1 history, one row per bar in BAR_FEATURES order.
+
+    m1, m15:    candle DataFrames, or CandleBuffers/CandleViews of a live engine
+    m15:        M15 candles; resampled from m1 when None
+    m15_closed: M15 bars closed by each M1 close (closed_bar_counts) if already known
+    cache_dir:  if set, the matrix is loaded from / saved to
+                <cache_dir>/features_<key>.npy, key hashing the candles and settings
+    max_rows:   keep only the latest max_rows rows (memory stays bounded on a
+                long-running engine); row(i) then indexes the rows kept
+
+    extend() appends the rows of bars added to the history since, using
+    rolling ATR/volatility state, so a live engine gets the same row the
+    labeler would compute over the full history. That state replays the
+    stored history once; when the history will not be around later (a
+    bounded store or candle buffers) it is set up right away.
+    """
+
+    def __init__(self, m1, m15=None, atr_period=14, m15_closed=None, cache_dir=None, max_rows=None):
+        if m15 is None:
+            m15 = MultiTimeframe(m1, timeframes=('M15',)).frames['M15']
+        if m15_closed is None:
+            m15_closed = closed_bar_counts(m15['timestamp'], 15, m1['timestamp'])
+        self.atr_period = atr_period
+        self.max_rows = max_rows
+        self.columns = list(BAR_FEATURES)
+        self.cache_path = None
+        self.loaded_from_cache = False
+        matrix = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.cache_path = os.path.join(cache_dir, f"features_{feature_cache_key(m1, m15, atr_period)}.npy")
+            if os.path.exists(self.cache_path):
+                matrix = np.load(self.cache_path, mmap_mode='r')
+                self.loaded_from_cache = True
+        if matrix is None:
+            matrix = compute_bar_features(m1, m15, m15_closed, atr_period)
+            if self.cache_path:
+                tmp = self.cache_path + '.tmp.npy'
+                np.save(tmp, matrix)
+                os.replace(tmp, self.cache_path)
+        self.origin = first_bar(m1)  # bar number of the first bar featured
+        self.first = self.origin     # bar number of matrix row 0
+        if max_rows is not None and len(matrix) > max_rows:
+            self.first += len(matrix) - max_rows
+            matrix = np.array(matrix[-max_rows:])
+        self._buffer = matrix
+        self._lo = 0
+        self.count = len(matrix)
+        self._m1 = m1
+        self._m15 = m15
+        self._stream = None
+        self._start_stream_if_needed()
+
+    @property
+    def matrix(self):
+        return self._buffer[self._lo:self._lo + self.count]
+
+    @property
+    def end(self):
+        """Bar number following the last featured bar"""
+        return self.first + self.count
+
+    def __len__(self):
+        return self.count
+
+    def frame(self):
+        """The matrix as a DataFrame with the feature names as columns"""
+        return pd.DataFrame(np.asarray(self.matrix), columns=self.columns)
+
+    def row(self, i):
+        """Feature dict of row i (negative indices count from the end)"""
+        values = self._buffer[self._lo + range(self.count)[i]]
+        out = {name: float(v) for name, v in zip(self.columns, values)}
+        for name in INT_FEATURES:
+            out[name] = int(out[name])
+        return out
+
+    def extend(self, m1, m15):
+        """
+        Add the rows of m1 bars beyond the ones already stored; m1/m15 are the
+        grown frames (earlier rows unchanged, m15 may end with a forming bar)
+        or the candle buffers they are appended to.
+        An M15 bar closing with the last stored M1 bar may arrive after it
+        (feeds emit M1 first): the last row's atr_m15 is then brought up to date.
+        Returns the number of rows added.
+        """
+        new = first_bar(m1) + len(m1) - self.end
+        if new < 0:
+            return 0
+        if self.end == self.origin:
+            self.origin = self.first = first_bar(m1)
+            self._m1, self._m15 = m1, m15
+            self._append(compute_bar_features(m1, m15, closed_bar_counts(m15['timestamp'], 15, m1['timestamp']),
+                                              self.atr_period))
+            self._start_stream_if_needed()
+            return len(m1)
+        if self._stream is None:
+            self._start_stream()
+        atr_m1, atr_m15, vol, fed, closes, last_ts = self._stream
+        self._m1, self._m15 = m1, m15
+        pending = bars_since(m15, fed)
+        p0 = fed
+        m15_high, m15_low, m15_close = (np.asarray(pending[c]) for c in ('high', 'low', 'close'))
+        m15_ts = np.asarray(pending['timestamp'])
+        last_closed = p0 + int(closed_bar_counts(m15_ts, 15, [last_ts])[0])
+        if last_closed > fed:
+            while fed < last_closed:
+                atr_m15.update(m15_high[fed - p0], m15_low[fed - p0], m15_close[fed - p0])
+                fed += 1
+            self._reserve(self.count)
+            self._buffer[self._lo + self.count - 1, 1] = atr_m15.value if fed >= self.atr_period else 0
+        if new == 0:
+            self._stream = (atr_m1, atr_m15, vol, fed, closes, last_ts)
+            return 0
+        tail = bars_since(m1, self.end)
+        high, low, close = np.asarray(tail['high']), np.asarray(tail['low']), np.asarray(tail['close'])
+        m15_closed = p0 + closed_bar_counts(m15_ts, 15, tail['timestamp'])
+        ts = pd.DatetimeIndex(np.asarray(tail['timestamp']))
+        rows = np.zeros((new, len(self.columns)))
+        for k in range(new):
+            i = self.end - self.origin + k
+            rows[k, 0] = atr_m1.update(high[k], low[k], close[k])
+            while fed < m15_closed[k]:
+                atr_m15.update(m15_high[fed - p0], m15_low[fed - p0], m15_close[fed - p0])
+                fed += 1
+            rows[k, 1] = atr_m15.value if fed >= self.atr_period else 0
+            vol.update(close[k])
+            rows[k, 2] = vol.value if i + 1 >= vol.window else 0
+            rows[k, 3] = close[k] - closes[-1] if i >= 4 else 0
+            rows[k, 4] = close[k] - closes[-5] if i >= 5 else 0
+            closes.append(close[k])
+        rows[:, 5] = ts.hour
+        rows[:, 6] = ts.weekday
+        self._stream = (atr_m1, atr_m15, vol, fed, closes, ts[-1].to_datetime64())
+        self._append(rows)
+        return new
+
+    def _start_stream_if_needed(self):
+        if self.count and (self.max_rows is not None or not isinstance(self._m1, pd.DataFrame)):
+            self._start_stream()
+
+    def _start_stream(self):
+        """Rolling state equal to the stored history (ATR replays it, volatility needs one window)"""
+        m1, m15 = self._m1, self._m15
+        n = self.end - first_bar(m1)  # m1 may have grown since the last rows were computed
+        high, low, close = (np.asarray(m1[c])[:n] for c in ('high', 'low', 'close'))
+        last_ts = np.asarray(m1['timestamp'])[n - 1]
+        fed = int(closed_bar_counts(m15['timestamp'], 15, [last_ts])[0])
+        atr_m1 = RollingATR(self.atr_period)
+        atr_m1.extend(high, low, close)
+        atr_m15 = RollingATR(self.atr_period)
+        atr_m15.extend(*(np.asarray(m15[c])[:fed] for c in ('high', 'low', 'close')))
+        vol = RollingVolatility(VOLATILITY_WINDOW)
+        vol.extend(close[-VOLATILITY_WINDOW:])
+        closes = deque(close[-5:], maxlen=5)
+        self._stream = (atr_m1, atr_m15, vol, first_bar(m15) + fed, closes, last_ts)
+
+    def _reserve(self, needed):
+        """
+        Writable room for `needed` rows from _lo; doubles when full (a cached
+        matrix is read-only). A bounded store first moves its rows back to the
+        front, so its buffer stays within 2 * max_rows rows.
+        """
+        writeable = self._buffer.flags.writeable
+        if self._lo + needed <= len(self._buffer) and writeable:
+            return
+        if 2 * needed <= len(self._buffer) and writeable:
+            grown = self._buffer  # at least half free: moving the rows is amortized O(1) per row
+        else:
+            size = max(needed, 2 * len(self._buffer), 1024)
+            if self.max_rows is not None:
+                size = max(min(size, 2 * self.max_rows), needed)
+            grown = np.empty((size, len(self.columns)))
+        grown[:self.count] = self._buffer[self._lo:self._lo + self.count]
+        self._buffer = grown
+        self._lo = 0
+
+    def _append(self, rows):
+        if self.max_rows is not None:
+            cut = max(len(rows) - self.max_rows, 0)
+            rows = rows[cut:]
+            drop = max(self.count + len(rows) - self.max_rows, 0)
+            self._lo += drop
+            self.count -= drop
+            self.first += drop + cut
+        needed = self.count + len(rows)
+        self._reserve(needed)
+        self._buffer[self._lo + self.count:self._lo + needed] = rows
+        self.count = needed
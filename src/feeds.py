@@ -0,0 +1,141 @@
+# src/feeds.py
+"""
+Market data feeds for the event-driven engine loop.
+A feed pushes BarEvent / TickEvent objects to its subscribers as bars close
+or ticks arrive, and None once it is exhausted or stopped.
+"""
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from data_loader import load_candles
+from resampler import MultiTimeframe
+
+# bar: dict with timestamp (bar open time), open, high, low, close, volume
+# created: time.perf_counter() when the event was emitted, for latency stats
+BarEvent = namedtuple('BarEvent', ['timeframe', 'bar', 'created'])
+TickEvent = namedtuple('TickEvent', ['timestamp', 'bid', 'ask', 'created'])
+
+TIMEFRAMES = {
+    'M1': pd.Timedelta(minutes=1),
+    'M15': pd.Timedelta(minutes=15),
+    'D1': pd.Timedelta(days=1),
+}
+
+def bar_close_time(event):
+    """Close time of a BarEvent's bar (its open time plus the timeframe)"""
+    return pd.Timestamp(event.bar['timestamp']) + TIMEFRAMES[event.timeframe]
+
+class ReplayFeed:
+    """
+    Replays historical M1/M15/D1 candles as bar-close events, in close-time
+    order (M1 before M15 before D1 when they close together).
+
+    start:  bars closed at or before this time are history (see history()),
+            later ones are replayed; defaults to replaying everything
+    speed:  0 replays as fast as possible, otherwise the replay clock runs
+            `speed` times faster than the candle timestamps
+    ticks:  also emit four synthetic ticks (open, low/high, close) per M1 bar,
+            ahead of its close event
+    """
+
+    def __init__(self, m1, m15, d1, start=None, speed=0.0, ticks=False, spread=0.0):
+        self.frames = {'M1': m1, 'M15': m15, 'D1': d1}
+        self.start_time = pd.Timestamp(start) if start is not None else None
+        self.speed = speed
+        self.ticks = ticks
+        self.spread = spread
+        self._subscribers = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_csv(cls, m1_path, m15_path=None, d1_path=None, **kwargs):
+        """Load the candle files; a missing M15/D1 path is resampled from M1"""
+        m1 = load_candles(m1_path)
+        mtf = MultiTimeframe(m1, timeframes=('M15', 'D1'))
+        m15 = load_candles(m15_path) if m15_path else mtf.frames['M15']
+        d1 = load_candles(d1_path) if d1_path else mtf.frames['D1']
+        return cls(m1, m15, d1, **kwargs)
+
+    def history(self):
+        """(m1, m15, d1) frames of the bars closed by the replay start"""
+        out = []
+        for tf in ('M1', 'M15', 'D1'):
+            df = self.frames[tf]
+            if self.start_time is None:
+                out.append(df.iloc[:0].reset_index(drop=True))
+            else:
+                closed = (df['timestamp'] + TIMEFRAMES[tf]) <= self.start_time
+                out.append(df[closed].reset_index(drop=True))
+        return tuple(out)
+
+    def subscribe(self, callback):
+        """callback(event) is called from the replay thread for every event"""
+        self._subscribers.append(callback)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def events(self):
+        """Generator of (event_time, event) in replay order, without pacing"""
+        for close_time, tf, row in self._schedule():
+            bar = self.frames[tf].iloc[row]
+            bar = {k: bar[k] for k in ('timestamp', 'open', 'high', 'low', 'close', 'volume') if k in bar}
+            if self.ticks and tf == 'M1':
+                for tick_time, price in self._bar_ticks(bar):
+                    yield tick_time, TickEvent(tick_time, price, price + self.spread, time.perf_counter())
+            yield close_time, BarEvent(tf, bar, time.perf_counter())
+
+    def _schedule(self):
+        """(close_time, timeframe, row) for every replayed bar, in emission order"""
+        parts = []
+        for rank, tf in enumerate(('M1', 'M15', 'D1')):
+            df = self.frames[tf]
+            close = (df['timestamp'] + TIMEFRAMES[tf]).to_numpy()
+            rows = np.arange(len(df))
+            if self.start_time is not None:
+                keep = close > self.start_time.to_datetime64()
+                close, rows = close[keep], rows[keep]
+            parts.append((close, np.full(len(rows), rank), rows))
+        close = np.concatenate([p[0] for p in parts])
+        rank = np.concatenate([p[1] for p in parts])
+        rows = np.concatenate([p[2] for p in parts])
+        order = np.lexsort((rank, close))
+        names = ('M1', 'M15', 'D1')
+        return [(pd.Timestamp(close[k]), names[rank[k]], int(rows[k])) for k in order]
+
+    def _bar_ticks(self, bar):
+        """Open, low/high (in the order a bullish/bearish bar would visit them), close"""
+        t0 = bar['timestamp']
+        if bar['close'] >= bar['open']:
+            path = (bar['open'], bar['low'], bar['high'], bar['close'])
+        else:
+            path = (bar['open'], bar['high'], bar['low'], bar['close'])
+        return [(t0 + pd.Timedelta(seconds=15 * k), price) for k, price in enumerate(path)]
+
+    def _run(self):
+        last_time = None
+        for event_time, event in self.events():
+            if self._stop.is_set():
+                break
+            if self.speed and last_time is not None:
+                delay = (event_time - last_time).total_seconds() / self.speed
+                if delay > 0 and self._stop.wait(delay):
+                    break
+            last_time = event_time
+            event = event._replace(created=time.perf_counter())
+            for callback in self._subscribers:
+                callback(event)
+        for callback in self._subscribers:
+            callback(None)
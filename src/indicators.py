@@ -1,4 +1,6 @@
 # src/indicators.py
+import math
+from collections import deque
 import numpy as np
 import pandas as pd
 
@@ -14,6 +16,140 @@ def atr(series_high, series_low, series_close, period=14):
     atr = pd.Series(tr).rolling(period).mean()
     return atr.values
 
+def entry_atr(high, low, close, period, default=0.0001):
+    """
+    ATR that sizes the SL/TP of a trade entered at each bar's close: the mean
+    true range of the `period` bars before it, the first of them ranged
+    high - low (as atr() over just those bars); `default` for the first
+    `period` bars. The window is summed oldest first, so the value of a bar
+    does not depend on how much history the arrays hold.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    out = np.full(n, default)
+    if n > period:
+        prev_close = np.concatenate(([close[0]], close[:-1]))
+        tr = np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+        total = (high - low)[:n - period].copy()
+        for k in range(1, period):
+            total += tr[k:n - period + k]
+        out[period:] = total / period
+    return out
+
+class RollingATR:
+    """
+    Streaming atr(): update() takes one bar, value is the mean true range of
+    the last `period` bars (NaN before `period` bars) and equals
+    atr(all bars so far)[-1] exactly. The window sum is kept the way pandas'
+    rolling mean keeps it (Kahan-compensated, with separate compensations for
+    the bars added and removed), so the two never differ by a rounding.
+    """
+
+    def __init__(self, period=14):
+        self.period = period
+        self.count = 0
+        self.value = np.nan
+        self._window = deque(maxlen=period)
+        self._sum = 0.0
+        self._add_error = 0.0
+        self._remove_error = 0.0
+        self._negative = 0  # negative true ranges in the window (only from high < low)
+        self._same = 0  # trailing run of equal true ranges
+        self._prev_close = None
+
+    def update(self, high, low, close):
+        """Add one bar; returns the new ATR"""
+        high, low, close = float(high), float(low), float(close)
+        prev_close = close if self._prev_close is None else self._prev_close
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        self._prev_close = close
+        self.count += 1
+
+        if len(self._window) == self.period:
+            old = self._window[0]
+            y = -old - self._remove_error
+            t = self._sum + y
+            self._remove_error = t - self._sum - y
+            self._sum = t
+            self._negative -= math.copysign(1.0, old) < 0
+        y = tr - self._add_error
+        t = self._sum + y
+        self._add_error = t - self._sum - y
+        self._sum = t
+        self._negative += math.copysign(1.0, tr) < 0
+        self._same = self._same + 1 if self._window and tr == self._window[-1] else 1
+        self._window.append(tr)
+
+        if len(self._window) < self.period:
+            self.value = np.nan
+        elif self._same >= self.period:
+            self.value = tr
+        else:
+            self.value = self._sum / self.period
+            if (self._negative == 0 and self.value < 0) or (self._negative == self.period and self.value > 0):
+                self.value = 0.0
+        return self.value
+
+    def extend(self, highs, lows, closes):
+        """Add several bars, oldest first; returns the ATR after the last one"""
+        for h, l, c in zip(highs, lows, closes):
+            self.update(h, l, c)
+        return self.value
+
+class RollingVolatility:
+    """
+    Streaming close-to-close volatility: value equals
+    pd.Series(closes[-window:]).pct_change().dropna().std() for the closes
+    seen so far (NaN with fewer than two returns), with the same two-pass
+    variance pandas uses over window-1 returns. update() is O(1); the
+    variance is computed on the first read after an update and cached, so
+    reading value again is O(1) too.
+    """
+
+    def __init__(self, window=60):
+        self.window = window
+        self.count = 0
+        self._size = max(window - 1, 0)
+        # every return is written twice, so the last _size of them are always
+        # one contiguous slice, oldest first: _buffer[_pos:_pos + _size]
+        self._buffer = np.zeros(2 * self._size)
+        self._pos = 0
+        self._filled = 0
+        self._value = np.nan
+        self._stale = False
+        self._prev_close = None
+
+    def update(self, close):
+        """Add one close"""
+        close = float(close)
+        if self._prev_close is not None and self._size:
+            r = close / self._prev_close - 1
+            self._buffer[self._pos] = self._buffer[self._pos + self._size] = r
+            self._pos = (self._pos + 1) % self._size
+            self._filled = min(self._filled + 1, self._size)
+            self._stale = True
+        self._prev_close = close
+        self.count += 1
+
+    def extend(self, closes):
+        for c in closes:
+            self.update(c)
+
+    @property
+    def value(self):
+        if self._stale:
+            self._stale = False
+            n = self._filled
+            if n < 2:
+                self._value = np.nan
+            else:
+                r = self._buffer[self._pos:self._pos + n] if n == self._size else self._buffer[:n]
+                avg = r.sum() / n
+                self._value = float(np.sqrt(((avg - r) ** 2).sum() / (n - 1)))
+        return self._value
+
 def daily_bias_from_D1(d1_df, now_price):
     """
     ICT-style bias:
@@ -21,22 +157,75 @@ def daily_bias_from_D1(d1_df, now_price):
     - bias short if price < daily_open and price < prev_day_low or negative momentum
     returns 1 (long), -1 (short), 0 neutral
     """
-    today_open = d1_df.iloc[-1]['open']
-    prev_high = d1_df.iloc[-2]['high']
-    prev_low  = d1_df.iloc[-2]['low']
-    c1 = d1_df.iloc[-1]['close']; c2 = d1_df.iloc[-2]['close']; c3 = d1_df.iloc[-3]['close']
-    momentum = (c1 - c2) + (c2 - c3)
-    if (now_price > today_open and now_price > prev_high) or momentum > 0:
-        return 1
-    if (now_price < today_open and now_price < prev_low) or momentum < 0:
-        return -1
-    return 0
+    return daily_bias_from_arrays(np.asarray(d1_df['open']), np.asarray(d1_df['high']),
+                                  np.asarray(d1_df['low']), np.asarray(d1_df['close']), now_price)
+
+def daily_bias_intraday(df_m1, df_d1, now_price):
+    """
+    daily_bias_from_D1 as of the last M1 bar, like the labeler's per-bar bias:
+    today's bar is the forming one (open of today's first M1 bar, close
+    now_price) and the D1 bars used are those closed before today started,
+    so a D1 history of closed days only does not pass yesterday off as today.
+    Returns 0 until two days before today have closed.
+    """
+    m1_time = np.asarray(df_m1['timestamp'], dtype='datetime64[ns]')
+    day_start = m1_time[-1].astype('datetime64[D]').astype('datetime64[ns]')
+    d1_close = np.asarray(df_d1['timestamp'], dtype='datetime64[ns]') + np.timedelta64(1, 'D')
+    prior = np.searchsorted(d1_close, day_start, side='right')
+    if prior < 2:
+        return 0
+    today_open = np.asarray(df_m1['open'])[np.searchsorted(m1_time, day_start)]
+    high, low, close = (np.asarray(df_d1[col], dtype=float) for col in ('high', 'low', 'close'))
+    return int(daily_bias_rule(now_price, today_open, high[prior - 1], low[prior - 1],
+                               now_price, close[prior - 1], close[prior - 2]))
+
+def daily_bias_from_arrays(d1_open, d1_high, d1_low, d1_close, now_price):
+    """
+    Same rule as daily_bias_from_D1 on raw D1 arrays (newest last),
+    for callers that keep candles as NumPy arrays instead of DataFrames
+    """
+    return int(daily_bias_rule(now_price, d1_open[-1], d1_high[-2], d1_low[-2],
+                               d1_close[-1], d1_close[-2], d1_close[-3]))
+
+def daily_bias_rule(price, today_open, prev_high, prev_low, close, prev_close, prev_close2):
+    """
+    The daily bias rule element-wise, on scalars or arrays (one entry per
+    bar): close is today's close so far, prev_close / prev_close2 the closes
+    of the two days before. Returns 1 (long), -1 (short), 0 neutral.
+    """
+    momentum = (close - prev_close) + (prev_close - prev_close2)
+    long_ = ((price > today_open) & (price > prev_high)) | (momentum > 0)
+    short = ((price < today_open) & (price < prev_low)) | (momentum < 0)
+    return np.where(long_, 1, np.where(short, -1, 0))
 
 def find_swings_levels(df_m15, lookback=120):
     """
     Returns list of swing levels (highs and lows) in last lookback M15 bars
     Very simple approach: local highs/lows
     """
+    return find_swings_levels_arrays(np.asarray(df_m15['high']), np.asarray(df_m15['low']), lookback)
+
+def find_swings_levels_arrays(high, low, lookback=120):
+    """
+    find_swings_levels on raw high/low arrays (oldest first), no DataFrame copy.
+    A bar is a swing high (low) when its high (low) is strictly above (below)
+    both neighbours; the two bars at each end of the window are never swings.
+    Returns sorted unique levels as floats.
+    """
+    if lookback <= 0:
+        return []
+    h = np.asarray(high, dtype=float)[-lookback:]
+    l = np.asarray(low, dtype=float)[-lookback:]
+    if len(h) < 5:
+        return []
+    h_mid = h[2:-2]
+    l_mid = l[2:-2]
+    swing_highs = h_mid[(h_mid > h[1:-3]) & (h_mid > h[3:-1])]
+    swing_lows = l_mid[(l_mid < l[1:-3]) & (l_mid < l[3:-1])]
+    return np.unique(np.concatenate([swing_highs, swing_lows])).tolist()
+
+def _find_swings_levels_loop(df_m15, lookback=120):
+    """Original scalar implementation, kept as the reference for tests and benchmarks"""
     rs = df_m15.copy().reset_index(drop=True).tail(lookback)
     highs = []
     lows = []
@@ -75,12 +264,102 @@ def is_price_touch_zone(price, zone, buffer_points):
     low, high = zone
     return (price >= (low - buffer_points)) and (price <= (high + buffer_points))
 
+def target_zone_index(mids, price, bias):
+    """
+    Index into ascending zone mids of the target zone, element-wise on
+    scalars or arrays: the nearest mid strictly below price for long bias,
+    strictly above for short; -1 if there is none or the bias is neutral
+    """
+    below = np.searchsorted(mids, price, side='left') - 1
+    above = np.searchsorted(mids, price, side='right')
+    k = np.where(bias == 1, below, np.where(bias == -1, above, -1))
+    return np.where(k < len(mids), k, -1)
+
+def candle_anatomy(open_, high, low, close, point):
+    """
+    Per-bar candle shape for whole arrays at once:
+    upper/lower wick and body in points, body as % of the bar range,
+    direction 1 (bullish), -1 (bearish), 0 (doji)
+    """
+    open_ = np.asarray(open_, dtype=float)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    body_top = np.maximum(open_, close)
+    body_bot = np.minimum(open_, close)
+    bar_range = high - low
+    body = body_top - body_bot
+    return {
+        'upper_wick_pts': (high - body_top) / point,
+        'lower_wick_pts': (body_bot - low) / point,
+        'body_pts': body / point,
+        'body_pct': np.divide(body * 100, bar_range, out=np.zeros_like(body), where=bar_range > 0),
+        'direction': np.sign(close - open_).astype(int),
+    }
+
+def rejection_masks(open_, high, low, close, min_wick_pts, point):
+    """
+    Zone-independent part of the M1 rejection rule for every bar:
+    long_mask  = bullish candle with a lower wick of at least min_wick_pts
+    short_mask = bearish candle with an upper wick of at least min_wick_pts
+    """
+    return shape_rejection_masks(candle_anatomy(open_, high, low, close, point), min_wick_pts)
+
+def shape_rejection_masks(shape, min_wick_pts):
+    """rejection_masks from a candle_anatomy result, for callers that keep the shape"""
+    long_mask = (shape['lower_wick_pts'] >= min_wick_pts) & (shape['direction'] == 1)
+    short_mask = (shape['upper_wick_pts'] >= min_wick_pts) & (shape['direction'] == -1)
+    return long_mask, short_mask
+
+def find_rejection(long_mask, short_mask, low, high, end, n_candles, zone, point):
+    """
+    Index of the oldest bar among the n_candles ending at bar `end` that
+    rejects zone (a long rejection wicking to within 2 points above the zone
+    top, or a short one reaching within 2 points below its bottom), or -1
+    """
+    zone_low, zone_high = zone
+    start = max(0, end + 1 - n_candles)
+    window = slice(start, end + 1)
+    hits = rejects_zone(long_mask[window], short_mask[window], np.asarray(low[window]), np.asarray(high[window]),
+                        zone_low, zone_high, point)
+    k = int(np.argmax(hits)) if len(hits) else 0
+    return start + k if len(hits) and hits[k] else -1
+
+def rejects_zone(long_mask, short_mask, low, high, zone_low, zone_high, point):
+    """
+    Element-wise: the bar is a long rejection wicking to within 2 points
+    above the zone top, or a short one reaching within 2 points below its bottom
+    """
+    return (long_mask & (low <= zone_high + point*2)) | (short_mask & (high >= zone_low - point*2))
+
 def check_rejection_m1(df_m1_recent, zone, min_wick_pts, point):
     """
     df_m1_recent: pandas DataFrame of most recent M1 candles (newest last)
     We'll check last N candles for long/short rejection depending on bias
     Return True/False
     """
+    return rejection_candle(df_m1_recent, zone, min_wick_pts, point) is not None
+
+def rejection_candle(df_m1_recent, zone, min_wick_pts, point):
+    """
+    (wick_pts, body_pct) of the oldest candle in df_m1_recent that rejects
+    zone, or None; wick_pts is the lower wick for long, upper for short rejections
+    """
+    o, h, l, c = (np.asarray(df_m1_recent[k], dtype=float) for k in ('open', 'high', 'low', 'close'))
+    shape = candle_anatomy(o, h, l, c, point)
+    long_mask, short_mask = shape_rejection_masks(shape, min_wick_pts)
+    k = find_rejection(long_mask, short_mask, l, h, len(c) - 1, len(c), zone, point)
+    if k < 0:
+        return None
+    return rejection_features(shape, long_mask, k)
+
+def rejection_features(shape, long_mask, k):
+    """(wick_pts, body_pct) of rejecting bar k: the lower wick for a long rejection, upper for short"""
+    wick = shape['lower_wick_pts'][k] if long_mask[k] else shape['upper_wick_pts'][k]
+    return float(wick), float(shape['body_pct'][k])
+
+def _check_rejection_m1_loop(df_m1_recent, zone, min_wick_pts, point):
+    """Original iterrows implementation, kept as the reference for tests and benchmarks"""
     low, high = zone
     for _, row in df_m1_recent.iterrows():
         body_top = max(row['open'], row['close'])
@@ -92,4 +371,4 @@ def check_rejection_m1(df_m1_recent, zone, min_wick_pts, point):
             return True
         if upper_wick/point >= min_wick_pts and row['high'] >= low - point*2 and row['close'] < row['open']:
             return True
-    return False
\ No newline at end of file
+    return False
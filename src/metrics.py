@@ -0,0 +1,243 @@
+# src/metrics.py
+"""
+Lightweight instrumentation for the signal pipeline: per-stage timers,
+counters and latency percentiles, exported as JSON or Prometheus text.
+
+Everything records into the module-level METRICS registry, which starts
+disabled; a disabled timer or counter is a single flag check.
+
+    from metrics import METRICS
+    METRICS.enable()
+    ... run the engine ...
+    print(METRICS.report())
+    METRICS.export('metrics.prom')      # or .json
+    METRICS.serve(9108)                 # http://localhost:9108/metrics
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class _StageTimer:
+    __slots__ = ('metrics', 'stage', 't0')
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.t0)
+        return False
+
+_DISABLED = contextlib.nullcontext()
+
+
+class Metrics:
+    """
+    Registry of stage latencies and event counters.
+
+    window: latest observations kept per stage for the percentiles; count and
+            sum cover every observation since the last reset()
+    """
+
+    def __init__(self, enabled=False, window=10000, prefix='ictbot'):
+        self.enabled = enabled
+        self.window = window
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._totals = {}
+        self._counters = {}
+        self._exporter = None
+        self._server = None
+
+    def enable(self):
+        self.enabled = True
+        return self
+
+    def disable(self):
+        self.enabled = False
+        return self
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._counters.clear()
+
+    def timer(self, stage):
+        """Context manager timing one pass through `stage`"""
+        if not self.enabled:
+            return _DISABLED
+        return _StageTimer(self, stage)
+
+    def timed(self, stage):
+        """Decorator timing every call of the function as `stage`"""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                t0 = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(stage, time.perf_counter() - t0)
+            return wrapper
+        return decorate
+
+    def observe(self, stage, seconds):
+        """Record one duration (seconds) for `stage`"""
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+                self._totals[stage] = [0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[stage]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def count(self, name, n=1):
+        """Increment counter `name`"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def snapshot(self):
+        """
+        {'timestamp', 'stages': {stage: {count, sum_s, mean_ms, p50_ms, p95_ms,
+        p99_ms, max_ms}}, 'counters': {name: value}}
+        """
+        with self._lock:
+            samples = {stage: np.array(s) for stage, s in self._samples.items()}
+            totals = {stage: tuple(t) for stage, t in self._totals.items()}
+            counters = dict(self._counters)
+        stages = {}
+        for stage, values in samples.items():
+            ms = values * 1000
+            count, total = totals[stage]
+            stats = {'count': count, 'sum_s': total, 'mean_ms': total / count * 1000}
+            for q, value in zip(QUANTILES, np.percentile(ms, [q * 100 for q in QUANTILES])):
+                stats[f"p{round(q * 100)}_ms"] = float(value)
+            stats['max_ms'] = float(ms.max())
+            stages[stage] = stats
+        return {'timestamp': time.time(), 'stages': stages, 'counters': counters}
+
+    def report(self):
+        """Per-stage latency table, slowest p99 first, then the counters"""
+        snap = self.snapshot()
+        lines = [f"{'stage':<24}{'count':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for stage, s in sorted(snap['stages'].items(), key=lambda kv: -kv[1]['p99_ms']):
+            lines.append(f"{stage:<24}{s['count']:>9}{s['p50_ms']:>10.3f}{s['p95_ms']:>10.3f}"
+                         f"{s['p99_ms']:>10.3f}{s['max_ms']:>10.3f}")
+        for name, value in sorted(snap['counters'].items()):
+            lines.append(f"{name:<24}{value:>9}")
+        return "\n".join(lines)
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Prometheus text format: a summary per stage (seconds) and a counter per event"""
+        snap = self.snapshot()
+        name = f"{self.prefix}_stage_seconds"
+        lines = [f"# HELP {name} Signal pipeline stage latency", f"# TYPE {name} summary"]
+        for stage, s in sorted(snap['stages'].items()):
+            for q in QUANTILES:
+                value = s[f"p{round(q * 100)}_ms"] / 1000
+                lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {value!r}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {s["sum_s"]!r}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {s["count"]}')
+        for counter, value in sorted(snap['counters'].items()):
+            metric = f"{self.prefix}_{counter}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write a snapshot to path: Prometheus text for .prom/.txt, JSON otherwise"""
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(text)
+        os.replace(tmp, path)  # readers never see a half-written file
+        return path
+
+    def start_export(self, path, interval=10.0):
+        """Re-export to path every `interval` seconds from a daemon thread"""
+        self.stop_export()
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                self.export(path)
+            self.export(path)
+
+        thread = threading.Thread(target=loop, name='metrics-export', daemon=True)
+        thread.start()
+        self._exporter = (stop, thread)
+
+    def stop_export(self):
+        if self._exporter is not None:
+            stop, thread = self._exporter
+            stop.set()
+            thread.join()
+            self._exporter = None
+
+    def serve(self, port=9108, host='127.0.0.1'):
+        """
+        Serve /metrics (Prometheus text) and /metrics.json over HTTP from a
+        daemon thread; returns the server (its server_address has the port)
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/metrics.json'):
+                    body, ctype = metrics.to_json(), 'application/json'
+                elif self.path.startswith('/metrics'):
+                    body, ctype = metrics.to_prometheus(), 'text/plain; version=0.0.4'
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', ctype)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.stop_serving()
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        return self._server
+
+    def stop_serving(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+METRICS = Metrics()
@@ -3,41 +3,500 @@ import joblib
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.model_selection import train_test_split
-
-def train_models(features_csv_path, out_dir):
-    df = pd.read_csv(features_csv_path, parse_dates=['timestamp'])
-    # Preprocess - choose features and label columns
-    X = df[['atr_m1','distance_to_nearest_zone_pts','zone_width_pts','planned_rr','spread_pts','hour_of_day']].fillna(0)
-    y = df['win'].astype(int)
-    X_train, X_test, y_train, y_test = train_test_split(X, y, shuffle=False, test_size=0.2)
-    clf = RandomForestClassifier(n_estimators=200, max_depth=8, random_state=42)
-    clf.fit(X_train, y_train)
-    import os
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from compiled_forest import CompiledForest
+from metrics import METRICS
+from training_store import TrainingStore
+
+# Model input columns, in training order
+FEATURE_COLUMNS = ['atr_m1','distance_to_nearest_zone_pts','zone_width_pts','planned_rr','spread_pts','hour_of_day']
+# Older names of the same features (the live signal generator used to emit these)
+FEATURE_ALIASES = {'distance_to_nearest_zone_pts': 'dist_zone_pts'}
+# Values used when a feature dict lacks a feature (0 otherwise)
+FEATURE_DEFAULTS = {'planned_rr': 1}
+SCHEMA_FILE = 'feature_schema.json'
+# Memory-mappable exports of the models (see export_compiled_models)
+COMPILED_DIR = 'compiled'
+MANIFEST_FILE = 'manifest.json'
+ARTIFACT_FORMAT = 1
+MODEL_FILES = {'clf_win': 'clf_win.joblib', 'reg_slip': 'reg_slip.joblib'}
+# Training labels, and the rows the saved models were fitted on (see update_models)
+LABEL_COLUMNS = ['win', 'slippage_pts']
+TRAINING_STATE_FILE = 'training_state.json'
+
+def save_feature_schema(out_dir, features=FEATURE_COLUMNS):
+    """Write the model input column order next to the model files"""
+    with open(os.path.join(out_dir, SCHEMA_FILE), 'w') as f:
+        json.dump({'features': list(features)}, f, indent=2)
+
+def load_feature_schema(model_dir, model=None):
+    """
+    Model input columns: the schema file in model_dir if present, else the
+    names the model was fitted with, else FEATURE_COLUMNS
+    """
+    path = os.path.join(model_dir, SCHEMA_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            return list(json.load(f)['features'])
+    if model is not None and hasattr(model, 'feature_names_in_'):
+        return [str(c) for c in model.feature_names_in_]
+    return list(FEATURE_COLUMNS)
+
+def feature_value(features_dict, name):
+    """Value of a model input column from a feature dict, by training name or live alias"""
+    if name in features_dict:
+        return features_dict[name]
+    return features_dict.get(FEATURE_ALIASES.get(name), FEATURE_DEFAULTS.get(name, 0))
+
+# Model families train_models can fit
+TRAINING_BACKENDS = ('rf', 'hgb', 'lightgbm')
+
+def _make_models(backend, n_jobs, max_rounds):
+    """Unfitted (classifier, regressor) of a training backend"""
+    if backend == 'rf':
+        return (RandomForestClassifier(n_estimators=200, max_depth=8, random_state=42, n_jobs=n_jobs),
+                RandomForestRegressor(n_estimators=100, max_depth=8, random_state=42, n_jobs=n_jobs))
+    if backend == 'hgb':
+        from sklearn.ensemble import HistGradientBoostingClassifier, HistGradientBoostingRegressor
+        params = dict(max_iter=max_rounds, learning_rate=0.05, max_leaf_nodes=31, max_depth=8,
+                      early_stopping=False, random_state=42)
+        return HistGradientBoostingClassifier(**params), HistGradientBoostingRegressor(**params)
+    if backend == 'lightgbm':
+        try:
+            import lightgbm
+        except ImportError as e:
+            raise ImportError("backend 'lightgbm' needs the lightgbm package (pip install lightgbm)") from e
+        params = dict(n_estimators=max_rounds, learning_rate=0.05, num_leaves=31, max_depth=8,
+                      random_state=42, n_jobs=n_jobs, verbose=-1)
+        return lightgbm.LGBMClassifier(**params), lightgbm.LGBMRegressor(**params)
+    raise ValueError(f"unknown training backend {backend!r}; expected one of {TRAINING_BACKENDS}")
+
+def load_training_rows(source, start=0):
+    """
+    Model inputs and labels of the labeled trades in `source`, a CSV file or a
+    TrainingStore directory, from row `start` on; only those columns are read
+    """
+    columns = FEATURE_COLUMNS + LABEL_COLUMNS
+    if os.path.isdir(source):
+        return TrainingStore(source).read(columns, start=start)
+    return pd.read_csv(source, usecols=columns, skiprows=range(1, start + 1))[columns]
+
+def split_point(n_rows, test_size=0.2):
+    """Rows before the time-ordered validation split (as train_test_split with shuffle=False)"""
+    return n_rows - int(np.ceil(test_size * n_rows))
+
+def load_training_state(model_dir):
+    """Backend and rows trained on, as recorded by train_models/update_models, or None"""
+    path = os.path.join(model_dir, TRAINING_STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def _validation_loss(model, X, y):
+    if hasattr(model, 'predict_proba'):
+        p = np.clip(model.predict_proba(X)[:, 1], 1e-15, 1 - 1e-15)
+        return float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+    return float(np.mean((model.predict(X) - y) ** 2))
+
+def _fit_hgb(model, X_train, y_train, X_val, y_val, patience, step=10):
+    """
+    Fit a HistGradientBoosting model up to max_iter rounds, stopping once the
+    loss on the given (time-ordered) validation rows has not improved for
+    `patience` rounds. sklearn's own early stopping holds out a random sample
+    unless fit takes X_val (scikit-learn >= 1.7), and compares against the
+    scores of earlier fits when warm-started; otherwise `step` rounds at a
+    time are added with warm_start, and the model is then refitted from its
+    starting point up to the best round. A fitted model keeps its rounds and
+    gets new ones fitted to X_train.
+    Returns (fitted model, boosting rounds); the model may be a new object.
+    """
+    import copy
+    import inspect
+    base = getattr(model, 'n_iter_', 0)
+    if not base and 'X_val' in inspect.signature(model.fit).parameters:
+        model.set_params(early_stopping=True, n_iter_no_change=patience, scoring='loss')
+        model.fit(X_train, y_train, X_val=X_val, y_val=y_val)
+        return model, model.n_iter_
+    max_rounds = model.max_iter
+    model.set_params(warm_start=True, early_stopping=False)
+    start = copy.deepcopy(model)
+    model.set_params(max_iter=min(base + step, max_rounds))
+    best, best_round = (_validation_loss(model, X_val, y_val) if base else np.inf), base
+    while True:
+        model.fit(X_train, y_train)
+        loss = _validation_loss(model, X_val, y_val)
+        if loss < best:
+            best, best_round = loss, model.n_iter_
+        if model.n_iter_ >= max_rounds or model.n_iter_ - best_round >= patience:
+            break
+        model.set_params(max_iter=min(model.max_iter + step, max_rounds))
+    if model.n_iter_ != best_round:
+        # no row or feature subsampling: the same rounds again, stopping at the best one
+        model = start
+        if best_round > base:
+            model.set_params(max_iter=best_round)
+            model.fit(X_train, y_train)
+    return model, best_round
+
+def _fit_model(model, X_train, y_train, X_val, y_val, patience):
+    """
+    Fit one model of any backend on the training rows; boosted models stop
+    early on the validation rows. Fitted models are extended: LightGBM and
+    HistGradientBoosting with new boosting rounds, forests with the trees
+    added by their warm_start n_estimators. Returns (fitted model, boosting
+    rounds or trees, seconds); the fitted model may be a new object.
+    """
+    t0 = time.perf_counter()
+    if type(model).__module__.startswith('lightgbm'):
+        import lightgbm
+        model.fit(X_train, y_train, eval_set=[(X_val, y_val)],
+                  callbacks=[lightgbm.early_stopping(patience, verbose=False)],
+                  init_model=model.booster_ if hasattr(model, 'booster_') else None)
+        rounds = model.booster_.current_iteration()
+    elif hasattr(model, 'max_iter'):
+        model, rounds = _fit_hgb(model, X_train, y_train, X_val, y_val, patience)
+        model.set_params(warm_start=False)
+    else:
+        model.fit(X_train, y_train)
+        rounds = len(model.estimators_)
+        # scoring one candidate across a thread pool costs more than it saves
+        model.set_params(n_jobs=None, warm_start=False)
+    return model, rounds, time.perf_counter() - t0
+
+def _fit_and_save(out_dir, models, X, labels, split, patience, concurrent, report, state):
+    """
+    Fit models ({name: model}) on rows :split of X/labels ({name: Series}),
+    score them on rows split:, then save them with the feature schema,
+    training state and (when compilable) the compiled export.
+    Returns `report` with per-model fit seconds, rounds, size and scores.
+    """
+    X_train, X_val = X.iloc[:split], X.iloc[split:]
+    args = {name: (model, X_train, labels[name].iloc[:split], X_val, labels[name].iloc[split:], patience)
+            for name, model in models.items()}
+    t0 = time.perf_counter()
+    if concurrent:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=len(models)) as pool:
+            futures = {name: pool.submit(_fit_model, *a) for name, a in args.items()}
+            fitted = {name: future.result() for name, future in futures.items()}
+    else:
+        fitted = {name: _fit_model(*a) for name, a in args.items()}
+    models = {name: fitted[name][0] for name in models}
+    report.update(train_rows=len(X_train), val_rows=len(X_val), wall_s=time.perf_counter() - t0, models={})
+
     os.makedirs(out_dir, exist_ok=True)
-    joblib.dump(clf, f"{out_dir}/clf_win.joblib")
-    # slippage regression
-    from sklearn.linear_model import Ridge
-    X2 = X; y2 = df['slippage_pts'].fillna(0)
-    X2_train, X2_test, y2_train, y2_test = train_test_split(X2, y2, shuffle=False, test_size=0.2)
-    reg = RandomForestRegressor(n_estimators=100, max_depth=8, random_state=42)
-    reg.fit(X2_train, y2_train)
-    joblib.dump(reg, f"{out_dir}/reg_slip.joblib")
+    for name, model in models.items():
+        path = os.path.join(out_dir, MODEL_FILES[name])
+        joblib.dump(model, path)
+        _, rounds, fit_s = fitted[name]
+        entry = {'fit_s': fit_s, 'rounds': int(rounds), 'size_bytes': os.path.getsize(path)}
+        y_val = labels[name].iloc[split:].to_numpy(dtype=float)
+        if name == 'clf_win':
+            p = model.predict_proba(X_val)[:, 1]
+            entry.update(val_logloss=_validation_loss(model, X_val, y_val), val_brier=float(np.mean((p - y_val) ** 2)),
+                         val_accuracy=float(np.mean((p >= 0.5) == y_val)))
+        else:
+            err = model.predict(X_val) - y_val
+            entry.update(val_mae=float(np.mean(np.abs(err))), val_rmse=float(np.sqrt(np.mean(err ** 2))))
+        report['models'][name] = entry
+    save_feature_schema(out_dir, FEATURE_COLUMNS)
+    with open(os.path.join(out_dir, TRAINING_STATE_FILE), 'w') as f:
+        json.dump(state, f, indent=2)
+    export_compiled_models(out_dir, models)
+    return report
+
+def _inputs_and_labels(df):
+    X = df[FEATURE_COLUMNS].fillna(0)
+    return X, {'clf_win': df['win'].astype(int), 'reg_slip': df['slippage_pts'].fillna(0)}
+
+def train_models(features_csv_path, out_dir, backend='rf', n_jobs=-1, concurrent=True, max_rounds=1000,
+                 patience=50):
+    """
+    Fit the win classifier and slippage regressor on the first 80% of the
+    labeled trades and score them on the last 20% (time-ordered split).
+
+    features_csv_path: labeled trades CSV, or a TrainingStore directory
+    backend:    'rf' (random forests), 'hgb' (sklearn histogram gradient
+                boosting) or 'lightgbm' (needs the lightgbm package)
+    n_jobs:     worker threads for the forests / LightGBM (-1: all cores;
+                HistGradientBoosting uses all OpenMP threads)
+    concurrent: fit the two models at the same time in two threads
+    max_rounds: boosting round cap; boosted models stop early once the
+                validation loss has not improved for `patience` rounds
+
+    Saves the models, their feature schema, the training state read by
+    update_models and the compiled export to out_dir (for LightGBM, a
+    manifest that serves the joblib files; see export_compiled_models).
+    Returns a report: per model the fit seconds, rounds, joblib size and
+    validation scores, plus the total wall-clock seconds.
+    """
+    df = load_training_rows(features_csv_path)
+    X, labels = _inputs_and_labels(df)
+    split = split_point(len(df))
+    clf, reg = _make_models(backend, n_jobs, max_rounds)
+    report = _fit_and_save(out_dir, {'clf_win': clf, 'reg_slip': reg}, X, labels, split, patience, concurrent,
+                           {'backend': backend, 'mode': 'full'},
+                           {'backend': backend, 'source_rows': len(df), 'train_end': split})
     print("Training complete. Models saved to", out_dir)
+    return report
+
+def update_models(features_csv_path, model_dir, rounds=None, n_jobs=-1, concurrent=True, max_rounds=200,
+                  patience=20):
+    """
+    Incremental retraining: extend the models of model_dir with the labeled
+    trades added since they were trained, instead of refitting on all of
+    them. Only rows from the previous split point on are read (use a
+    TrainingStore directory as the source so this costs nothing per old row);
+    they are split 80/20 in time like train_models. Forests get new trees
+    fitted to the new rows (`rounds` of them, by default in proportion to
+    the rows added, so every row keeps about the same weight); boosted
+    models get up to `rounds` (default max_rounds) new boosting rounds,
+    stopped early on the new validation rows.
+
+    The validation scores cover only the newest rows; compare them with a
+    train_models refit on the same source to measure the drift.
+    If the new training rows lack one of the win classifier's classes
+    (e.g. a batch of losses only), the new trees or rounds would be fitted
+    to different classes, so the models are refitted with train_models on
+    all rows instead (report mode 'full').
+    Returns the report as train_models, or None if there are no new rows.
+    """
+    state = load_training_state(model_dir)
+    if state is None:
+        raise FileNotFoundError(f"no training state in {model_dir}; run train_models first")
+    df = load_training_rows(features_csv_path, start=state['train_end'])
+    new_rows = state['train_end'] + len(df) - state['source_rows']
+    split = split_point(len(df))
+    if new_rows <= 0 or split == 0:
+        print("No new labeled trades since the last training")
+        return None
+    X, labels = _inputs_and_labels(df)
+    models = {name: joblib.load(os.path.join(model_dir, fname)) for name, fname in MODEL_FILES.items()}
+    missing = set(models['clf_win'].classes_) - set(labels['clf_win'].iloc[:split])
+    if missing:
+        print(f"New labeled trades lack classes {[int(c) for c in sorted(missing)]}; refitting on all of them")
+        return train_models(features_csv_path, model_dir, backend=state['backend'], n_jobs=n_jobs,
+                            concurrent=concurrent, patience=patience)
+    for model in models.values():
+        if hasattr(model, 'estimators_'):
+            trees = rounds or max(1, int(np.ceil(len(model.estimators_) * split / max(state['train_end'], 1))))
+            model.set_params(warm_start=True, n_estimators=len(model.estimators_) + trees, n_jobs=n_jobs)
+        elif hasattr(model, 'max_iter'):
+            model.set_params(max_iter=model.n_iter_ + (rounds or max_rounds))
+        else:
+            model.set_params(n_estimators=rounds or max_rounds, n_jobs=n_jobs)
+    report = _fit_and_save(model_dir, models, X, labels, split, patience, concurrent,
+                           {'backend': state['backend'], 'mode': 'update', 'new_rows': new_rows},
+                           {'backend': state['backend'], 'source_rows': state['train_end'] + len(df),
+                            'train_end': state['train_end'] + split})
+    print(f"Models updated with {split} labeled trades in", model_dir)
+    return report
+
+def _file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def export_compiled_models(model_dir, models=None, keep=3):
+    """
+    Write the forests (or boosted trees) of model_dir as memory-mappable node arrays:
+    <model_dir>/compiled/<version>/<model>.<array>.npy plus
+    <model_dir>/compiled/manifest.json (feature schema, model version, hashes
+    of the joblib files exported). The manifest is replaced last and
+    atomically, so a reader sees either the old or the new version complete.
+    Each version directory keeps its own manifest copy, so earlier versions
+    stay loadable (from_compiled(version=...)).
+
+    A version directory is written under a temporary name and renamed into
+    place, and never rewritten: re-exporting unchanged models republishes
+    the existing one, so files other processes have mapped stay intact.
+    Only the `keep` most recently published versions are kept on disk
+    (removing a directory does not affect processes that mapped it).
+
+    Models CompiledForest cannot compile (LightGBM) still get a manifest,
+    with 'compiled': false and no node arrays, so watchers of the manifest
+    see the new version and from_compiled serves the joblib files instead
+    of an older export.
+
+    models: {'clf_win': clf, 'reg_slip': reg} already in memory; loaded from
+            the joblib files when None
+    Returns the manifest.
+    """
+    source = {name: _file_sha1(os.path.join(model_dir, fname)) for name, fname in MODEL_FILES.items()}
+    root = os.path.join(model_dir, COMPILED_DIR)
+    os.makedirs(root, exist_ok=True)
+    if models is None:
+        models = {name: joblib.load(os.path.join(model_dir, fname)) for name, fname in MODEL_FILES.items()}
+    features = load_feature_schema(model_dir, models['clf_win'])
+    version = hashlib.sha1(json.dumps([ARTIFACT_FORMAT, source, features]).encode()).hexdigest()[:12]
+    manifest = load_manifest(model_dir, version)
+    if manifest is None:
+        staging = tempfile.mkdtemp(prefix=f'.{version}.', dir=root)
+        compiled = all(CompiledForest.supports(model) for model in models.values())
+        manifest = {
+            'format': ARTIFACT_FORMAT,
+            'version': version,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'features': features,
+            'source': source,
+            'compiled': compiled,
+            'models': {name: CompiledForest.from_sklearn(model).save(staging, name)
+                       for name, model in models.items()} if compiled else {},
+        }
+        _write_manifest(staging, manifest)
+        os.chmod(staging, 0o755)  # mkdtemp creates it private
+        try:
+            os.replace(staging, os.path.join(root, version))
+        except OSError:  # exported concurrently: keep the copy already in place
+            shutil.rmtree(staging, ignore_errors=True)
+            manifest = load_manifest(model_dir, version)
+    os.utime(os.path.join(root, version))  # publish time, for pruning
+    _write_manifest(root, manifest)
+    _prune_compiled_versions(root, keep, version)
+    return manifest
+
+def _write_manifest(directory, manifest):
+    tmp = os.path.join(directory, MANIFEST_FILE + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(directory, MANIFEST_FILE))
+
+def _prune_compiled_versions(root, keep, current, stale_s=3600):
+    """Remove all but the `keep` latest version directories, and staging directories left by crashed exports"""
+    versions, now = [], time.time()
+    for entry in os.scandir(root):
+        if not entry.is_dir():
+            continue
+        if entry.name.startswith('.'):
+            if now - entry.stat().st_mtime > stale_s:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        elif entry.name != current:
+            versions.append((entry.stat().st_mtime, entry.path))
+    for _, path in sorted(versions, reverse=True)[max(keep - 1, 0):]:
+        shutil.rmtree(path, ignore_errors=True)
+
+def load_manifest(model_dir, version=None):
+    """
+    The compiled-model manifest of model_dir (of one exported version if
+    given), or None if it was never exported
+    """
+    path = os.path.join(model_dir, COMPILED_DIR, version or '', MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        manifest = json.load(f)
+    return manifest if manifest.get('format') == ARTIFACT_FORMAT else None
+
+def compiled_models_current(model_dir, manifest=None):
+    """True if model_dir has an export (compiled or not) of exactly its current joblib files"""
+    manifest = manifest or load_manifest(model_dir)
+    if manifest is None:
+        return False
+    for name, fname in MODEL_FILES.items():
+        path = os.path.join(model_dir, fname)
+        if not os.path.exists(path) or _file_sha1(path) != manifest['source'].get(name):
+            return False
+    return True
 
 class MLInference:
-    def __init__(self, clf_path, reg_path):
+    def __init__(self, clf_path, reg_path, compiled=False):
+        """
+        compiled: score with CompiledForest copies of the random forests or
+                  boosted models (same outputs within float tolerance, far
+                  lower per-call latency); ignored for models it cannot
+                  compile, such as LightGBM
+        """
         self.clf = joblib.load(clf_path)
         self.reg = joblib.load(reg_path)
+        self.features = load_feature_schema(os.path.dirname(clf_path), self.clf)
+        self.compiled = compiled and CompiledForest.supports(self.clf) and CompiledForest.supports(self.reg)
+        self.version = None
+        if self.compiled:
+            self.clf_compiled = CompiledForest.from_sklearn(self.clf)
+            self.reg_compiled = CompiledForest.from_sklearn(self.reg)
+
+    @classmethod
+    def from_compiled(cls, model_dir, mmap=True, version=None):
+        """
+        Compiled inference straight from export_compiled_models output, without
+        unpickling the sklearn models (clf/reg are None). With mmap the node
+        arrays are shared read-only with every other process mapping them.
+        A version exported without node arrays (models CompiledForest cannot
+        compile) is served from the joblib files it was exported from.
+        version: an earlier exported version instead of the current one
+        """
+        manifest = load_manifest(model_dir, version)
+        if manifest is None:
+            raise FileNotFoundError(f"no compiled models {version or ''} in {model_dir}; "
+                                    "run export_compiled_models first")
+        if not manifest.get('compiled', True):
+            if not compiled_models_current(model_dir, manifest):
+                raise FileNotFoundError(f"version {manifest['version']} in {model_dir} has no compiled export "
+                                        "and its joblib files were replaced")
+            self = cls(*(os.path.join(model_dir, MODEL_FILES[name]) for name in ('clf_win', 'reg_slip')))
+            self.version = manifest['version']
+            return self
+        self = cls.__new__(cls)
+        self.clf = self.reg = None
+        self.features = list(manifest['features'])
+        self.compiled = True
+        self.version = manifest['version']
+        directory = os.path.join(model_dir, COMPILED_DIR, manifest['version'])
+        self.clf_compiled = CompiledForest.load(directory, manifest['models']['clf_win'], mmap)
+        self.reg_compiled = CompiledForest.load(directory, manifest['models']['reg_slip'], mmap)
+        return self
 
+    def feature_vector(self, features_dict):
+        """1D float array in schema column order from one feature dict"""
+        return np.array([feature_value(features_dict, name) for name in self.features], dtype=float)
+
+    def feature_matrix(self, rows):
+        """2D float array in schema column order from a list of feature dicts"""
+        X = np.empty((len(rows), len(self.features)), dtype=float)
+        for j, name in enumerate(self.features):
+            X[:, j] = [feature_value(r, name) for r in rows]
+        return X
+
+    @METRICS.timed('ml_predict_batch')
+    def predict_batch(self, X):
+        """
+        Score many candidates in one call.
+        X: 2D array with columns in self.features order, a DataFrame with those
+           columns, or a list of feature dicts
+        Returns {'p_win': array, 'pred_slippage': array} aligned with the rows of X
+        """
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features].to_numpy(dtype=float)
+        elif len(X) and isinstance(X[0], dict):
+            X = self.feature_matrix(X)
+        else:
+            X = np.asarray(X, dtype=float).reshape(-1, len(self.features))
+        if len(X) == 0:
+            return {'p_win': np.empty(0), 'pred_slippage': np.empty(0)}
+        if self.compiled:
+            return {'p_win': self.clf_compiled.predict(X), 'pred_slippage': self.reg_compiled.predict(X)}
+        p_win = self.clf.predict_proba(X)[:, 1]
+        pred_slip = self.reg.predict(X)
+        return {'p_win': p_win, 'pred_slippage': pred_slip}
+
+    @METRICS.timed('ml_predict')
     def predict(self, features_dict):
-        # map features to vector in same order used for training
-        X = np.array([[features_dict.get('atr_m1',0),
-                       features_dict.get('dist_zone_pts',0),
-                       features_dict.get('zone_width_pts',0),
-                       features_dict.get('planned_rr',1),
-                       features_dict.get('spread_pts',0),
-                       features_dict.get('hour_of_day',0)]])
-        p_win = self.clf.predict_proba(X)[0,1]
-        pred_slip = self.reg.predict(X)[0]
-        return {'p_win': float(p_win), 'pred_slippage': float(pred_slip)}
\ No newline at end of file
+        if self.compiled:
+            x = self.feature_vector(features_dict)
+            return {'p_win': self.clf_compiled.predict_one(x), 'pred_slippage': self.reg_compiled.predict_one(x)}
+        out = self.predict_batch([features_dict])
+        return {'p_win': float(out['p_win'][0]), 'pred_slippage': float(out['pred_slippage'][0])}
+
+if __name__ == "__main__":
+    import sys
+    for model_dir in sys.argv[1:]:
+        manifest = export_compiled_models(model_dir)
+        print(f"Exported {model_dir} as version {manifest['version']}")
@@ -0,0 +1,206 @@
+# src/model_registry.py
+"""
+Hot model reload: serve the current MLInference and swap in newly exported
+models without restarting the engine.
+
+The registry watches models/compiled/manifest.json, which export_compiled_models
+(and so train_models) replaces last and atomically. A new version is loaded
+in a background thread, checked on a holdout sample and only then swapped in
+with a single reference assignment; predict() reads that reference once per
+call, so evaluations never wait on a load. Replaced versions are kept for
+rollback().
+
+    registry = ModelRegistry('models', holdout=load_holdout('data/labeled_trades.csv'))
+    engine.attach_model_registry(registry)
+    registry.start(interval=5)
+"""
+import logging
+import os
+import threading
+import numpy as np
+import pandas as pd
+from ml_models import (MLInference, FEATURE_COLUMNS, COMPILED_DIR, MANIFEST_FILE, MODEL_FILES, load_manifest,
+                       compiled_models_current, split_point)
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+def load_holdout(labeled_csv, fraction=0.2):
+    """
+    The last `fraction` of the labeled trades: the time-ordered validation
+    split train_models leaves out of training (same split point)
+    """
+    df = pd.read_csv(labeled_csv, usecols=lambda c: c in set(FEATURE_COLUMNS) | {'win', 'slippage_pts'})
+    return df.iloc[split_point(len(df), fraction):].reset_index(drop=True)
+
+
+class ModelRegistry:
+    """
+    Current models of model_dir plus the versions they replaced.
+
+    holdout:            DataFrame with the model input columns, and optionally
+                        'win' (see load_holdout); without one, candidates are
+                        only checked for finite, in-range outputs on a dummy row
+    compiled:           serve memory-mapped compiled models (else unpickle the
+                        joblib files the manifest was exported from)
+    max_brier_increase: reject a candidate whose Brier score of p_win on the
+                        holdout is worse than the current models' by more
+    keep:               replaced versions kept for rollback()
+    """
+
+    def __init__(self, model_dir='models', holdout=None, compiled=True, max_brier_increase=0.01, keep=3):
+        self.model_dir = model_dir
+        self.holdout = holdout
+        self.compiled = compiled
+        self.max_brier_increase = max_brier_increase
+        self.keep = keep
+        self.rejected = {}           # version -> reason; never retried
+        self._current = None
+        self._history = []           # replaced MLInference objects, oldest first
+        self._lock = threading.Lock()  # one load/swap/rollback at a time
+        self._watcher = None
+        self._manifest_stat = None
+        self.check()
+        if self._current is None:
+            raise FileNotFoundError(f"no usable models in {model_dir}: {self.rejected or 'nothing exported'}")
+
+    @property
+    def current(self):
+        return self._current
+
+    @property
+    def version(self):
+        return self._current.version if self._current is not None else None
+
+    @property
+    def previous_versions(self):
+        return [ml.version for ml in self._history]
+
+    # Inference: drop-in for MLInference in the engine and generate_candidate
+    @property
+    def features(self):
+        return self._current.features
+
+    def predict(self, features_dict):
+        return self._current.predict(features_dict)
+
+    def predict_batch(self, X):
+        return self._current.predict_batch(X)
+
+    def check(self):
+        """
+        Load, validate and swap in the exported version if it is new.
+        Returns True if the models were swapped.
+        """
+        path = os.path.join(self.model_dir, COMPILED_DIR, MANIFEST_FILE)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        stat = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if stat == self._manifest_stat:
+            return False
+        with self._lock:
+            manifest = load_manifest(self.model_dir)
+            if manifest is None:
+                return False
+            version = manifest['version']
+            if version == self.version or version in self.rejected:
+                self._manifest_stat = stat
+                return False
+            if not self.compiled and not compiled_models_current(self.model_dir, manifest):
+                return False  # joblib files being rewritten: retry on the next check
+            self._manifest_stat = stat
+            try:
+                candidate = self._load(version)
+            except Exception as e:
+                self._reject(version, f"load failed: {e}")
+                return False
+            reason = self.validate(candidate)
+            if reason is not None:
+                self._reject(version, reason)
+                return False
+            self._swap(candidate)
+            return True
+
+    def _load(self, version):
+        if self.compiled:
+            return MLInference.from_compiled(self.model_dir, version=version)
+        ml = MLInference(*(os.path.join(self.model_dir, MODEL_FILES[name]) for name in ('clf_win', 'reg_slip')))
+        ml.version = version
+        return ml
+
+    def validate(self, candidate):
+        """None if candidate may replace the current models, else the reason it may not"""
+        if self.holdout is None:
+            X = np.zeros((1, len(candidate.features)))
+        else:
+            missing = [c for c in candidate.features if c not in self.holdout.columns]
+            if missing:
+                return f"holdout lacks model inputs {missing}"
+            X = self.holdout
+        out = candidate.predict_batch(X)
+        p_win, slip = np.asarray(out['p_win']), np.asarray(out['pred_slippage'])
+        if not (np.isfinite(p_win).all() and np.isfinite(slip).all()):
+            return "non-finite predictions"
+        if ((p_win < 0) | (p_win > 1)).any():
+            return "p_win outside [0, 1]"
+        if self.holdout is not None and 'win' in self.holdout and self._current is not None:
+            y = self.holdout['win'].to_numpy(dtype=float)
+            brier = float(np.mean((p_win - y) ** 2))
+            current = float(np.mean((np.asarray(self._current.predict_batch(X)['p_win']) - y) ** 2))
+            if brier > current + self.max_brier_increase:
+                return f"holdout Brier score {brier:.4f} vs {current:.4f} for {self.version}"
+        return None
+
+    def _reject(self, version, reason):
+        self.rejected[version] = reason
+        METRICS.count('model_rejected')
+        logger.warning("Model version %s rejected: %s", version, reason)
+
+    def _swap(self, candidate):
+        old = self._current
+        self._current = candidate  # atomic: in-flight predict() calls finish on the old models
+        if old is not None:
+            self._history = (self._history + [old])[-self.keep:]
+        METRICS.count('model_swaps')
+        logger.info("Models swapped: %s -> %s", old.version if old is not None else None, candidate.version)
+
+    def rollback(self):
+        """
+        Go back to the version replaced last; the version rolled back from is
+        marked rejected so the watcher does not load it again. Returns the
+        version now served.
+        """
+        with self._lock:
+            if not self._history:
+                raise RuntimeError("no previous model version to roll back to")
+            bad = self._current
+            self._current = self._history.pop()
+            self.rejected[bad.version] = 'rolled back'
+            METRICS.count('model_rollbacks')
+            logger.warning("Models rolled back: %s -> %s", bad.version, self._current.version)
+            return self._current.version
+
+    def start(self, interval=5.0):
+        """Call check() every `interval` seconds from a daemon thread"""
+        self.stop()
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    self.check()
+                except Exception as e:
+                    logger.error("Model reload check failed: %s", e)
+
+        thread = threading.Thread(target=loop, name='model-registry', daemon=True)
+        thread.start()
+        self._watcher = (stop, thread)
+
+    def stop(self):
+        if self._watcher is not None:
+            stop, thread = self._watcher
+            stop.set()
+            thread.join()
+            self._watcher = None
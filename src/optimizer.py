@@ -0,0 +1,241 @@
+# src/optimizer.py
+"""
+Grid / random search over the strategy parameters.
+Everything that does not depend on the parameters being tuned (timeframe
+alignment, daily bias, ATR arrays, swing levels per lookback, candle shapes)
+is computed once per dataset in SweepData and shared by all combinations;
+worker processes receive it once through the pool initializer. The strategy
+rules themselves (bias, target zone, rejection, SL/TP ATR) are the labeler's.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from backtester import align_timeframes, daily_bias_per_bar, signal_bars, simulate_trade_outcomes
+from indicators import (atr, candle_anatomy, cluster_levels, entry_atr, rejects_zone, shape_rejection_masks,
+                        target_zone_index)
+from zone_index import ZoneIndex
+
+MAX_TRADE_BARS = 100
+
+class SweepData:
+    """
+    Parameter-independent state of one dataset, with per-parameter caches
+    (ATR per period, swing levels per lookback, zones per lookback/cluster size,
+    candidates per zone/entry rule set).
+    """
+
+    def __init__(self, df_m1, df_m15=None, df_d1=None, point=0.00001):
+        self.point = point
+        align = align_timeframes(df_m1, df_m15, df_d1)
+        self.n = len(df_m1)
+        self.open = np.asarray(df_m1['open'], dtype=float)
+        self.high = np.asarray(df_m1['high'], dtype=float)
+        self.low = np.asarray(df_m1['low'], dtype=float)
+        self.close = np.asarray(df_m1['close'], dtype=float)
+        self.hour = pd.DatetimeIndex(df_m1['timestamp']).hour.to_numpy()
+        self.m15 = align['m15']
+        self.m15_closed = align['m15_closed']
+        self.d1_len = align['d1_prior'] + 1
+        self.bias = daily_bias_per_bar(align, self.close)
+        self.shape = candle_anatomy(self.open, self.high, self.low, self.close, point)
+
+        self._atr = {}
+        self._levels = {}
+        self._zones = {}
+        self._candidates = {}
+
+    def atr_arrays(self, period):
+        """(M1 ATR, M15 ATR, ATR of the `period` bars before each bar as used for SL/TP)"""
+        if period not in self._atr:
+            plan = entry_atr(self.high, self.low, self.close, period)
+            m15 = self.m15
+            atr_m15 = atr(m15['high'], m15['low'], m15['close'], period=period) if len(m15) else np.array([])
+            self._atr[period] = (atr(self.high, self.low, self.close, period=period), atr_m15, plan)
+        return self._atr[period]
+
+    def levels(self, lookback):
+        """levels[m] = sorted swing levels over the last `lookback` of the first m closed M15 bars"""
+        if lookback not in self._levels:
+            index = ZoneIndex(lookback, 0, self.point)
+            snapshots = [()]
+            for h, l in zip(np.asarray(self.m15['high']), np.asarray(self.m15['low'])):
+                snapshots.append(tuple(index.levels) if index.update(h, l) else snapshots[-1])
+            self._levels[lookback] = snapshots
+        return self._levels[lookback]
+
+    def zones(self, lookback, cluster_pips):
+        """zones[m] = (zone lows, zone highs, zone mids) arrays after the first m closed M15 bars"""
+        key = (lookback, cluster_pips)
+        if key not in self._zones:
+            out, prev, prev_zones = [], None, None
+            for levels in self.levels(lookback):
+                if levels is not prev:
+                    zones = cluster_levels(list(levels), cluster_pips, self.point)
+                    prev, prev_zones = levels, (np.array([z[0] for z in zones]), np.array([z[1] for z in zones]),
+                                                np.array([(z[0] + z[1]) / 2.0 for z in zones]))
+                out.append(prev_zones)
+            self._zones[key] = out
+        return self._zones[key]
+
+    def candidates(self, params):
+        """
+        Signal bars for the zone/entry parameters, as arrays
+        (bar index, side 1/-1, target zone low, target zone high), in time order;
+        the same bars BacktestLabeler labels for these params
+        """
+        key = (params['sr_lookback'], params['sr_cluster_pips'], params['zone_buffer_points'],
+               params['require_rejection'], params['rejection_candles'], params['rejection_wick_pts'],
+               params['atr_period'])
+        if key in self._candidates:
+            return self._candidates[key]
+        point = self.point
+        bars = np.arange(self.n)[signal_bars(self.n, params)]
+        bars = bars[(self.m15_closed[bars] >= params['sr_lookback']) & (self.d1_len[bars] >= 3)
+                    & (self.bias[bars] != 0)]
+
+        # Target zone: nearest zone mid below (long) / above (short) the close,
+        # looked up per run of bars that share the same closed M15 bars
+        zones = self.zones(params['sr_lookback'], params['sr_cluster_pips'])
+        zone_low = np.full(len(bars), np.nan)
+        zone_high = np.full(len(bars), np.nan)
+        run_starts = np.flatnonzero(np.diff(self.m15_closed[bars], prepend=-1))
+        for a, b in zip(run_starts, np.append(run_starts[1:], len(bars))):
+            lows, highs, mids = zones[self.m15_closed[bars[a]]]
+            if len(mids) == 0:
+                continue
+            seg = bars[a:b]
+            k = target_zone_index(mids, self.close[seg], self.bias[seg])
+            zone_low[a:b] = np.where(k >= 0, lows[k], np.nan)
+            zone_high[a:b] = np.where(k >= 0, highs[k], np.nan)
+
+        price = self.close[bars]
+        buffer = params['zone_buffer_points'] * point
+        keep = ~np.isnan(zone_low) & (price >= (zone_low - buffer)) & (price <= (zone_high + buffer))
+        if params['require_rejection']:
+            long_mask, short_mask = shape_rejection_masks(self.shape, params['rejection_wick_pts'])
+            rejected = np.zeros(len(bars), dtype=bool)
+            for back in range(params['rejection_candles']):
+                j = bars - back
+                valid = j >= 0
+                j = np.maximum(j, 0)
+                rejected |= valid & rejects_zone(long_mask[j], short_mask[j], self.low[j], self.high[j],
+                                                 zone_low, zone_high, point)
+            keep &= rejected
+        result = (bars[keep], self.bias[bars[keep]], zone_low[keep], zone_high[keep])
+        self._candidates[key] = result
+        return result
+
+    def evaluate(self, params, ml=None):
+        """Trade count, win rate and expectancy of one parameter set"""
+        bars, sides, zone_low, zone_high = self.candidates(params)
+        atr_m1, _, plan_atr = self.atr_arrays(params['atr_period'])
+        rr = params['tp_mult'] / params['sl_mult']
+        n_signals = len(bars)
+
+        if ml is not None and len(bars):
+            features = pd.DataFrame({
+                'atr_m1': atr_m1[bars],
+                'distance_to_nearest_zone_pts': np.abs(self.close[bars] - (zone_low + zone_high) / 2.0) / self.point,
+                'zone_width_pts': (zone_high - zone_low) / self.point,
+                'planned_rr': rr,
+                'spread_pts': params.get('spread_pts', 1.0),
+                'hour_of_day': self.hour[bars],
+            })
+            scores = ml.predict_batch(features)
+            accept = scores['p_win'] >= params.get('p_threshold', 0.0)
+            if 'max_pred_slippage_pts' in params:
+                accept &= scores['pred_slippage'] <= params['max_pred_slippage_pts']
+            bars, sides = bars[accept], sides[accept]
+
+        entry = self.close[bars]
+        sl_dist = params['sl_mult'] * plan_atr[bars]
+        tp_dist = params['tp_mult'] * plan_atr[bars]
+        win, bars_to_hit = simulate_trade_outcomes(self.high, self.low, bars, sides, entry - sides * sl_dist,
+                                                   entry + sides * tp_dist, max_bars=MAX_TRADE_BARS)
+        # R multiple per trade: +rr on TP, -1 on SL, marked to market when neither is hit
+        hit = bars_to_hit < MAX_TRADE_BARS
+        exit_close = self.close[np.minimum(bars + MAX_TRADE_BARS, self.n - 1)]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            open_r = np.where(sl_dist > 0, sides * (exit_close - entry) / sl_dist, 0.0)
+        r = np.where(win, rr, np.where(hit, -1.0, open_r))
+        trades = len(bars)
+        return {
+            'trades': trades,
+            'signals': n_signals,
+            'win_rate': float(win.mean()) if trades else np.nan,
+            'expectancy_r': float(r.mean()) if trades else np.nan,
+            'expectancy_pts': float((r * sl_dist).mean() / self.point) if trades else np.nan,
+            'timeouts': int((~hit).sum()),
+        }
+
+_worker_data = None
+_worker_ml = None
+
+def _init_worker(data, ml):
+    global _worker_data, _worker_ml
+    _worker_data, _worker_ml = data, ml
+
+def _evaluate_group(group):
+    """Worker: evaluate parameter sets that share lookback/cluster size, reusing their zones"""
+    return [_worker_data.evaluate(params, _worker_ml) for params in group]
+
+class ParameterSweep:
+    """
+    Grid or random search around base params.
+
+    sweep = ParameterSweep(df_m1, base_params=engine.params, workers=4)
+    results = sweep.run(sweep.grid({'sr_lookback': [60, 120], 'tp_mult': [1.5, 1.8, 2.4]}))
+
+    p_threshold / max_pred_slippage_pts only filter trades when an ml scorer
+    (MLInference) is given, using the same six features the live engine sends.
+    """
+
+    def __init__(self, df_m1, df_m15=None, df_d1=None, base_params=None, point=0.00001, ml=None, workers=1):
+        self.data = SweepData(df_m1, df_m15, df_d1, point)
+        self.base_params = dict(base_params or {})
+        self.ml = ml
+        self.workers = workers or os.cpu_count() or 1
+
+    def grid(self, space):
+        """Every combination of the values in space (param name -> list)"""
+        names = list(space)
+        return [{**self.base_params, **dict(zip(names, values))}
+                for values in itertools.product(*(space[k] for k in names))]
+
+    def random(self, space, n_iter, seed=0):
+        """n_iter distinct random combinations from space (fewer if the grid is smaller)"""
+        rng = np.random.default_rng(seed)
+        names = list(space)
+        sizes = [len(space[k]) for k in names]
+        total = int(np.prod(sizes))
+        picks = rng.choice(total, size=min(n_iter, total), replace=False)
+        combos = []
+        for flat in picks:
+            idx = np.unravel_index(flat, sizes)
+            combos.append({**self.base_params, **{k: space[k][i] for k, i in zip(names, idx)}})
+        return combos
+
+    def run(self, combos):
+        """DataFrame of the combinations with their metrics, best expectancy first"""
+        groups = {}
+        for k, params in enumerate(combos):
+            groups.setdefault((params['sr_lookback'], params['sr_cluster_pips']), []).append(k)
+        order = list(groups.values())
+        tasks = [[combos[k] for k in members] for members in order]
+
+        if self.workers == 1 or len(tasks) <= 1:
+            _init_worker(self.data, self.ml)
+            results = [_evaluate_group(t) for t in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)), initializer=_init_worker,
+                                     initargs=(self.data, self.ml)) as pool:
+                results = list(pool.map(_evaluate_group, tasks))
+
+        metrics = [None] * len(combos)
+        for members, group_metrics in zip(order, results):
+            for k, m in zip(members, group_metrics):
+                metrics[k] = m
+        table = pd.concat([pd.DataFrame(combos), pd.DataFrame(metrics)], axis=1)
+        return table.sort_values('expectancy_r', ascending=False, kind='stable').reset_index(drop=True)
@@ -1,7 +1,21 @@
 # src/order_manager.py
 # This is a minimal wrapper. Replace internals with MetaTrader5 package calls or your broker's API.
-import time, logging
+import abc
+import asyncio
+import concurrent.futures
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import deque
+from metrics import METRICS
 
+RETCODE_DONE = 0
+RETCODE_REJECTED = 10006
+RETCODE_ERROR = -1
+
+@METRICS.timed('place_market_order')
 def place_market_order(side, volume, symbol, sl, tp, comment=""):
     """
     side: 'buy' or 'sell'
@@ -21,4 +35,220 @@ def get_market_price(symbol, side='buy'):
     import random
     base = 1.10000
     jitter = (random.random()-0.5)*0.00010
-    return base + jitter
\ No newline at end of file
+    return base + jitter
+
+
+class BrokerSession(abc.ABC):
+    """
+    Persistent connection to a broker, opened once and reused for every order.
+    Subclass it for a real API: connect() logs in / opens the socket, and
+    send_order() (required) performs one round-trip and returns a result dict
+    with at least retcode (RETCODE_DONE on fill), order_id and fill_price.
+    """
+
+    def __init__(self):
+        self.connected = False
+
+    async def connect(self):
+        self.connected = True
+
+    async def close(self):
+        self.connected = False
+
+    @abc.abstractmethod
+    async def send_order(self, order):
+        """Send one order dict (symbol, side, volume, sl, tp, comment); returns the result dict"""
+
+
+class MockBroker(BrokerSession):
+    """
+    Local broker simulator for offline tests and benchmarks.
+
+    latency:          seconds per round-trip (plus uniform 0..latency_jitter)
+    fill_probability: chance an order fills; the rest are rejected
+    slippage_pts:     std of the normal fill slippage, in points
+    price:            mid price, or callable(symbol) -> mid price
+    """
+
+    def __init__(self, latency=0.05, latency_jitter=0.0, fill_probability=1.0, slippage_pts=0.0,
+                 price=1.10000, spread_pts=1.0, point=0.00001, seed=None):
+        super().__init__()
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.fill_probability = fill_probability
+        self.slippage_pts = slippage_pts
+        self.price = price
+        self.spread_pts = spread_pts
+        self.point = point
+        self.connects = 0
+        self.orders_seen = 0
+        self._rng = random.Random(seed)
+        self._order_ids = itertools.count(1)
+
+    async def connect(self):
+        self.connects += 1
+        await super().connect()
+
+    async def send_order(self, order):
+        if not self.connected:
+            raise ConnectionError("broker session is not connected")
+        self.orders_seen += 1
+        delay = self.latency + self._rng.uniform(0, self.latency_jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        order_id = next(self._order_ids)
+        if self._rng.random() >= self.fill_probability:
+            return {'retcode': RETCODE_REJECTED, 'order_id': order_id, 'fill_price': None}
+        mid = self.price(order['symbol']) if callable(self.price) else self.price
+        sign = 1 if order['side'] == 'buy' else -1
+        slippage = self._rng.gauss(0, self.slippage_pts) if self.slippage_pts else 0.0
+        fill_price = mid + sign * (self.spread_pts / 2 + slippage) * self.point
+        return {'retcode': RETCODE_DONE, 'order_id': order_id, 'fill_price': fill_price}
+
+
+class AsyncOrderManager:
+    """
+    Non-blocking order submission over one persistent BrokerSession.
+
+    The manager runs an asyncio loop in a background thread. submit() can be
+    called from any thread: it queues the order and returns a
+    concurrent.futures.Future right away. Up to max_in_flight orders are sent
+    concurrently. When a result arrives the future is resolved and the fill
+    callbacks are called as callback(order, result) from the manager thread,
+    so they should be quick.
+
+        manager = AsyncOrderManager(MockBroker(latency=0.05)).start()
+        future = manager.submit('buy', 0.01, 'EURUSD', sl=1.098, tp=1.102)
+        ...
+        manager.stop()
+    """
+
+    def __init__(self, session, max_in_flight=16):
+        self.session = session
+        self.max_in_flight = max_in_flight
+        self.latencies = deque(maxlen=10000)  # seconds from submit() to result
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0  # queued or in flight when stop(drain=False) was called
+        self._callbacks = []
+        self._loop = None
+        self._thread = None
+        self._queue = None
+        self._workers = []
+        self._ready = threading.Event()
+        self._count_lock = threading.Lock()  # submit() may be called from several threads
+        self._start_error = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def in_flight(self):
+        """Orders submitted and neither completed nor cancelled"""
+        return self.submitted - self.completed - self.cancelled
+
+    def add_fill_callback(self, callback):
+        """callback(order, result) for every completed order (fills and rejections)"""
+        self._callbacks.append(callback)
+
+    def start(self):
+        """Connect the session and start the manager thread; returns self"""
+        if self.running:
+            return self
+        self._ready.clear()
+        self._start_error = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._start_error is not None:
+            self._thread.join()
+            raise self._start_error
+        return self
+
+    def submit(self, side, volume, symbol, sl=0.0, tp=0.0, comment="", callback=None):
+        """Queue a market order; returns a Future resolving to the broker result dict"""
+        if not self.running:
+            raise RuntimeError("order manager is not running; call start() first")
+        order = {'side': side, 'volume': volume, 'symbol': symbol, 'sl': sl, 'tp': tp, 'comment': comment}
+        future = concurrent.futures.Future()
+        with self._count_lock:
+            self.submitted += 1
+        self._loop.call_soon_threadsafe(self._queue.put_nowait,
+                                        (order, future, callback, time.perf_counter()))
+        return future
+
+    def stop(self, drain=True):
+        """Stop the manager; with drain, queued and in-flight orders complete first"""
+        if not self.running:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(drain), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._startup())
+        except Exception as e:
+            self._start_error = e
+            self._ready.set()
+            self._loop.close()
+            return
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _startup(self):
+        await self.session.connect()
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_in_flight)]
+
+    async def _shutdown(self, drain):
+        if drain:
+            await self._queue.join()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        while not self._queue.empty():
+            _, future, _, _ = self._queue.get_nowait()
+            future.cancel()
+            self.cancelled += 1
+            METRICS.count('orders_cancelled')
+        await self.session.close()
+
+    async def _worker(self):
+        while True:
+            order, future, callback, submitted_at = await self._queue.get()
+            try:
+                try:
+                    result = await self.session.send_order(order)
+                except asyncio.CancelledError:
+                    future.cancel()  # stop(drain=False) while the order was in flight
+                    self.cancelled += 1
+                    METRICS.count('orders_cancelled')
+                    raise
+                except Exception as e:
+                    logging.error(f"Order {order} failed: {e}")
+                    result = {'retcode': RETCODE_ERROR, 'order_id': None, 'fill_price': None, 'error': str(e)}
+                latency = time.perf_counter() - submitted_at
+                self.latencies.append(latency)
+                METRICS.observe('order_submit_to_result', latency)
+                METRICS.count('orders_filled' if result['retcode'] == RETCODE_DONE else 'orders_not_filled')
+                self.completed += 1
+                if not future.cancelled():
+                    future.set_result(result)
+                for cb in self._callbacks + ([callback] if callback else []):
+                    try:
+                        cb(order, result)
+                    except Exception as e:
+                        logging.error(f"Fill callback failed: {e}")
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,120 @@
+# src/resampler.py
+"""
+Timestamp-aware candle aggregation.
+Higher timeframes are built from M1 (or ticks) by flooring timestamps to
+epoch-aligned buckets, the same boundaries as pandas dt.floor('15min') /
+dt.floor('1D'), and every M1 bar is mapped to its higher-timeframe bars.
+"""
+import numpy as np
+import pandas as pd
+
+TIMEFRAME_MINUTES = {'M1': 1, 'M5': 5, 'M15': 15, 'H1': 60, 'D1': 1440}
+
+def _timestamp_ints(timestamps):
+    """(int64 epoch values, datetime64 dtype) of a timestamp array/Series"""
+    ts = np.asarray(timestamps)
+    if not np.issubdtype(ts.dtype, np.datetime64):
+        ts = pd.to_datetime(ts).to_numpy()
+    return ts.view(np.int64), ts.dtype
+
+def _step(minutes, dtype):
+    unit = np.datetime_data(dtype)[0]
+    return int(np.timedelta64(minutes, 'm').astype(f'timedelta64[{unit}]').astype(np.int64))
+
+def resample_ohlcv(timestamps, open_, high, low, close, volume, minutes):
+    """
+    Aggregate time-sorted bars (or ticks, with open=high=low=close=price) into
+    `minutes` bars in one vectorized pass.
+    Returns (DataFrame of bars stamped with their bucket start, bar_index)
+    where bar_index[k] is the output bar that input row k falls in.
+    """
+    ts, dtype = _timestamp_ints(timestamps)
+    if len(ts) == 0:
+        empty = pd.DataFrame({'timestamp': np.array([], dtype=dtype), 'open': [], 'high': [], 'low': [],
+                              'close': [], 'volume': []})
+        return empty, np.empty(0, dtype=np.int64)
+    step = _step(minutes, dtype)
+    bucket = ts // step
+    new_bar = np.empty(len(bucket), dtype=bool)
+    new_bar[0] = True
+    np.not_equal(bucket[1:], bucket[:-1], out=new_bar[1:])
+    starts = np.flatnonzero(new_bar)
+    ends = np.append(starts[1:], len(ts)) - 1
+
+    bars = pd.DataFrame({
+        'timestamp': (bucket[starts] * step).view(dtype),
+        'open': np.asarray(open_)[starts],
+        'high': np.maximum.reduceat(np.asarray(high), starts),
+        'low': np.minimum.reduceat(np.asarray(low), starts),
+        'close': np.asarray(close)[ends],
+        'volume': np.add.reduceat(np.asarray(volume), starts),
+    })
+    bar_index = np.cumsum(new_bar) - 1
+    return bars, bar_index
+
+def closed_bar_counts(htf_timestamps, minutes, m1_timestamps):
+    """
+    For each M1 bar, how many bars of an independently loaded higher-timeframe
+    frame (stamped with bar open times) have closed by the M1 bar's close
+    """
+    ns = np.dtype('datetime64[ns]')
+    htf = np.asarray(htf_timestamps, dtype=ns).view(np.int64)
+    m1 = np.asarray(m1_timestamps, dtype=ns).view(np.int64)
+    return np.searchsorted(htf + _step(minutes, ns), m1 + _step(1, ns), side='right')
+
+class MultiTimeframe:
+    """
+    M1 candles plus the higher timeframes derived from them.
+
+    frames[tf]     bars of timeframe tf (the last one may still be forming)
+    bar_index[tf]  bar_index[tf][i] = tf bar containing M1 bar i
+    closed[tf]     closed[tf][i] = number of tf bars closed by the close of M1 bar i,
+                   i.e. frames[tf].iloc[:closed[tf][i]] is what was known at that time
+    """
+
+    def __init__(self, m1, timeframes=('M5', 'M15', 'H1', 'D1')):
+        self.m1 = m1
+        self.frames = {'M1': m1}
+        self.bar_index = {'M1': np.arange(len(m1))}
+        self.closed = {'M1': np.arange(1, len(m1) + 1)}
+
+        ts, dtype = _timestamp_ints(m1['timestamp'])
+        m1_close = ts + _step(1, dtype)
+        volume = m1['volume'] if 'volume' in m1.columns else np.zeros(len(m1))
+        for tf in timeframes:
+            minutes = TIMEFRAME_MINUTES[tf]
+            bars, index = resample_ohlcv(m1['timestamp'], m1['open'], m1['high'], m1['low'], m1['close'],
+                                         volume, minutes)
+            self.frames[tf] = bars
+            self.bar_index[tf] = index
+            if len(bars):
+                bar_close = bars['timestamp'].to_numpy().view(np.int64)[index] + _step(minutes, dtype)
+                self.closed[tf] = index + (m1_close >= bar_close)
+            else:
+                self.closed[tf] = index
+
+    @classmethod
+    def from_ticks(cls, ticks, price_col='mid', timeframes=('M5', 'M15', 'H1', 'D1')):
+        """Build M1 from tick rows (timestamp, price_col[, volume]) then the higher timeframes"""
+        price = ticks[price_col]
+        volume = ticks['volume'] if 'volume' in ticks.columns else np.ones(len(ticks))
+        m1, _ = resample_ohlcv(ticks['timestamp'], price, price, price, price, volume, 1)
+        return cls(m1, timeframes)
+
+    def partial_arrays(self, tf):
+        """
+        The forming tf bar as of each M1 close: dict of open/high/low/close/volume
+        arrays aligned with M1 (open of the bucket, running high/low/volume, M1 close)
+        """
+        index = self.bar_index[tf]
+        m1 = self.m1
+        grouped_high = pd.Series(np.asarray(m1['high'])).groupby(index)
+        grouped_low = pd.Series(np.asarray(m1['low'])).groupby(index)
+        volume = m1['volume'] if 'volume' in m1.columns else pd.Series(np.zeros(len(m1)))
+        return {
+            'open': self.frames[tf]['open'].to_numpy()[index],
+            'high': grouped_high.cummax().to_numpy(),
+            'low': grouped_low.cummin().to_numpy(),
+            'close': np.asarray(m1['close']),
+            'volume': pd.Series(np.asarray(volume)).groupby(index).cumsum().to_numpy(),
+        }
@@ -1,62 +1,114 @@
 # src/signal_generator.py
 import numpy as np
+import pandas as pd
 from indicators import atr, find_swings_levels, cluster_levels, is_price_touch_zone, check_rejection_m1
+from feature_store import zone_features
+from metrics import METRICS
 
-def generate_candidate(df_m1, df_m15, df_d1, point, ml_inference_func, params):
+@METRICS.timed('generate_candidate')
+def generate_candidate(df_m1, df_m15, df_d1, point, ml_inference_func, params, zone_index=None, atr_m1=None,
+                       bar_features=None, price=None):
     """
+    df_m1, df_m15, df_d1: candle DataFrames, or CandleBuffers/CandleViews (see candle_buffer)
     params: dict with SR clustering settings, ATR multipliers, buffer, rejection params, thresholds
     ml_inference_func: function(features)->dict {'p_win':..., 'pred_slippage':...}
+    zone_index: optional ZoneIndex kept up to date with df_m15; used instead of
+                rebuilding the zones from df_m15 on every call
+    atr_m1: optional current M1 ATR (e.g. RollingATR.value over df_m1); computed
+            from the whole of df_m1 when None
+    bar_features: optional FeatureStore row of the last M1 bar; its values
+                  (atr_m1, atr_m15, volatility, momentum, time) are used as is
+    price: optional price to evaluate at (e.g. the latest tick); the last M1
+           close when None
     Returns: dict with trade decision or None
     """
-    price = df_m1.iloc[-1]['close']
+    if price is None:
+        price = np.asarray(df_m1['close'])[-1]
     bias = params['daily_bias']
+    if zone_index is not None:
+        with METRICS.timer('zone_lookup'):
+            target_zone = _pick_zone_from_index(zone_index, price, bias, params)
+        if target_zone is None:
+            METRICS.count('rejected_no_zone')
+            return None
+        return _evaluate_zone(df_m1, target_zone, price, bias, point, ml_inference_func, params, atr_m1,
+                              bar_features)
+
     # build zones
-    levels = find_swings_levels(df_m15, lookback=params['sr_lookback'])
-    zones = cluster_levels(levels, params['sr_cluster_pips'], point)
-    if not zones: return None
+    with METRICS.timer('swing_detection'):
+        levels = find_swings_levels(df_m15, lookback=params['sr_lookback'])
+    with METRICS.timer('zone_clustering'):
+        zones = cluster_levels(levels, params['sr_cluster_pips'], point)
+    if not zones:
+        METRICS.count('rejected_no_zone')
+        return None
 
     # pick zone based on bias
     target_zone = None
     if bias == 1:
         # pick nearest zone below price
         below = [z for z in zones if (z[0]+z[1])/2.0 < price]
-        if not below: return None
-        target_zone = sorted(below, key=lambda z: price - (z[0]+z[1])/2.0)[0]
+        if below:
+            target_zone = sorted(below, key=lambda z: price - (z[0]+z[1])/2.0)[0]
     elif bias == -1:
         above = [z for z in zones if (z[0]+z[1])/2.0 > price]
-        if not above: return None
-        target_zone = sorted(above, key=lambda z: (z[0]+z[1])/2.0 - price)[0]
-    else:
-        # neutral: ignore if strict mode
-        if params.get('use_daily_bias_only', True):
-            return None
+        if above:
+            target_zone = sorted(above, key=lambda z: (z[0]+z[1])/2.0 - price)[0]
+    elif not params.get('use_daily_bias_only', True):
+        # neutral: only traded outside strict mode
         target_zone = sorted(zones, key=lambda z: abs(price - ((z[0]+z[1])/2.0)))[0]
+    if target_zone is None:
+        METRICS.count('rejected_no_zone')
+        return None
+
+    return _evaluate_zone(df_m1, target_zone, price, bias, point, ml_inference_func, params, atr_m1,
+                          bar_features)
+
+def _pick_zone_from_index(zone_index, price, bias, params):
+    """Same zone choice as the list scan in generate_candidate, via bisect lookups"""
+    if bias == 1:
+        return zone_index.nearest_below(price)
+    if bias == -1:
+        return zone_index.nearest_above(price)
+    if params.get('use_daily_bias_only', True):
+        return None
+    return zone_index.nearest(price)
 
+def _evaluate_zone(df_m1, target_zone, price, bias, point, ml_inference_func, params, atr_m1=None,
+                   bar_features=None):
+    """Touch/rejection checks, features and ML gating for the chosen zone"""
     # check touch
     if not is_price_touch_zone(price, target_zone, params['zone_buffer_points'] * point):
+        METRICS.count('rejected_no_touch')
         return None
 
     # rejection check
     if params['require_rejection']:
-        df_recent = df_m1.tail(params['rejection_candles'])
-        if not check_rejection_m1(df_recent, target_zone, params['rejection_wick_pts'], point):
+        with METRICS.timer('rejection_check'):
+            df_recent = df_m1.tail(params['rejection_candles'])
+            rejected = check_rejection_m1(df_recent, target_zone, params['rejection_wick_pts'], point)
+        if not rejected:
+            METRICS.count('rejected_no_rejection_candle')
             return None
 
-    # compute features for ML
-    features = {}
-    # fill features like ATR, distance_to_zone, spread etc. You'll compute them here:
-    features['atr_m1'] = atr(df_m1['high'], df_m1['low'], df_m1['close'], period=params['atr_period'])[-1]
-    mid = (price + price) / 2.0
-    zone_mid = (target_zone[0] + target_zone[1]) / 2.0
-    features['dist_zone_pts'] = abs(mid - zone_mid) / point
-    features['zone_width_pts'] = (target_zone[1] - target_zone[0]) / point
-    features['planned_rr'] = params['tp_mult']/params['sl_mult']
-    # Add more features for ML
-    features['spread_pts'] = params.get('spread_pts', 1.0)  # Default spread
-    features['hour_of_day'] = df_m1.iloc[-1]['timestamp'].hour if 'timestamp' in df_m1.columns else 12
+    # compute features for ML, named like the training columns (see feature_store)
+    with METRICS.timer('features'):
+        if bar_features is not None:
+            features = dict(bar_features)
+        else:
+            if atr_m1 is None:
+                with METRICS.timer('atr'):
+                    atr_m1 = atr(df_m1['high'], df_m1['low'], df_m1['close'], period=params['atr_period'])[-1]
+            features = {'atr_m1': atr_m1,
+                        'hour_of_day': (pd.Timestamp(np.asarray(df_m1['timestamp'])[-1]).hour
+                                        if 'timestamp' in df_m1.columns else 12)}
+        features.update(zone_features(price, target_zone, point))
+        features['planned_rr'] = params['tp_mult']/params['sl_mult']
+        features['spread_pts'] = params.get('spread_pts', 1.0)  # Default spread
 
     # call ML inference to score this candidate
-    ml_out = ml_inference_func(features)  # expected {'p_win':..., 'pred_slippage':...}
+    with METRICS.timer('ml_inference'):
+        ml_out = ml_inference_func(features)  # expected {'p_win':..., 'pred_slippage':...}
     if ml_out['p_win'] >= params['p_threshold'] and ml_out['pred_slippage'] <= params['max_pred_slippage_pts']:
         # accept
         return {
@@ -66,4 +118,5 @@ def generate_candidate(df_m1, df_m15, df_d1, point, ml_inference_func, params):
             'features': features,
             'ml': ml_out
         }
+    METRICS.count('rejected_ml_gate')
     return None
\ No newline at end of file
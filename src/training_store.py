@@ -0,0 +1,157 @@
+# src/training_store.py
+"""
+Append-only columnar store for labeled trades.
+
+A store is a directory of row groups, one .npy file per column per group,
+plus store.json listing the groups. Appending writes a new group and then
+replaces store.json atomically, so a crash mid-append leaves the store as it
+was before. Columns are read memory-mapped and only the ones asked for, so
+training on the newest rows touches only those rows. The labeler streams
+into a store directly (BacktestLabeler.label_trades_to_store), keeping its
+resume checkpoint in the store metadata.
+
+    store = TrainingStore('data/training_store')
+    store.ingest_csv('data/labeled_trades.csv')   # only rows not stored yet
+    df = store.read(['atr_m1', 'win'], start=store.rows - 1000)
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+
+STORE_FILE = 'store.json'
+STORE_FORMAT = 1
+
+
+class TrainingStore:
+    """
+    Labeled trades of `directory`, in append order. The first append fixes
+    the columns and their dtypes; timestamps are stored as datetime64[ns]
+    and text columns as fixed-width unicode.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        path = os.path.join(self.directory, STORE_FILE)
+        if not os.path.exists(path):
+            return {'format': STORE_FORMAT, 'rows': 0, 'columns': [], 'groups': []}
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest.get('format') != STORE_FORMAT:
+            raise ValueError(f"{path}: unsupported training store format {manifest.get('format')}")
+        return manifest
+
+    @property
+    def rows(self):
+        return self._manifest['rows']
+
+    @property
+    def columns(self):
+        return [c['name'] for c in self._manifest['columns']]
+
+    @property
+    def meta(self):
+        """JSON metadata stored with the last append (e.g. a writer's checkpoint), or None"""
+        return self._manifest.get('meta')
+
+    @property
+    def last_timestamp(self):
+        """Timestamp of the last stored row, or None"""
+        if not self.rows or 'timestamp' not in self.columns:
+            return None
+        return pd.Timestamp(self._column_group(self._manifest['groups'][-1], 'timestamp')[-1])
+
+    def _column_group(self, group, name):
+        return np.load(os.path.join(self.directory, f"{group['name']}.{name}.npy"), mmap_mode='r')
+
+    def _schema(self, frame):
+        columns = []
+        for name in frame.columns:
+            values = frame[name]
+            if name == 'timestamp' or pd.api.types.is_datetime64_any_dtype(values):
+                dtype = np.dtype('datetime64[ns]')
+            elif pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+                dtype = np.dtype(np.float64) if values.isna().any() else values.to_numpy().dtype
+            else:
+                width = max(int(values.astype(str).str.len().max()), 1) if len(values) else 1
+                dtype = np.dtype(f'<U{max(width, 16)}')
+            columns.append({'name': str(name), 'dtype': dtype.str})
+        return columns
+
+    def _to_array(self, values, dtype):
+        if dtype.kind == 'M':
+            return pd.to_datetime(values).to_numpy(dtype='datetime64[ns]')
+        if dtype.kind in 'iu' and pd.api.types.is_float_dtype(values):
+            if not np.all(np.mod(values.to_numpy(), 1) == 0):
+                raise ValueError(f"integer column {values.name!r} got fractional values")
+        if dtype.kind == 'U':
+            values = values.astype(str)
+            if len(values) and values.str.len().max() > dtype.itemsize // 4:
+                raise ValueError(f"text column {values.name!r} wider than its stored width {dtype.itemsize // 4}")
+            return values.to_numpy(dtype=dtype)
+        return values.to_numpy(dtype=dtype)
+
+    def append(self, frame, meta=None):
+        """
+        Store the rows of DataFrame `frame` as a new row group; returns the
+        rows added. meta (JSON-serializable) replaces the stored metadata in
+        the same atomic update, also when frame is empty.
+        """
+        manifest = self._manifest if meta is None else dict(self._manifest, meta=meta)
+        if len(frame) == 0 and meta is None:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        if len(frame):
+            if not manifest['columns']:
+                manifest = dict(manifest, columns=self._schema(frame))
+            missing = [c['name'] for c in manifest['columns'] if c['name'] not in frame.columns]
+            if missing:
+                raise ValueError(f"rows lack stored columns {missing}")
+            group = {'name': f"g{len(manifest['groups']):06d}", 'rows': len(frame)}
+            for col in manifest['columns']:
+                values = self._to_array(frame[col['name']], np.dtype(col['dtype']))
+                np.save(os.path.join(self.directory, f"{group['name']}.{col['name']}.npy"), values)
+            manifest = dict(manifest, rows=manifest['rows'] + len(frame), groups=manifest['groups'] + [group])
+        tmp = os.path.join(self.directory, STORE_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, os.path.join(self.directory, STORE_FILE))
+        self._manifest = manifest
+        return len(frame)
+
+    def read(self, columns=None, start=0, stop=None):
+        """
+        Rows start..stop (append order) of the given columns as a DataFrame.
+        Only row groups overlapping the range are opened.
+        """
+        names = self.columns if columns is None else list(columns)
+        unknown = [c for c in names if c not in self.columns]
+        if unknown:
+            raise KeyError(f"columns not in the training store: {unknown}")
+        stop = self.rows if stop is None else min(stop, self.rows)
+        dtypes = {c['name']: np.dtype(c['dtype']) for c in self._manifest['columns']}
+        parts = {name: [] for name in names}
+        offset = 0
+        for group in self._manifest['groups']:
+            lo, hi = max(start - offset, 0), min(stop - offset, group['rows'])
+            if lo < hi:
+                for name in names:
+                    parts[name].append(self._column_group(group, name)[lo:hi])
+            offset += group['rows']
+        return pd.DataFrame({name: np.concatenate(chunks) if chunks else np.empty(0, dtype=dtypes[name])
+                             for name, chunks in parts.items()})
+
+    def ingest_csv(self, csv_path):
+        """
+        Append the rows of a labeled-trades CSV that are not stored yet: the
+        CSV is expected to extend what was ingested before (the labeler
+        rewrites it with new trades at the end). Returns the rows added.
+        """
+        df = pd.read_csv(csv_path, skiprows=range(1, self.rows + 1), parse_dates=['timestamp'])
+        last = self.last_timestamp
+        if last is not None and len(df) and df['timestamp'].iloc[0] < last:
+            raise ValueError(f"{csv_path} does not extend the training store (rows out of order); rebuild it")
+        return self.append(df)
@@ -0,0 +1,124 @@
+# src/walk_forward.py
+"""
+Walk-forward backtesting in parallel.
+M1 history is split into date shards; each shard is labeled in a worker
+process from its own slice of candles, which starts early enough to warm up
+the zones, ATRs and daily bias exactly as a run over the whole history would
+see them at the shard's first bar.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from backtester import BacktestLabeler
+from resampler import MultiTimeframe
+
+TRADE_BARS = 100  # M1 bars after a signal used to resolve its outcome
+
+def make_shards(df_m1, df_m15, params, shard_days=30):
+    """
+    (first, stop, warm_start) M1 indices per shard: signal bars first..stop-1
+    are labeled from candles warm_start..stop+TRADE_BARS-1.
+    Shards start at midnight; the warm-up covers the labeler's start index,
+    sr_lookback + atr_period closed M15 bars, and begins at midnight so the
+    forming daily bar is complete.
+    """
+    ts = np.asarray(df_m1['timestamp'], dtype='datetime64[ns]')
+    if len(ts) == 0:
+        return []
+    days = ts.astype('datetime64[D]')
+    bounds = np.arange(days[0], days[-1] + 1, np.timedelta64(shard_days, 'D'))
+    firsts = np.searchsorted(days, bounds[1:], side='left')
+    firsts = np.concatenate(([0], firsts[firsts < len(ts)]))
+    stops = np.append(firsts[1:], len(ts))
+
+    m15_ts = np.asarray(df_m15['timestamp'], dtype='datetime64[ns]')
+    m15_warmup = params['sr_lookback'] + params['atr_period'] + 1
+    start_idx = max(params['sr_lookback'], params['atr_period'], TRADE_BARS)
+    shards = []
+    for first, stop in zip(firsts, stops):
+        if first == 0:
+            shards.append((0, int(stop), 0))
+            continue
+        # M15 bars that opened before the shard's first M1 bar closed
+        m15_before = np.searchsorted(m15_ts, ts[first], side='right')
+        m15_from = m15_ts[max(m15_before - m15_warmup - 1, 0)]
+        warm = min(first - start_idx, np.searchsorted(ts, m15_from, side='left'))
+        warm = np.searchsorted(days, days[max(warm, 0)], side='left')
+        shards.append((int(first), int(stop), int(warm)))
+    return shards
+
+def shard_seeds(seed, n_shards):
+    """Independent, reproducible global-RNG seeds for the shards' spread/slippage draws"""
+    return [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(n_shards)]
+
+def _label_shard(task):
+    """Worker: label one shard with its own RNG seed"""
+    m1, m15, d1, params, label_range, seed, point = task
+    np.random.seed(seed)
+    return BacktestLabeler(point).label_trades(m1, m15, d1, params, label_range=label_range)
+
+class WalkForwardBacktester:
+    """
+    Label history shard by shard across worker processes.
+
+    The result depends only on the data, params, shard_days and seed: shards
+    are merged in time order and each has its own RNG seed, so any number of
+    workers (including workers=1, which runs in-process) gives the same output.
+    """
+
+    def __init__(self, shard_days=30, workers=None, seed=0, point=0.00001):
+        self.shard_days = shard_days
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.point = point
+
+    def label(self, df_m1, df_m15, df_d1, params, output_csv=None):
+        """Labeled trades for one parameter set; written to output_csv if given"""
+        return self.label_param_sets(df_m1, df_m15, df_d1, [params],
+                                     [output_csv] if output_csv else None)[0]
+
+    def label_param_sets(self, df_m1, df_m15, df_d1, param_sets, output_csvs=None):
+        """
+        Label every parameter set over every shard in one process pool.
+        Returns a list of labeled-trade lists, one per parameter set.
+        """
+        if df_m15 is None or df_d1 is None:
+            mtf = MultiTimeframe(df_m1, timeframes=('M15', 'D1'))
+            df_m15 = mtf.frames['M15'] if df_m15 is None else df_m15
+            df_d1 = mtf.frames['D1'] if df_d1 is None else df_d1
+
+        tasks, owners = [], []
+        for k, params in enumerate(param_sets):
+            shards = make_shards(df_m1, df_m15, params, self.shard_days)
+            for (first, stop, warm), seed in zip(shards, shard_seeds(self.seed, len(shards))):
+                tasks.append(self._shard_task(df_m1, df_m15, df_d1, params, first, stop, warm, seed))
+                owners.append(k)
+
+        if self.workers == 1 or len(tasks) <= 1:
+            results = [_label_shard(t) for t in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks))) as pool:
+                results = list(pool.map(_label_shard, tasks))
+
+        labeled = [[] for _ in param_sets]
+        for k, records in zip(owners, results):
+            labeled[k].extend(records)
+        for records, path in zip(labeled, output_csvs or []):
+            if path and records:
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                pd.DataFrame(records).to_csv(path, index=False)
+                print(f"Saved {len(records)} labeled trades to {path}")
+        return labeled
+
+    def _shard_task(self, df_m1, df_m15, df_d1, params, first, stop, warm, seed):
+        """Candle slices and local label range of one shard"""
+        end = min(stop + TRADE_BARS, len(df_m1))
+        m1 = df_m1.iloc[warm:end].reset_index(drop=True)
+        t0, t1 = m1['timestamp'].iloc[0], m1['timestamp'].iloc[-1]
+        m15 = df_m15[(df_m15['timestamp'] >= t0.floor('15min')) & (df_m15['timestamp'] <= t1)]
+        d1 = df_d1[df_d1['timestamp'] <= t1]  # D1 history is small; keep all of it
+        # Signal bars near the shard end still need TRADE_BARS bars after them,
+        # exactly like the last bars of a full run
+        label_range = (first - warm, stop - warm)
+        return (m1, m15.reset_index(drop=True), d1.reset_index(drop=True), params, label_range, seed, self.point)
@@ -0,0 +1,138 @@
+# src/zone_index.py
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from indicators import cluster_levels
+
+class ZoneIndex:
+    """
+    Streaming S/R zones over the last `lookback` closed M15 bars.
+
+    Feed it one bar per M15 close with update(); swing levels enter when a bar
+    gets far enough from the right edge of the window and expire when it gets
+    too close to the left edge, so after every update `zones` equals
+    cluster_levels(find_swings_levels(m15_so_far, lookback), cluster_pips, point).
+    Zones are kept sorted with their mids, so nearest-zone queries are bisects.
+    """
+
+    def __init__(self, lookback, cluster_pips, point):
+        self.lookback = lookback
+        self.cluster_pips = cluster_pips
+        self.point = point
+        self.bars_seen = 0
+        self._highs = deque(maxlen=max(lookback, 0))
+        self._lows = deque(maxlen=max(lookback, 0))
+        self._swings = deque()       # (bar number, levels it contributes), oldest first
+        self._level_counts = {}      # level -> number of swing bars contributing it
+        self._levels = []            # sorted unique levels
+        self._zones = []
+        self._mids = []
+
+    @classmethod
+    def from_arrays(cls, high, low, lookback, cluster_pips, point):
+        """Build an index over a candle history (oldest first)"""
+        index = cls(lookback, cluster_pips, point)
+        index.extend(high, low)
+        return index
+
+    @property
+    def levels(self):
+        return list(self._levels)
+
+    @property
+    def zones(self):
+        """Zones as (low, high) tuples, sorted ascending"""
+        return self._zones
+
+    @property
+    def mids(self):
+        """Mid prices of `zones`, ascending"""
+        return self._mids
+
+    def extend(self, highs, lows):
+        """Add several closed bars, oldest first; returns True if the levels changed"""
+        changed = False
+        for h, l in zip(highs, lows):
+            changed |= self._push(float(h), float(l))
+        if changed:
+            self._rebuild_zones()
+        return changed
+
+    def update(self, high, low):
+        """Add one closed M15 bar; returns True if the levels changed"""
+        if self._push(float(high), float(low)):
+            self._rebuild_zones()
+            return True
+        return False
+
+    def nearest_below(self, price):
+        """Zone with the highest mid strictly below price, or None"""
+        i = bisect_left(self._mids, price)
+        return self._zones[i - 1] if i > 0 else None
+
+    def nearest_above(self, price):
+        """Zone with the lowest mid strictly above price, or None"""
+        i = bisect_right(self._mids, price)
+        return self._zones[i] if i < len(self._zones) else None
+
+    def nearest(self, price):
+        """Zone whose mid is closest to price; the lower zone wins ties"""
+        i = bisect_left(self._mids, price)
+        candidates = [j for j in (i - 1, i) if 0 <= j < len(self._zones)]
+        if not candidates:
+            return None
+        best = min(candidates, key=lambda j: abs(price - self._mids[j]))
+        return self._zones[best]
+
+    def _push(self, high, low):
+        """Slide the window by one bar; returns True if the level set changed"""
+        if self.lookback <= 0:
+            self.bars_seen += 1
+            return False
+        self._highs.append(high)
+        self._lows.append(low)
+        bar = self.bars_seen
+        self.bars_seen += 1
+        changed = False
+
+        # Bars in the first and last two window slots are never swings, so the
+        # window start + 2 is the oldest bar that may still contribute
+        first_eligible = max(self.bars_seen - self.lookback, 0) + 2
+        while self._swings and self._swings[0][0] < first_eligible:
+            _, old_levels = self._swings.popleft()
+            for lv in old_levels:
+                self._remove_level(lv)
+            changed = True
+
+        # The bar two back from the newest just became eligible
+        n = len(self._highs)
+        if n >= 5:
+            h, l = self._highs, self._lows
+            new_levels = []
+            if h[-3] > h[-4] and h[-3] > h[-2]:
+                new_levels.append(h[-3])
+            if l[-3] < l[-4] and l[-3] < l[-2]:
+                new_levels.append(l[-3])
+            if new_levels:
+                self._swings.append((bar - 2, new_levels))
+                for lv in new_levels:
+                    self._add_level(lv)
+                changed = True
+        return changed
+
+    def _add_level(self, level):
+        count = self._level_counts.get(level, 0)
+        if count == 0:
+            insort(self._levels, level)
+        self._level_counts[level] = count + 1
+
+    def _remove_level(self, level):
+        count = self._level_counts[level] - 1
+        if count == 0:
+            del self._level_counts[level]
+            del self._levels[bisect_left(self._levels, level)]
+        else:
+            self._level_counts[level] = count
+
+    def _rebuild_zones(self):
+        self._zones = cluster_levels(self._levels, self.cluster_pips, self.point)
+        self._mids = [(z[0] + z[1]) / 2.0 for z in self._zones]
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for the backtest labeler
+Checks that the single-pass labeler reproduces the reference output
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import filecmp
+import numpy as np
+import pandas as pd
+import pytest
+from backtester import BacktestLabeler, simulate_trade_outcomes
+from testing_utils import random_walk_frames
+
+PARAMS = {
+    'sr_lookback': 40,
+    'sr_cluster_pips': 20,
+    'zone_buffer_points': 5,
+    'require_rejection': True,
+    'rejection_candles': 3,
+    'rejection_wick_pts': 6,
+    'atr_period': 14,
+    'tp_mult': 1.8,
+    'sl_mult': 0.9
+}
+
+def test_incremental_labeler_matches_reference(tmp_path):
+    m1, m15, d1 = random_walk_frames(3300)
+    outputs = {}
+    for incremental in (False, True):
+        np.random.seed(7)
+        out = os.path.join(tmp_path, f'labeled_{incremental}.csv')
+        labeled = BacktestLabeler().label_trades_from_data(m1, m15, d1, PARAMS, output_csv=out,
+                                                           incremental=incremental)
+        assert labeled
+        outputs[incremental] = out
+    assert filecmp.cmp(outputs[False], outputs[True], shallow=False)
+
+def test_simulate_trade_outcomes_matches_bar_loop():
+    rng = np.random.default_rng(3)
+    m1, _, _ = random_walk_frames(600, seed=2)
+    high = m1['high'].to_numpy()
+    low = m1['low'].to_numpy()
+    close = m1['close'].to_numpy()
+    # include entries close to the end, where fewer than max_bars bars remain
+    entry_idx = np.concatenate([rng.integers(0, 500, 200), np.arange(560, 600)])
+    sides = rng.choice([1, -1], len(entry_idx))
+    dist = rng.uniform(0.00005, 0.0004, (len(entry_idx), 2))
+    sl = close[entry_idx] - sides * dist[:, 0]
+    tp = close[entry_idx] + sides * dist[:, 1]
+
+    win, bars_to_hit = simulate_trade_outcomes(high, low, entry_idx, sides, sl, tp, max_bars=100, chunk_size=64)
+
+    for k, start in enumerate(entry_idx):
+        exp_win, exp_bars = False, 100
+        for i in range(1, min(101, len(high) - start)):
+            h, l = high[start + i], low[start + i]
+            tp_hit = h >= tp[k] if sides[k] == 1 else l <= tp[k]
+            sl_hit = l <= sl[k] if sides[k] == 1 else h >= sl[k]
+            if tp_hit or sl_hit:
+                exp_win, exp_bars = tp_hit, i
+                break
+        assert win[k] == exp_win and bars_to_hit[k] == exp_bars, k
+
+def test_labeler_features_do_not_see_the_future(tmp_path):
+    m1, _, _ = random_walk_frames(3300)
+    cut = 3000
+    future = m1.copy()
+    future.loc[cut:, ['open', 'high', 'low', 'close']] += 0.01
+    features = ['daily_bias', 'distance_to_nearest_zone_pts', 'zone_width_pts', 'atr_m1', 'atr_m15']
+    labeled = []
+    for k, frame in enumerate((m1, future)):
+        np.random.seed(7)
+        # M15/D1 are resampled from M1 when not given
+        out = BacktestLabeler().label_trades_from_data(frame, None, None, PARAMS,
+                                                       output_csv=os.path.join(tmp_path, f'{k}.csv'))
+        df = pd.DataFrame(out)
+        labeled.append(df[df['timestamp'] <= m1['timestamp'].iloc[cut - 1]][features])
+    assert len(labeled[0])
+    pd.testing.assert_frame_equal(labeled[0], labeled[1])
+
+def test_streamed_labeling_resumes_after_a_crash(tmp_path, monkeypatch):
+    from ml_models import FEATURE_COLUMNS, LABEL_COLUMNS, load_training_rows
+    from training_store import TrainingStore
+    m1, m15, d1 = random_walk_frames(4000)
+    np.random.seed(7)
+    expected = pd.DataFrame(BacktestLabeler().label_trades(m1, m15, d1, PARAMS))
+
+    # the third row group fails to write: the first two and their checkpoint survive
+    append = TrainingStore.append
+    calls = []
+
+    def crash_on_third(store, frame, meta=None):
+        calls.append(len(frame))
+        if len(calls) == 3:
+            raise OSError("disk full")
+        return append(store, frame, meta)
+    monkeypatch.setattr(TrainingStore, 'append', crash_on_third)
+    store_dir = str(tmp_path / 'store')
+    np.random.seed(7)
+    with pytest.raises(OSError):
+        BacktestLabeler().label_trades_to_store(m1, m15, d1, PARAMS, store_dir, batch_rows=50)
+    assert TrainingStore(store_dir).rows == 100
+    monkeypatch.setattr(TrainingStore, 'append', append)
+
+    # resuming restores the RNG state too, so the global seed does not matter
+    np.random.seed(99)
+    store = BacktestLabeler().label_trades_to_store(m1, m15, d1, PARAMS, store_dir, batch_rows=50)
+    stored = store.read()
+    assert store.rows == len(expected) and list(stored.columns) == list(expected.columns)
+    for col in expected.columns:
+        assert list(stored[col]) == list(expected[col]), col
+    assert stored['win'].dtype == np.int64 and stored['rejection_wick_pts'].dtype == np.float64
+
+    # finished: nothing left to label; other parameters or data are refused
+    assert BacktestLabeler().label_trades_to_store(m1, m15, d1, PARAMS, store_dir).rows == len(expected)
+    with pytest.raises(ValueError):
+        BacktestLabeler().label_trades_to_store(m1, m15, d1, {**PARAMS, 'tp_mult': 2.0}, store_dir)
+    with pytest.raises(FileExistsError):
+        BacktestLabeler().label_trades_to_store(m1, m15, d1, PARAMS, store_dir, resume=False)
+    assert list(load_training_rows(store_dir).columns) == FEATURE_COLUMNS + LABEL_COLUMNS
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for the fixed-capacity candle buffer and the engine running on it
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+import pytest
+from candle_buffer import CandleBuffer, bars_since
+from testing_utils import random_walk_frames
+from engine import TradingEngine
+from feature_store import FeatureStore
+from feeds import ReplayFeed
+from indicators import daily_bias_from_D1, find_swings_levels
+
+def test_ring_buffer_views():
+    m1, m15, d1 = random_walk_frames(4 * 1440, seed=0)
+    buffer = CandleBuffer(64)
+    nbytes = buffer.nbytes
+    for bar in m1.iloc[:100].to_dict('records'):
+        buffer.append(bar)
+    buffer.extend(m1.iloc[100:])
+    assert len(buffer) == 64 and buffer.total == len(m1) and buffer.start == len(m1) - 64 and buffer.nbytes == nbytes
+    pd.testing.assert_frame_equal(buffer.to_frame(), m1.iloc[-64:].reset_index(drop=True), check_dtype=False)
+
+    view = buffer.view(10)
+    assert np.shares_memory(view['close'], buffer['close'])
+    assert np.array_equal(view['close'], m1['close'].iloc[-10:]) and view.start == len(m1) - 10
+    with pytest.raises(ValueError):
+        view['close'][0] = 0.0
+    assert np.array_equal(bars_since(buffer, len(m1) - 5)['high'], m1['high'].iloc[-5:])
+    with pytest.raises(IndexError):
+        buffer.since(buffer.start - 1)
+
+    # the indicators take views in place of frames
+    d1_buffer = CandleBuffer.from_frame(d1, 3)
+    assert daily_bias_from_D1(d1_buffer.view(), 1.1) == daily_bias_from_D1(d1.iloc[-3:], 1.1)
+    m15_buffer = CandleBuffer.from_frame(m15, 30)
+    assert find_swings_levels(m15_buffer.view(), 30) == find_swings_levels(m15, 30)
+
+def test_engine_on_candle_buffers_stays_bounded():
+    m1, m15, d1 = random_walk_frames(4 * 1440, seed=0)
+    start = m1['timestamp'].iloc[3 * 1440 + 600]
+
+    # capacity above the whole history: same features and decisions as the DataFrame engine
+    runs = []
+    for capacity in (None, len(m1)):
+        engine = TradingEngine(load_data=False, candle_capacity=capacity)
+        engine.attach_feed(ReplayFeed(m1, m15, d1, start=start))
+        engine.run()
+        runs.append(engine)
+    frames, buffered = runs
+    assert isinstance(buffered.m1, CandleBuffer) and buffered.m1.total == len(m1)
+    assert np.allclose(buffered.features.matrix, frames.features.matrix, rtol=1e-9, atol=1e-12, equal_nan=True)
+    assert (buffered.accepted_trades, buffered.rejected_trades) == (frames.accepted_trades, frames.rejected_trades)
+
+    # a small capacity: memory does not grow, rows match a batch pass over the bars it kept
+    engine = TradingEngine(load_data=False, candle_capacity=1000)
+    engine.attach_feed(ReplayFeed(m1, m15, d1, start=start))
+    m1_first, m15_first = engine.m1.start, engine.m15.start
+    nbytes = engine.m1.nbytes + engine.m15.nbytes + engine.d1.nbytes
+    engine.run()
+    assert engine.m1.nbytes + engine.m15.nbytes + engine.d1.nbytes == nbytes
+    assert len(engine.m1) == 1000 and len(engine.features) == 1000
+    assert len(engine.features._buffer) <= 2 * 1000
+    batch = FeatureStore(m1.iloc[m1_first:], m15.iloc[m15_first:], engine.params['atr_period'])
+    assert np.allclose(engine.features.matrix, batch.matrix[-1000:], rtol=1e-9, atol=1e-12, equal_nan=True)
+    assert engine.accepted_trades + engine.rejected_trades == frames.accepted_trades + frames.rejected_trades
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for the synthetic tick generator
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from data_generator import SampleDataGenerator
+from resampler import MultiTimeframe
+
+START = datetime(2025, 1, 1)
+END = datetime(2025, 1, 1, 6)
+
+def test_ticks_are_seeded_and_independent_of_chunking():
+    ticks = SampleDataGenerator(seed=5).generate_tick_data(START, END, 3)
+    assert len(ticks) == 6 * 3600 // 3 + 1
+    assert ticks['timestamp'].iloc[-1] == pd.Timestamp(END)
+    assert ticks['mid'].iloc[0] == 1.1
+    assert (ticks['ask'] > ticks['bid']).all()
+    assert ticks.equals(SampleDataGenerator(seed=5).generate_tick_data(START, END, 3))
+    assert not ticks.equals(SampleDataGenerator(seed=6).generate_tick_data(START, END, 3))
+
+    chunks = list(SampleDataGenerator(seed=5).iter_tick_chunks(START, END, 3, chunk_size=997))
+    assert max(len(c) for c in chunks) == 997
+    assert pd.concat(chunks, ignore_index=True).equals(ticks)
+
+def test_streamed_files_match_in_memory_data(tmp_path):
+    generator = SampleDataGenerator(seed=1)
+    tick_path = os.path.join(tmp_path, 'ticks.csv')
+    m1_path = os.path.join(tmp_path, 'm1.csv')
+    # 7s ticks with odd chunk sizes split minutes across chunks
+    n_ticks, n_m1 = generator.write_tick_data(tick_path, START, END, 7, chunk_size=101, m1_path=m1_path)
+
+    ticks = generator.generate_tick_data(START, END, 7)
+    m1 = MultiTimeframe.from_ticks(ticks, timeframes=()).frames['M1']
+    assert (n_ticks, n_m1) == (len(ticks), len(m1))
+
+    written_ticks = pd.read_csv(tick_path, parse_dates=['timestamp'])
+    written_m1 = pd.read_csv(m1_path, parse_dates=['timestamp'])
+    assert (written_ticks['timestamp'].to_numpy() == ticks['timestamp'].to_numpy()).all()
+    assert np.allclose(written_ticks['mid'], ticks['mid'], rtol=0, atol=1e-12)
+    assert (written_m1['timestamp'].to_numpy() == m1['timestamp'].to_numpy()).all()
+    assert (written_m1['volume'].to_numpy() == m1['volume'].to_numpy()).all()
+    assert np.allclose(written_m1[['open', 'high', 'low', 'close']], m1[['open', 'high', 'low', 'close']],
+                       rtol=0, atol=1e-12)
+
+def test_generate_m1_matches_resampled_ticks():
+    generator = SampleDataGenerator(seed=2, trend_amplitude=0.0)
+    m1 = generator.generate_m1(START, END, 7, chunk_size=101)
+    expected = MultiTimeframe.from_ticks(generator.generate_tick_data(START, END, 7), timeframes=()).frames['M1']
+    assert m1.equals(expected) and len(m1) == 6 * 60  # the last 7s tick falls at 05:59:59
+    # trend_amplitude only changes the drift, not the noise streams
+    trending = SampleDataGenerator(seed=2).generate_tick_data(START, END, 7)
+    driftless = generator.generate_tick_data(START, END, 7)
+    assert (trending['timestamp'] == driftless['timestamp']).all() and not trending['mid'].equals(driftless['mid'])
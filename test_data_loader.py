@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for candle loading and the binary candle format
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+from data_loader import load_candles_csv, load_candles_bin, convert_csv_to_bin, load_candles
+
+def write_csv(path, n=500):
+    rng = np.random.default_rng(0)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0001, n))
+    df = pd.DataFrame({
+        'timestamp': pd.date_range('2025-01-06', periods=n, freq='1min'),
+        'open': close, 'high': close + 0.0001, 'low': close - 0.0001, 'close': close,
+        'volume': rng.integers(1, 100, n)
+    })
+    # shuffled rows: loaders must return them sorted
+    df.sample(frac=1, random_state=0).to_csv(path, index=False)
+
+def test_binary_roundtrip_and_range(tmp_path):
+    csv_path = os.path.join(tmp_path, 'EURUSD_M1.csv')
+    write_csv(csv_path)
+    expected = load_candles_csv(csv_path)
+    bin_path = convert_csv_to_bin(csv_path)
+    assert bin_path.endswith('.candles')
+
+    df = load_candles_bin(bin_path)
+    pd.testing.assert_frame_equal(df, expected)
+    assert not df['close'].to_numpy().flags.writeable  # a view of the mapped file, not a copy
+    pd.testing.assert_frame_equal(load_candles(csv_path), expected)
+
+    start, end = expected['timestamp'].iloc[100], expected['timestamp'].iloc[199]
+    part = load_candles_bin(bin_path, start=start, end=end)
+    pd.testing.assert_frame_equal(part, expected.iloc[100:200].reset_index(drop=True))
+    arrays = load_candles_bin(bin_path, start=start, as_frame=False)
+    assert len(arrays['close']) == 400 and arrays['close'][0] == expected['close'].iloc[100]
+
+def test_binary_float32_prices(tmp_path):
+    csv_path = os.path.join(tmp_path, 'EURUSD_M1.csv')
+    write_csv(csv_path, n=50)
+    bin_path = convert_csv_to_bin(csv_path, price_dtype='float32')
+    arrays = load_candles_bin(bin_path, as_frame=False)
+    assert arrays['close'].dtype == np.float32
+    assert np.allclose(arrays['close'], load_candles_csv(csv_path)['close'], rtol=1e-6)
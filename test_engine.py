@@ -8,6 +8,8 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
+from candle_buffer import as_frame
+from testing_utils import random_walk_frames
 from engine import TradingEngine
 import time
 
@@ -41,7 +43,7 @@ def test_engine():
     for i in range(5):
         try:
             # Calculate daily bias
-            current_price = engine.m1.iloc[-1]['close']
+            current_price = as_frame(engine.m1).iloc[-1]['close']
             from indicators import daily_bias_from_D1
             bias = daily_bias_from_D1(engine.d1, current_price)
             print(f"Iteration {i+1}: Price={current_price:.5f}, Bias={bias}")
@@ -83,6 +85,175 @@ def test_engine():
     print("Engine test completed successfully!")
     return True
 
+def test_event_mode_replay():
+    """Engine evaluates once per M1 close (M15 closes coincide with one) from a replay feed and exits when it ends"""
+    import pandas as pd
+    from feeds import ReplayFeed
+    m1, m15, d1 = random_walk_frames(4 * 1440, seed=0)
+    start = m1['timestamp'].iloc[3 * 1440 + 600]
+    feed = ReplayFeed(m1, m15, d1, start=start)
+    engine = TradingEngine()
+    engine.attach_feed(feed)
+    assert len(engine.d1) == 3 and as_frame(engine.m1)['timestamp'].iloc[-1] < start
+
+    replayed_m1 = (m1['timestamp'] + pd.Timedelta(minutes=1) > start).sum()
+    engine.run()
+    assert not engine.running
+    assert len(engine.m1) == len(m1) and len(engine.m15) == len(m15)
+    assert engine.accepted_trades + engine.rejected_trades == replayed_m1
+    assert len(engine.event_latencies) == replayed_m1
+    # feature rows appended bar by bar equal one batch pass over the final history
+    import numpy as np
+    from feature_store import FeatureStore
+    from indicators import atr
+    batch = FeatureStore(engine.m1, engine.m15, engine.params['atr_period'])
+    assert np.allclose(engine.features.matrix, batch.matrix, rtol=1e-9, atol=1e-12, equal_nan=True)
+    assert np.isclose(engine.features.row(-1)['atr_m1'],
+                      atr(m1['high'], m1['low'], m1['close'], period=engine.params['atr_period'])[-1], rtol=1e-9)
+
+class _QueuedReplay:
+    """A ReplayFeed whose events are all queued by start(), before the engine takes the first one"""
+
+    def __init__(self, feed):
+        self.feed = feed
+        self.callbacks = []
+
+    def history(self):
+        return self.feed.history()
+
+    def subscribe(self, callback):
+        self.callbacks.append(callback)
+
+    def start(self):
+        for _, event in list(self.feed.events()) + [(None, None)]:
+            for callback in self.callbacks:
+                callback(event)
+
+    def stop(self):
+        pass
+
+def test_bars_closing_together_are_evaluated_once():
+    """An M1 close that also closes an M15 bar is scored once, with that M15 bar applied"""
+    import numpy as np
+    import pandas as pd
+    from feeds import ReplayFeed
+    m1, m15, d1 = random_walk_frames(4 * 1440, seed=0)
+    start = m1['timestamp'].iloc[3 * 1440 + 600]
+    engine = TradingEngine(load_data=False)
+    engine.attach_feed(_QueuedReplay(ReplayFeed(m1, m15, d1, start=start)))
+    closes = []
+    evaluate = engine.evaluate
+
+    def recording_evaluate():
+        closes.append((np.asarray(engine.m1['timestamp'])[-1] + np.timedelta64(1, 'm'),
+                       np.asarray(engine.m15['timestamp'])[-1] + np.timedelta64(15, 'm')))
+        return evaluate()
+    engine.evaluate = recording_evaluate
+    engine.run()
+    m1_closes = [c for c, _ in closes]
+    assert len(closes) == (m1['timestamp'] + pd.Timedelta(minutes=1) > start).sum() == len(set(m1_closes))
+    on_m15 = [(c, c15) for c, c15 in closes if pd.Timestamp(c).minute % 15 == 0]
+    assert on_m15 and all(c == c15 for c, c15 in on_m15)
+
+def test_live_bias_matches_labeled_bias(monkeypatch):
+    """The engine's daily bias on a replay equals the labeler's per-bar bias at the same M1 bars"""
+    import numpy as np
+    import engine as engine_module
+    from backtester import align_timeframes, daily_bias_per_bar
+    from feeds import ReplayFeed
+    m1, m15, d1 = random_walk_frames(6 * 1440, seed=3)
+    seen = {}
+    generate = engine_module.generate_candidate
+
+    def recording_generate(df_m1, *args, **kwargs):
+        seen[np.asarray(df_m1['timestamp'])[-1]] = kwargs['params']['daily_bias']
+        return generate(df_m1, *args, **kwargs)
+    monkeypatch.setattr(engine_module, 'generate_candidate', recording_generate)
+    engine = TradingEngine(load_data=False)
+    engine.attach_feed(_QueuedReplay(ReplayFeed(m1, m15, d1, start=m1['timestamp'].iloc[3 * 1440 + 600])))
+    engine.run()
+    labeled = daily_bias_per_bar(align_timeframes(m1, m15, d1), m1['close'])
+    rows = np.searchsorted(m1['timestamp'].to_numpy(), np.array(list(seen)))
+    assert len(rows) > 2 * 1440
+    assert list(seen.values()) == labeled[rows].tolist()
+    assert {-1, 1} <= set(seen.values())
+
+def test_tick_trigger_scores_the_tick_price(monkeypatch):
+    """Tick-triggered evaluations use the tick's bid and spread, not the last M1 close again"""
+    import numpy as np
+    import engine as engine_module
+    from feeds import ReplayFeed, TickEvent
+    m1, m15, d1 = random_walk_frames(3 * 1440 + 60, seed=0)
+    feed = ReplayFeed(m1, m15, d1, start=m1['timestamp'].iloc[3 * 1440], ticks=True, spread=0.0002)
+    ticks = [event for _, event in feed.events() if isinstance(event, TickEvent)]
+    seen = []
+    generate = engine_module.generate_candidate
+
+    def recording_generate(*args, **kwargs):
+        seen.append((kwargs['price'], kwargs['params']['spread_pts']))
+        return generate(*args, **kwargs)
+    monkeypatch.setattr(engine_module, 'generate_candidate', recording_generate)
+    engine = TradingEngine(load_data=False)
+    engine.attach_feed(feed, evaluate_on=(), tick_trigger=1)
+    engine.run()
+    assert [price for price, _ in seen] == [tick.bid for tick in ticks]
+    assert np.allclose([spread for _, spread in seen], 0.0002 / engine.point)
+
+def test_event_mode_stop_is_immediate():
+    import threading
+    from feeds import ReplayFeed
+    m1, m15, d1 = random_walk_frames(4 * 1440, seed=0)
+    # one replayed minute per real second: the next event is far away
+    feed = ReplayFeed(m1, m15, d1, start=m1['timestamp'].iloc[3 * 1440], speed=60)
+    engine = TradingEngine()
+    engine.attach_feed(feed)
+    t = threading.Thread(target=engine.run, daemon=True)
+    t.start()
+    time.sleep(0.3)
+    t0 = time.time()
+    engine.stop()
+    t.join(2)
+    assert not t.is_alive() and time.time() - t0 < 0.5
+
+def test_multi_symbol_engine():
+    """Symbols keep their own state, share the models, and a slow one does not hold up the rest"""
+    from engine import MultiSymbolEngine
+    from feeds import ReplayFeed
+    m1, m15, d1 = random_walk_frames(4 * 1440, seed=0)
+    multi = MultiSymbolEngine({
+        'EURUSD': {},
+        'GBPUSD': {'spread_pts': 1.8},
+        'USDJPY': {'point': 0.001, 'params': {'atr_period': 10}},
+    }, load_data=False)
+    assert multi['USDJPY'].point == 0.001 and multi['GBPUSD'].params['spread_pts'] == 1.8
+    assert multi['USDJPY'].params['atr_period'] == 10 and multi['EURUSD'].params['atr_period'] == 14
+    assert multi['GBPUSD'].ml is multi['EURUSD'].ml is multi['USDJPY'].ml
+
+    for engine in multi.engines.values():
+        engine.set_m1_history(m1)
+    results = multi.evaluate_all()
+    assert set(results) == set(multi.symbols)
+    assert multi['USDJPY'].features.atr_period == 10
+    assert all(s['count'] == 1 for s in multi.latency_stats().values())
+
+    start = m1['timestamp'].iloc[4 * 1440 - 60]
+    for symbol in multi.symbols:
+        multi.attach_feed(symbol, ReplayFeed(m1, m15, d1, start=start))
+    slow = multi['USDJPY']
+    fast_evaluate = slow._evaluate
+    slow._evaluate = lambda *args: (time.sleep(0.02), fast_evaluate(*args))[1]
+    multi.start()
+    multi._threads['EURUSD'].join(5)
+    multi._threads['GBPUSD'].join(5)
+    assert multi._threads['USDJPY'].is_alive()
+    multi.join(10)
+    assert not multi.running
+    counts = {s: e.accepted_trades + e.rejected_trades for s, e in multi.engines.items()}
+    assert len(set(counts.values())) == 1 and counts['EURUSD'] > 60
+    stats = multi.latency_stats()
+    assert stats['USDJPY']['p50_ms'] >= 20 > stats['EURUSD']['p50_ms']
+    multi.stop()
+
 if __name__ == "__main__":
     try:
         test_engine()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-bar feature store
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+from feature_store import FeatureStore, BAR_FEATURES
+from backtester import BacktestLabeler
+from signal_generator import _evaluate_zone
+from ml_models import FEATURE_COLUMNS
+from testing_utils import random_walk_frames
+from test_backtester import PARAMS
+
+def test_rows_match_reference_features_and_streaming_extend():
+    m1, m15, _ = random_walk_frames(3000)
+    store = FeatureStore(m1, m15, atr_period=14)
+    labeler = BacktestLabeler()
+    for i in (200, 1234, 2999):
+        # what the reference labeler computes from the history slices at bar i
+        m15_hist = m15[(m15['timestamp'] + pd.Timedelta(minutes=15)) <= m1['timestamp'].iloc[i] + pd.Timedelta(minutes=1)]
+        candidate = {'bias': 1, 'target_zone': (1.0, 1.0)}
+        reference = labeler._extract_features(m1.iloc[:i + 1], m15_hist, None, candidate, m1['close'].iloc[i],
+                                              m1['timestamp'].iloc[i], PARAMS)
+        assert {k: reference[k] for k in BAR_FEATURES} == store.row(i)
+
+    # a live store grown bar by bar (M15 bars arriving after the M1 bar they close with)
+    live = FeatureStore(m1.iloc[:500], m15.iloc[:33], atr_period=14)
+    for n in range(501, 700):
+        closed = m15.iloc[:(n - 1) // 15]
+        live.extend(m1.iloc[:n], closed)
+        live.extend(m1.iloc[:n], m15.iloc[:n // 15])
+    assert np.allclose(live.matrix, store.matrix[:699], rtol=1e-9, atol=1e-12, equal_nan=True)
+
+def test_disk_cache(tmp_path):
+    more, more_m15, _ = random_walk_frames(2100)
+    m1, m15 = more.iloc[:2000], more_m15.iloc[:134]
+    first = FeatureStore(m1, m15, atr_period=14, cache_dir=str(tmp_path))
+    again = FeatureStore(m1, m15, atr_period=14, cache_dir=str(tmp_path))
+    other = FeatureStore(m1, m15, atr_period=10, cache_dir=str(tmp_path))
+    assert not first.loaded_from_cache and again.loaded_from_cache and not other.loaded_from_cache
+    assert np.array_equal(first.matrix, again.matrix, equal_nan=True)
+    assert first.cache_path != other.cache_path and len(os.listdir(tmp_path)) == 2
+
+    # a cached (read-only, memory-mapped) matrix can still grow
+    again.extend(more, more_m15)
+    assert len(again) == 2100
+    assert np.allclose(again.matrix, FeatureStore(more, more_m15, atr_period=14).matrix, rtol=1e-9, atol=1e-12,
+                       equal_nan=True)
+
+def test_live_features_use_training_names():
+    m1, m15, _ = random_walk_frames(500)
+    store = FeatureStore(m1, m15, atr_period=14)
+    price = m1['close'].iloc[-1]
+    params = {**PARAMS, 'require_rejection': False, 'p_threshold': 0, 'max_pred_slippage_pts': 99}
+    seen = []
+    ml = lambda f: seen.append(f) or {'p_win': 1.0, 'pred_slippage': 0.0}
+    candidate = _evaluate_zone(m1, (price - 0.0001, price), price, 1, 0.00001, ml, params,
+                               bar_features=store.row(-1))
+    assert candidate and set(FEATURE_COLUMNS) <= set(seen[0]) and 'dist_zone_pts' not in seen[0]
+    assert seen[0]['atr_m1'] == store.row(-1)['atr_m1'] and abs(seen[0]['distance_to_nearest_zone_pts'] - 5) < 1e-6
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests for the indicator functions
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+from testing_utils import random_walk_frames
+from indicators import (find_swings_levels, find_swings_levels_arrays, _find_swings_levels_loop, check_rejection_m1,
+                        _check_rejection_m1_loop, rejection_candle, rejection_masks, find_rejection, atr,
+                        candle_anatomy, shape_rejection_masks, RollingATR, RollingVolatility, entry_atr,
+                        target_zone_index, daily_bias_from_D1, daily_bias_rule)
+
+POINT = 0.00001
+
+def make_m15(n, seed=0, decimals=None):
+    """n M15 bars; coarse prices (decimals) produce equal neighbours and repeated levels"""
+    m15 = random_walk_frames(15 * n, seed, decimals=decimals)[1]
+    return m15.set_axis(np.arange(1000, 1000 + n))  # non-default index, as in sliced frames
+
+def test_find_swings_levels_matches_loop():
+    for n in (0, 3, 4, 5, 6, 50, 400):
+        for decimals in (None, 4):
+            df = make_m15(n, seed=n, decimals=decimals)
+            for lookback in (0, 5, 120, 500):
+                expected = _find_swings_levels_loop(df, lookback=lookback)
+                assert find_swings_levels(df, lookback=lookback) == expected, (n, decimals, lookback)
+                assert find_swings_levels_arrays(df['high'].to_numpy(), df['low'].to_numpy(),
+                                                 lookback=lookback) == expected
+
+def make_m1(n, seed=0):
+    """M1 candles rounded to 0.1 pip, with dojis and long wicks"""
+    m1 = random_walk_frames(n, seed, decimals=5, doji_rate=0.1)[0][['open', 'high', 'low', 'close']]
+    return m1.set_axis(np.arange(7, 7 + n))
+
+def test_rejection_scan_matches_loop():
+    df = make_m1(3000, seed=3)
+    rng = np.random.default_rng(4)
+    for min_wick in (0, 4, 6, 12):
+        long_mask, short_mask = rejection_masks(df['open'], df['high'], df['low'], df['close'], min_wick, POINT)
+        shape = candle_anatomy(df['open'], df['high'], df['low'], df['close'], POINT)
+        for mask, from_shape in zip((long_mask, short_mask), shape_rejection_masks(shape, min_wick)):
+            assert np.array_equal(mask, from_shape)
+        for _ in range(300):
+            end = int(rng.integers(0, len(df)))
+            n = int(rng.integers(1, 6))
+            mid = df['close'].iloc[end] + rng.normal(0, 0.0002)
+            zone = (mid - 0.00005, mid + 0.00005)
+            recent = df.iloc[max(0, end + 1 - n):end + 1]
+            expected = _check_rejection_m1_loop(recent, zone, min_wick, POINT)
+            assert check_rejection_m1(recent, zone, min_wick, POINT) == expected
+            k = find_rejection(long_mask, short_mask, df['low'].to_numpy(), df['high'].to_numpy(), end, n, zone, POINT)
+            assert (k >= 0) == expected
+            if expected:
+                # the oldest rejecting candle of the window, as the loop returns on the first match
+                assert not _check_rejection_m1_loop(df.iloc[max(0, end + 1 - n):k], zone, min_wick, POINT)
+                wick, body_pct = rejection_candle(recent, zone, min_wick, POINT)
+                row = df.iloc[k]
+                expected_wick = (min(row['open'], row['close']) - row['low'] if long_mask[k]
+                                 else row['high'] - max(row['open'], row['close'])) / POINT
+                assert wick == expected_wick and wick >= min_wick
+                assert 0 <= body_pct <= 100
+    assert check_rejection_m1(df.iloc[:0], (1.0, 1.2), 6, POINT) is False
+
+def test_rolling_atr_and_volatility_match_full_recompute():
+    df = make_m1(1500, seed=5)
+    # a flat stretch: windows of zero true range
+    df.iloc[600:640] = 1.1
+    high, low, close = df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy()
+    for period in (1, 2, 14):
+        expected = atr(high, low, close, period=period)
+        rolling = RollingATR(period)
+        values = [rolling.update(h, l, c) for h, l, c in zip(high, low, close)]
+        np.testing.assert_array_equal(values, expected)
+        assert RollingATR(period).extend(high[:700], low[:700], close[:700]) == \
+            atr(high[:700], low[:700], close[:700], period=period)[-1]
+    # bit for bit over a long stream, and with true ranges of very different sizes
+    long = make_m1(100000, seed=8)
+    high, low, close = long['high'].to_numpy(), long['low'].to_numpy(), long['close'].to_numpy()
+    assert RollingATR(14).extend(high, low, close) == atr(high, low, close, 14)[-1]
+    rng = np.random.default_rng(0)
+    spikes = close[:3000] + np.abs(rng.standard_cauchy(3000)) * 1e-3
+    for period in (2, 14, 50):
+        rolling = RollingATR(period)
+        np.testing.assert_array_equal([rolling.update(h, l, c) for h, l, c in zip(spikes, low, close)],
+                                      atr(spikes, low[:3000], close[:3000], period=period))
+
+    vol = RollingVolatility(window=60)
+    for i, c in enumerate(close):
+        vol.update(c)
+        if i % 13 == 0:
+            expected = pd.Series(close[max(0, i - 59):i + 1]).pct_change().dropna().std()
+            assert vol.value == expected or (np.isnan(vol.value) and np.isnan(expected)), i
+            assert vol.value == expected or np.isnan(expected)  # cached read
+
+def test_shared_strategy_rules():
+    df = make_m1(500, seed=6)
+    high, low, close = df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy()
+    plan = entry_atr(high, low, close, 14)
+    assert (plan[:14] == 0.0001).all()
+    for i in (14, 15, 200, 499):
+        assert np.isclose(plan[i], atr(high[i-14:i], low[i-14:i], close[i-14:i], period=14)[-1], rtol=1e-12)
+        assert entry_atr(high[i-14:i+1], low[i-14:i+1], close[i-14:i+1], 14)[-1] == plan[i]
+
+    mids = np.array([1.0, 2.0, 3.0])
+    price = np.array([0.5, 1.0, 2.5, 3.0, 3.5, 2.5])
+    bias = np.array([1, 1, 1, -1, -1, 0])
+    assert list(target_zone_index(mids, price, bias)) == [-1, -1, 1, -1, -1, -1]
+    assert list(target_zone_index(mids, price, -bias)) == [0, 1, 2, 1, 2, -1]
+
+    d1 = pd.DataFrame({'open': [1.0, 1.1, 1.2], 'high': [1.05, 1.15, 1.3], 'low': [0.95, 1.05, 1.1],
+                       'close': [1.0, 1.1, 1.15]})
+    for price in (1.0, 1.12, 1.2):
+        assert daily_bias_from_D1(d1, price) == daily_bias_rule(price, 1.2, 1.15, 1.05, 1.15, 1.1, 1.0)
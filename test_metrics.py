@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the pipeline instrumentation
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import json
+import time
+import urllib.request
+from metrics import Metrics, METRICS
+
+def test_timers_counters_and_exports(tmp_path):
+    m = Metrics()
+    with m.timer('off'):
+        pass
+    m.count('off')
+    assert m.snapshot()['stages'] == {} and m.snapshot()['counters'] == {}
+
+    m.enable()
+    slow = m.timed('slow')(lambda: time.sleep(0.002))
+    for k in range(100):
+        m.observe('fast', k / 1000)
+    slow()
+    m.count('signals', 3)
+    snap = m.snapshot()
+    fast = snap['stages']['fast']
+    assert fast['count'] == 100 and abs(fast['p50_ms'] - 49.5) < 1e-9 and abs(fast['p99_ms'] - 98.01) < 1e-9
+    assert snap['stages']['slow']['p50_ms'] >= 2 and snap['counters'] == {'signals': 3}
+
+    prom = m.to_prometheus()
+    assert 'ictbot_stage_seconds{stage="fast",quantile="0.95"} ' in prom
+    assert 'ictbot_stage_seconds_count{stage="fast"} 100' in prom and 'ictbot_signals_total 3' in prom
+    assert json.load(open(m.export(os.path.join(tmp_path, 'm.json'))))['counters'] == {'signals': 3}
+    assert open(m.export(os.path.join(tmp_path, 'm.prom'))).read() == prom
+
+    server = m.serve(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        assert urllib.request.urlopen(url + '/metrics').read().decode() == m.to_prometheus()
+        assert json.loads(urllib.request.urlopen(url + '/metrics.json').read())['counters'] == {'signals': 3}
+    finally:
+        m.stop_serving()
+
+def test_engine_stages_are_recorded():
+    from engine import TradingEngine
+    from testing_utils import random_walk_frames
+    engine = TradingEngine(load_data=False)
+    engine.set_m1_history(random_walk_frames(4 * 1440, seed=0)[0])
+    METRICS.reset()
+    METRICS.enable()
+    try:
+        for _ in range(3):
+            engine.evaluate()
+    finally:
+        METRICS.disable()
+    snap = METRICS.snapshot()
+    for stage in ('evaluate', 'daily_bias', 'sync_indicators', 'generate_candidate'):
+        assert snap['stages'][stage]['count'] == 3
+    assert sum(v for k, v in snap['counters'].items() if k.startswith('candidates_')) == 3
+
+def test_signal_rejections_count_the_same_with_and_without_zone_index():
+    from engine import TradingEngine
+    from testing_utils import random_walk_frames
+    from signal_generator import generate_candidate
+    from zone_index import ZoneIndex
+    m1, m15, _ = random_walk_frames(2 * 1440, seed=0)
+    engine = TradingEngine(load_data=False)
+    point = engine.point
+    params = {**engine.params, 'require_rejection': False, 'zone_buffer_points': 1e6}
+    index = ZoneIndex(params['sr_lookback'], params['sr_cluster_pips'], point)
+    index.extend(m15['high'], m15['low'])
+    below_all, above_all = m15['low'].min() - 0.01, m15['high'].max() + 0.01
+    cases = [(1, below_all, True), (-1, above_all, True), (0, m1['close'].iloc[-1], True),
+             (0, m1['close'].iloc[-1], False)]
+    counters = []
+    for zone_index in (index, None):
+        METRICS.reset()
+        METRICS.enable()
+        try:
+            for bias, price, strict in cases:
+                generate_candidate(m1, m15, None, point, lambda f: {'p_win': 0.0, 'pred_slippage': 0.0},
+                                   {**params, 'daily_bias': bias, 'use_daily_bias_only': strict},
+                                   zone_index=zone_index, price=price)
+        finally:
+            METRICS.disable()
+        snap = METRICS.snapshot()
+        assert snap['stages']['atr']['count'] == 1
+        counters.append(snap['counters'])
+    assert counters[0] == counters[1] == {'rejected_no_zone': 3, 'rejected_ml_gate': 1}
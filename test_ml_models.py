@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for ML inference
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+from ml_models import MLInference
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), 'models')
+
+def load_inference():
+    return MLInference(os.path.join(MODELS_DIR, 'clf_win.joblib'), os.path.join(MODELS_DIR, 'reg_slip.joblib'))
+
+def sample_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{
+        'atr_m1': rng.uniform(0.00005, 0.0002),
+        'dist_zone_pts': rng.uniform(5, 50),
+        'zone_width_pts': rng.uniform(3, 15),
+        'planned_rr': rng.uniform(1.2, 2.5),
+        'spread_pts': rng.uniform(0.5, 2.5),
+        'hour_of_day': int(rng.integers(0, 24))
+    } for _ in range(n)]
+
+def test_predict_batch_matches_predict():
+    ml = load_inference()
+    rows = sample_rows(50)
+    batch = ml.predict_batch(rows)
+    assert batch['p_win'].shape == (50,) and batch['pred_slippage'].shape == (50,)
+    for k, row in enumerate(rows):
+        single = ml.predict(row)
+        assert np.isclose(single['p_win'], batch['p_win'][k])
+        assert np.isclose(single['pred_slippage'], batch['pred_slippage'][k])
+
+def test_predict_batch_input_forms():
+    ml = load_inference()
+    rows = sample_rows(20, seed=1)
+    X = ml.feature_matrix(rows)
+    frame = pd.DataFrame(X, columns=ml.features)
+    expected = ml.predict_batch(rows)
+    for X_in in (X, frame):
+        out = ml.predict_batch(X_in)
+        assert np.allclose(out['p_win'], expected['p_win'])
+        assert np.allclose(out['pred_slippage'], expected['pred_slippage'])
+    assert len(ml.predict_batch([])['p_win']) == 0
+    # training column names are accepted as well as the live aliases
+    renamed = [{('distance_to_nearest_zone_pts' if k == 'dist_zone_pts' else k): v for k, v in r.items()} for r in rows]
+    assert np.allclose(ml.predict_batch(renamed)['p_win'], expected['p_win'])
+
+def test_compiled_forest_matches_sklearn():
+    ml = load_inference()
+    compiled = MLInference(os.path.join(MODELS_DIR, 'clf_win.joblib'), os.path.join(MODELS_DIR, 'reg_slip.joblib'),
+                           compiled=True)
+    rows = sample_rows(300, seed=2)
+    X = ml.feature_matrix(rows)
+    # values sitting exactly on split thresholds exercise the <= / float32 rule
+    tree = ml.clf.estimators_[0].tree_
+    for k in np.flatnonzero(tree.feature >= 0)[:50]:
+        X[k, tree.feature[k]] = tree.threshold[k]
+    expected = ml.predict_batch(X)
+    got = compiled.predict_batch(X)
+    assert np.allclose(got['p_win'], expected['p_win'], rtol=0, atol=1e-12)
+    assert np.allclose(got['pred_slippage'], expected['pred_slippage'], rtol=0, atol=1e-12)
+    for row in rows[:20]:
+        a, b = ml.predict(row), compiled.predict(row)
+        assert abs(a['p_win'] - b['p_win']) < 1e-12 and abs(a['pred_slippage'] - b['pred_slippage']) < 1e-12
+
+def test_memory_mapped_export(tmp_path):
+    import shutil
+    from ml_models import export_compiled_models, compiled_models_current, load_manifest
+    for name in ('clf_win.joblib', 'reg_slip.joblib', 'feature_schema.json'):
+        shutil.copy(os.path.join(MODELS_DIR, name), tmp_path / name)
+    assert not compiled_models_current(str(tmp_path))
+    manifest = export_compiled_models(str(tmp_path))
+    assert compiled_models_current(str(tmp_path)) and load_manifest(str(tmp_path))['version'] == manifest['version']
+
+    mapped = MLInference.from_compiled(str(tmp_path))
+    assert mapped.clf is None and mapped.version == manifest['version'] and mapped.features == load_inference().features
+    assert not mapped.clf_compiled.threshold.flags.writeable  # read-only view of the file
+    compiled = MLInference(str(tmp_path / 'clf_win.joblib'), str(tmp_path / 'reg_slip.joblib'), compiled=True)
+    rows = sample_rows(100, seed=3)
+    expected, got = compiled.predict_batch(rows), mapped.predict_batch(rows)
+    assert np.array_equal(got['p_win'], expected['p_win'])
+    assert np.array_equal(got['pred_slippage'], expected['pred_slippage'])
+    assert mapped.predict(rows[0]) == compiled.predict(rows[0])
+
+    # re-exporting unchanged models republishes the version without rewriting its mapped files
+    version_dir = tmp_path / 'compiled' / manifest['version']
+    inodes = {f.name: f.stat().st_ino for f in version_dir.iterdir()}
+    assert export_compiled_models(str(tmp_path))['version'] == manifest['version']
+    assert {f.name: f.stat().st_ino for f in version_dir.iterdir()} == inodes
+    assert np.array_equal(mapped.predict_batch(rows)['p_win'], expected['p_win'])
+
+    # the export goes stale when the joblib files change
+    with open(tmp_path / 'reg_slip.joblib', 'ab') as f:
+        f.write(b'\0')
+    assert not compiled_models_current(str(tmp_path))
+
+def test_training_backends(tmp_path):
+    import pytest
+    from ml_models import load_manifest, train_models
+    labeled = os.path.join(os.path.dirname(__file__), 'data', 'labeled_trades.csv')
+    reports = {}
+    for backend in ('rf', 'hgb'):
+        out = tmp_path / backend
+        reports[backend] = train_models(labeled, str(out), backend=backend, max_rounds=200, patience=10)
+        ml = MLInference(str(out / 'clf_win.joblib'), str(out / 'reg_slip.joblib'))
+        mapped = MLInference.from_compiled(str(out))
+        rows = sample_rows(50, seed=4)
+        expected, got = ml.predict_batch(rows), mapped.predict_batch(rows)
+        assert np.allclose(got['p_win'], expected['p_win'], rtol=0, atol=1e-12)
+        assert np.allclose(got['pred_slippage'], expected['pred_slippage'], rtol=0, atol=1e-9)
+        assert abs(mapped.predict(rows[0])['p_win'] - expected['p_win'][0]) < 1e-12
+        assert load_manifest(str(out))['models']['clf_win']['aggregate'] == ('sum' if backend == 'hgb' else 'mean')
+
+    hgb = reports['hgb']['models']
+    assert 1 <= hgb['clf_win']['rounds'] < 200 and 1 <= hgb['reg_slip']['rounds'] < 200  # stopped early
+    assert reports['rf']['models']['clf_win']['rounds'] == 200
+    for report in reports.values():
+        assert report['train_rows'] == 800 and report['val_rows'] == 200
+        assert 0 <= report['models']['clf_win']['val_brier'] <= 1 and report['models']['reg_slip']['size_bytes'] > 0
+    with pytest.raises(ValueError):
+        train_models(labeled, str(tmp_path / 'x'), backend='xgboost')
+
+def test_export_prunes_old_versions(tmp_path):
+    import shutil
+    import joblib
+    from ml_models import export_compiled_models
+    for name in ('clf_win.joblib', 'reg_slip.joblib', 'feature_schema.json'):
+        shutil.copy(os.path.join(MODELS_DIR, name), tmp_path / name)
+    clf = joblib.load(tmp_path / 'clf_win.joblib')
+    versions = []
+    for k in range(5):
+        clf.random_state = k  # same trees, new joblib bytes: a new version
+        joblib.dump(clf, tmp_path / 'clf_win.joblib')
+        versions.append(export_compiled_models(str(tmp_path), keep=2)['version'])
+    # staging directories of crashed exports go once stale; one in progress stays
+    for name, age in (('.stale', 7200), ('.in-progress', 0)):
+        (tmp_path / 'compiled' / name).mkdir()
+        os.utime(tmp_path / 'compiled' / name, (0, os.path.getmtime(tmp_path / 'compiled') - age))
+    assert export_compiled_models(str(tmp_path), keep=2)['version'] == versions[-1]
+    kept = sorted(p.name for p in (tmp_path / 'compiled').iterdir() if p.is_dir())
+    assert kept == sorted(['.in-progress'] + versions[-2:])
+    assert MLInference.from_compiled(str(tmp_path), version=versions[-2]).version == versions[-2]
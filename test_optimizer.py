@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for the parameter-sweep optimizer
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+from backtester import BacktestLabeler
+from optimizer import ParameterSweep
+from testing_utils import random_walk_frames
+from test_backtester import PARAMS
+
+SPACE = {'sr_lookback': [30, 40], 'zone_buffer_points': [5, 15], 'rejection_wick_pts': [4, 6],
+         'tp_mult': [1.2, 1.8], 'sl_mult': [0.9]}
+
+class WidthScorer:
+    """Scores candidates by zone width so a p_threshold keeps the wider zones"""
+    def predict_batch(self, X):
+        width = np.asarray(X['zone_width_pts'], dtype=float)
+        return {'p_win': width / (width.max() + 1), 'pred_slippage': np.zeros(len(width))}
+
+def test_sweep_matches_labeler():
+    m1, m15, d1 = random_walk_frames(4500)
+    sweep = ParameterSweep(m1, m15, d1, base_params=PARAMS)
+    results = sweep.run(sweep.grid(SPACE))
+    assert len(results) == 16
+    assert list(results['expectancy_r']) == sorted(results['expectancy_r'], reverse=True)
+
+    for _, row in results.iloc[[0, 7, 15]].iterrows():
+        params = {k: row[k] for k in PARAMS}
+        labeled = pd.DataFrame(BacktestLabeler().label_trades(m1, m15, d1, params))
+        assert row['trades'] == len(labeled)
+        assert row['win_rate'] == labeled['win'].mean()
+
+def test_parallel_sweep_and_threshold():
+    m1, m15, d1 = random_walk_frames(4500)
+    combos = ParameterSweep(m1, m15, d1, base_params=PARAMS).random(SPACE, n_iter=6, seed=2)
+    assert len({tuple(sorted(c.items())) for c in combos}) == 6
+    serial = ParameterSweep(m1, m15, d1, base_params=PARAMS, workers=1).run(combos)
+    parallel = ParameterSweep(m1, m15, d1, base_params=PARAMS, workers=2).run(combos)
+    pd.testing.assert_frame_equal(serial, parallel)
+
+    sweep = ParameterSweep(m1, m15, d1, base_params=PARAMS, ml=WidthScorer())
+    gated = sweep.run(sweep.grid({'p_threshold': [0.0, 0.5, 0.9]})).set_index('p_threshold')
+    assert gated.loc[0.0, 'trades'] == gated.loc[0.0, 'signals']
+    assert gated.loc[0.0, 'trades'] > gated.loc[0.5, 'trades'] > gated.loc[0.9, 'trades']
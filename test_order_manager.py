@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for the asynchronous order manager and the mock broker
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import threading
+import time
+import pytest
+from order_manager import AsyncOrderManager, BrokerSession, MockBroker, RETCODE_DONE, RETCODE_REJECTED
+
+def test_submit_is_non_blocking_and_orders_overlap():
+    broker = MockBroker(latency=0.1, seed=0)
+    fills = []
+    with AsyncOrderManager(broker, max_in_flight=20) as manager:
+        manager.add_fill_callback(lambda order, result: fills.append((order['side'], result['retcode'])))
+        t0 = time.perf_counter()
+        futures = [manager.submit('buy' if k % 2 else 'sell', 0.01, 'EURUSD') for k in range(20)]
+        assert time.perf_counter() - t0 < 0.05
+        results = [f.result(timeout=2) for f in futures]
+        elapsed = time.perf_counter() - t0
+    # 20 round-trips of 0.1s in flight together, over a single session
+    assert elapsed < 0.5
+    assert broker.connects == 1 and not broker.connected
+    assert all(r['retcode'] == RETCODE_DONE for r in results)
+    assert sorted(r['order_id'] for r in results) == list(range(1, 21))
+    assert results[0]['fill_price'] < 1.1 < results[1]['fill_price']  # sell at bid, buy at ask
+    assert len(fills) == 20 and len(manager.latencies) == 20
+
+def test_rejections_callbacks_and_drain():
+    broker = MockBroker(latency=0.01, fill_probability=0.5, seed=3)
+    per_order = []
+    done = threading.Event()
+    manager = AsyncOrderManager(broker, max_in_flight=2).start()
+    futures = [manager.submit('buy', 0.01, 'EURUSD', callback=lambda o, r: per_order.append(r)) for _ in range(30)]
+    futures[-1].add_done_callback(lambda f: done.set())
+    manager.stop()  # drains queued orders before closing the session
+    assert done.is_set() and manager.in_flight == 0
+    codes = [f.result()['retcode'] for f in futures]
+    assert set(codes) == {RETCODE_DONE, RETCODE_REJECTED}
+    assert len(per_order) == 30
+    try:
+        manager.submit('buy', 0.01, 'EURUSD')
+        assert False, "submit after stop must fail"
+    except RuntimeError:
+        pass
+
+def test_stop_without_drain_cancels_queued_and_in_flight_orders():
+    broker = MockBroker(latency=5.0)
+    manager = AsyncOrderManager(broker, max_in_flight=2).start()
+    futures = [manager.submit('buy', 0.01, 'EURUSD') for _ in range(6)]
+    deadline = time.perf_counter() + 2
+    while broker.orders_seen < 2 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    t0 = time.perf_counter()
+    manager.stop(drain=False)
+    assert time.perf_counter() - t0 < 1
+    assert all(f.cancelled() for f in futures)
+    assert (manager.completed, manager.cancelled, manager.in_flight) == (0, 6, 0)
+
+def test_broker_session_requires_send_order():
+    class NoOrders(BrokerSession):
+        pass
+    for cls in (BrokerSession, NoOrders):
+        with pytest.raises(TypeError):
+            cls()
+    assert not MockBroker().connected
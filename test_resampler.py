@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for the multi-timeframe resampler
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+from testing_utils import random_walk_frames
+from resampler import MultiTimeframe, closed_bar_counts
+
+def make_m1(n, seed=0):
+    """Seeded M1 candles starting mid-session, with a few missing minutes"""
+    return random_walk_frames(n, seed, start='2025-03-03 21:37', missing=40)[0]
+
+def test_resampled_bars_match_pandas_floor():
+    m1 = make_m1(4000)
+    mtf = MultiTimeframe(m1)
+    agg = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    for tf, freq in (('M5', '5min'), ('M15', '15min'), ('H1', '1h'), ('D1', '1D')):
+        expected = m1.groupby(m1['timestamp'].dt.floor(freq)).agg(agg).reset_index()
+        pd.testing.assert_frame_equal(mtf.frames[tf], expected, check_dtype=False)
+        # every M1 bar maps to the bar of its floored timestamp
+        bars = mtf.frames[tf]['timestamp'].to_numpy()[mtf.bar_index[tf]]
+        assert (bars == m1['timestamp'].dt.floor(freq).to_numpy()).all()
+
+def test_closed_counts_only_include_finished_bars():
+    m1 = make_m1(3000, seed=1)
+    mtf = MultiTimeframe(m1, timeframes=('M15', 'D1'))
+    m1_close = m1['timestamp'] + pd.Timedelta(minutes=1)
+    for tf, width in (('M15', pd.Timedelta(minutes=15)), ('D1', pd.Timedelta(days=1))):
+        bar_close = mtf.frames[tf]['timestamp'] + width
+        expected = [int((bar_close <= t).sum()) for t in m1_close]
+        assert mtf.closed[tf].tolist() == expected
+        minutes = int(width / pd.Timedelta(minutes=1))
+        assert closed_bar_counts(mtf.frames[tf]['timestamp'], minutes, m1['timestamp']).tolist() == expected
+
+def test_partial_bar_and_ticks():
+    m1 = make_m1(600, seed=2)
+    mtf = MultiTimeframe(m1, timeframes=('H1',))
+    partial = mtf.partial_arrays('H1')
+    for i in (0, 17, 59, 300, 599):
+        hour = m1['timestamp'].dt.floor('1h')
+        forming = m1.iloc[:i + 1][hour.iloc[:i + 1] == hour.iloc[i]]
+        assert partial['open'][i] == forming['open'].iloc[0]
+        assert partial['high'][i] == forming['high'].max()
+        assert partial['low'][i] == forming['low'].min()
+        assert partial['volume'][i] == forming['volume'].sum()
+
+    ticks = pd.DataFrame({'timestamp': pd.date_range('2025-03-03', periods=900, freq='7s'),
+                          'mid': 1.1 + np.arange(900) * 1e-5, 'volume': 1})
+    from_ticks = MultiTimeframe.from_ticks(ticks, timeframes=('M15',))
+    m1_ticks = from_ticks.frames['M1']
+    assert m1_ticks['volume'].sum() == 900
+    assert len(m1_ticks) == 105 and len(from_ticks.frames['M15']) == 7
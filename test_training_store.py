@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar training store and incremental retraining
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from training_store import TrainingStore, STORE_FILE
+
+LABELED = os.path.join(os.path.dirname(__file__), 'data', 'labeled_trades.csv')
+
+def test_append_read_and_ingest(tmp_path):
+    df = pd.read_csv(LABELED, parse_dates=['timestamp'])
+    csv = tmp_path / 'labeled.csv'
+    df.iloc[:300].to_csv(csv, index=False)
+    expected = pd.read_csv(csv, parse_dates=['timestamp'])
+    store = TrainingStore(str(tmp_path / 'store'))
+    assert store.ingest_csv(str(csv)) == 300 and store.ingest_csv(str(csv)) == 0
+    df.to_csv(csv, index=False)
+    assert store.ingest_csv(str(csv)) == 700 and store.rows == 1000
+
+    # reopened: same rows, any column subset, any row range across row groups
+    store = TrainingStore(str(tmp_path / 'store'))
+    assert store.columns == list(df.columns) and store.last_timestamp == df['timestamp'].iloc[-1]
+    full = store.read()
+    assert np.array_equal(full['atr_m1'], pd.read_csv(csv)['atr_m1']) and list(full['symbol'][:2]) == ['EURUSD'] * 2
+    assert np.array_equal(full['timestamp'][:300], expected['timestamp'])
+    part = store.read(['win', 'spread_pts'], start=250, stop=350)
+    assert list(part.columns) == ['win', 'spread_pts']
+    assert part.equals(full[['win', 'spread_pts']][250:350].reset_index(drop=True))
+    with pytest.raises(KeyError):
+        store.read(['no_such_column'])
+
+    # a crash before the manifest is replaced leaves the store as it was
+    np.save(tmp_path / 'store' / 'g000002.win.npy', np.zeros(5))
+    assert TrainingStore(str(tmp_path / 'store')).rows == 1000
+    assert json.load(open(tmp_path / 'store' / STORE_FILE))['rows'] == 1000
+    # a CSV that does not extend the stored rows is refused
+    pd.concat([df, df.iloc[:10]]).to_csv(csv, index=False)
+    with pytest.raises(ValueError):
+        TrainingStore(str(tmp_path / 'store')).ingest_csv(str(csv))
+
+@pytest.mark.parametrize('backend', ['rf', 'hgb'])
+def test_incremental_update(tmp_path, backend):
+    from ml_models import MLInference, load_training_state, train_models, update_models
+    df = pd.read_csv(LABELED, parse_dates=['timestamp'])
+    store = TrainingStore(str(tmp_path / 'store'))
+    store.append(df.iloc[:600])
+    models = str(tmp_path / 'models')
+    train_models(str(tmp_path / 'store'), models, backend=backend, max_rounds=100, patience=10)
+    assert load_training_state(models) == {'backend': backend, 'source_rows': 600, 'train_end': 480}
+    before = MLInference.from_compiled(models)
+    assert update_models(str(tmp_path / 'store'), models) is None  # nothing new
+
+    store.append(df.iloc[600:])
+    report = update_models(str(tmp_path / 'store'), models, patience=10)
+    assert report['mode'] == 'update' and report['new_rows'] == 400
+    assert report['train_rows'] == 416 and report['val_rows'] == 104  # previous holdout plus new rows, 80/20
+    assert load_training_state(models) == {'backend': backend, 'source_rows': 1000, 'train_end': 896}
+    clf = report['models']['clf_win']
+    if backend == 'rf':
+        assert clf['rounds'] == 200 + int(np.ceil(200 * 416 / 480))
+    after = MLInference.from_compiled(models)
+    if backend == 'hgb':
+        # rounds are kept only while they lower the log loss on the new validation rows
+        newest = store.read(start=store.rows - report['val_rows'])
+        y = newest['win'].to_numpy(dtype=float)
+
+        def log_loss(ml):
+            p = ml.predict_batch(newest)['p_win']
+            return -np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))
+        assert clf['rounds'] >= before.clf_compiled.n_trees and log_loss(after) <= log_loss(before) + 1e-12
+    ml = MLInference(os.path.join(models, 'clf_win.joblib'), os.path.join(models, 'reg_slip.joblib'))
+    rows = store.read(start=900)
+    assert np.allclose(after.predict_batch(rows)['p_win'], ml.predict_batch(rows)['p_win'], rtol=0, atol=1e-12)
+
+def test_update_without_all_classes_refits(tmp_path):
+    from ml_models import MLInference, load_training_state, train_models, update_models
+    df = pd.read_csv(LABELED, parse_dates=['timestamp'])
+    # every trade after the first training split is a win: trees fitted to them alone would know one class
+    df['win'] = np.where(np.arange(len(df)) < 480, df['win'], 1)
+    store = TrainingStore(str(tmp_path / 'store'))
+    store.append(df.iloc[:600])
+    models = str(tmp_path / 'models')
+    train_models(str(tmp_path / 'store'), models, max_rounds=100, patience=10)
+    store.append(df.iloc[600:])
+    report = update_models(str(tmp_path / 'store'), models, patience=10)
+    assert report['mode'] == 'full' and report['train_rows'] == 800 and report['val_rows'] == 200
+    assert load_training_state(models) == {'backend': 'rf', 'source_rows': 1000, 'train_end': 800}
+    import joblib
+    assert list(joblib.load(os.path.join(models, 'clf_win.joblib')).classes_) == [0, 1]
+    p = MLInference.from_compiled(models).predict_batch(store.read(start=900))['p_win']
+    assert ((p > 0) & (p < 1)).any()
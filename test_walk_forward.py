@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for the parallel walk-forward backtester
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+from backtester import BacktestLabeler
+from walk_forward import WalkForwardBacktester, make_shards
+from testing_utils import random_walk_frames
+from test_backtester import PARAMS
+
+# everything except the per-trade random draws (spread, tick density, slippage)
+DETERMINISTIC = ['timestamp', 'daily_bias', 'price_at_signal', 'distance_to_nearest_zone_pts', 'zone_width_pts',
+                 'atr_m1', 'atr_m15', 'volatility_lookback', 'momentum_1m', 'momentum_5m', 'sl_pips', 'tp_pips']
+
+def test_shards_cover_history_with_warmup():
+    m1, m15, _ = random_walk_frames(7000)
+    shards = make_shards(m1, m15, PARAMS, shard_days=1)
+    assert [s[0] for s in shards[1:]] == [s[1] for s in shards[:-1]]
+    assert shards[0][0] == 0 and shards[-1][1] == len(m1)
+    for first, stop, warm in shards[1:]:
+        assert warm <= first - 100
+        assert m1['timestamp'].iloc[warm] == m1['timestamp'].iloc[warm].floor('1D')
+
+def test_parallel_matches_serial_and_unsharded_features(tmp_path):
+    m1, m15, d1 = random_walk_frames(7000)
+    serial = WalkForwardBacktester(shard_days=1, workers=1, seed=3).label(m1, m15, d1, PARAMS)
+    out = os.path.join(tmp_path, 'labeled.csv')
+    parallel = WalkForwardBacktester(shard_days=1, workers=2, seed=3).label(m1, m15, d1, PARAMS, output_csv=out)
+    assert serial
+    pd.testing.assert_frame_equal(pd.DataFrame(serial), pd.DataFrame(parallel))
+    assert len(pd.read_csv(out)) == len(serial)
+
+    np.random.seed(0)
+    whole = BacktestLabeler().label_trades(m1, m15, d1, PARAMS)
+    pd.testing.assert_frame_equal(pd.DataFrame(serial)[DETERMINISTIC], pd.DataFrame(whole)[DETERMINISTIC])
+
+def test_parameter_sets_are_labeled_independently():
+    m1, m15, d1 = random_walk_frames(5000)
+    wide = dict(PARAMS, zone_buffer_points=15)
+    runner = WalkForwardBacktester(shard_days=1, workers=2, seed=1)
+    both = runner.label_param_sets(m1, m15, d1, [PARAMS, wide])
+    assert pd.DataFrame(both[0]).equals(pd.DataFrame(runner.label(m1, m15, d1, PARAMS)))
+    assert pd.DataFrame(both[1]).equals(pd.DataFrame(runner.label(m1, m15, d1, wide)))
+    assert len(both[1]) > len(both[0])
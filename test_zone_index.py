@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming S/R zone index
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+from indicators import find_swings_levels_arrays, cluster_levels
+from zone_index import ZoneIndex
+
+POINT = 0.00001
+
+def reference_target(zones, price, bias):
+    """Target-zone selection as done by generate_candidate"""
+    if bias == 1:
+        below = [z for z in zones if (z[0]+z[1])/2.0 < price]
+        return sorted(below, key=lambda z: price - (z[0]+z[1])/2.0)[0] if below else None
+    if bias == -1:
+        above = [z for z in zones if (z[0]+z[1])/2.0 > price]
+        return sorted(above, key=lambda z: (z[0]+z[1])/2.0 - price)[0] if above else None
+    return sorted(zones, key=lambda z: abs(price - ((z[0]+z[1])/2.0)))[0] if zones else None
+
+def test_zone_index_matches_rebuilt_zones():
+    rng = np.random.default_rng(4)
+    n = 700
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0002, n))
+    # rounded prices give repeated levels that must survive partial expiry
+    high = np.round(close + np.abs(rng.normal(0, 0.0002, n)), 4)
+    low = np.round(close - np.abs(rng.normal(0, 0.0002, n)), 4)
+
+    for lookback in (4, 5, 30, 120):
+        index = ZoneIndex(lookback, cluster_pips=20, point=POINT)
+        for k in range(n):
+            index.update(high[k], low[k])
+            expected = cluster_levels(find_swings_levels_arrays(high[:k+1], low[:k+1], lookback), 20, POINT)
+            assert index.zones == expected, (lookback, k)
+            for price in rng.uniform(low[k] - 0.002, high[k] + 0.002, 3):
+                for bias in (1, -1, 0):
+                    got = {1: index.nearest_below, -1: index.nearest_above, 0: index.nearest}[bias](price)
+                    assert got == reference_target(expected, price, bias)
+
+def test_zone_index_from_arrays():
+    rng = np.random.default_rng(5)
+    high = 1.1 + rng.normal(0, 0.001, 300)
+    low = high - 0.0005
+    index = ZoneIndex.from_arrays(high, low, 120, 20, POINT)
+    assert index.bars_seen == 300
+    assert index.zones == cluster_levels(find_swings_levels_arrays(high, low, 120), 20, POINT)
+
+def test_generate_candidate_with_zone_index():
+    import pandas as pd
+    from signal_generator import generate_candidate
+    rng = np.random.default_rng(6)
+    n = 3000
+    close = 1.1 + np.cumsum(rng.normal(0, 0.00005, n))
+    m1 = pd.DataFrame({'timestamp': pd.date_range('2025-01-06', periods=n, freq='1min'),
+                       'open': close, 'high': close + 0.00008, 'low': close - 0.00008, 'close': close})
+    m15 = m1.groupby(m1.index // 15).agg({'timestamp': 'first', 'open': 'first', 'high': 'max',
+                                          'low': 'min', 'close': 'last'}).reset_index(drop=True)
+    params = {'sr_lookback': 120, 'sr_cluster_pips': 20, 'zone_buffer_points': 30,
+              'require_rejection': False, 'rejection_candles': 3, 'rejection_wick_pts': 6,
+              'atr_period': 14, 'tp_mult': 1.8, 'sl_mult': 0.9, 'p_threshold': 0.5,
+              'max_pred_slippage_pts': 5, 'use_daily_bias_only': False}
+    ml = lambda features: {'p_win': 0.7, 'pred_slippage': 1.0}
+    index = ZoneIndex.from_arrays(m15['high'], m15['low'], 120, 20, POINT)
+    accepted = 0
+    for end in range(2000, n, 7):
+        for bias in (1, -1, 0):
+            p = {**params, 'daily_bias': bias}
+            expected = generate_candidate(m1.iloc[:end], m15, None, POINT, ml, p)
+            got = generate_candidate(m1.iloc[:end], m15, None, POINT, ml, p, zone_index=index)
+            assert (got is None) == (expected is None)
+            if got is not None:
+                assert got['zone'] == expected['zone'] and got['features'] == expected['features']
+                accepted += 1
+    assert accepted > 0
@@ -0,0 +1,35 @@
+"""
+Shared helpers for the tests and benchmarks
+"""
+
+import numpy as np
+import pandas as pd
+
+def random_walk_frames(n_m1, seed=1, start='2025-01-06', missing=0, decimals=None, doji_rate=0.0):
+    """
+    Seeded random-walk M1 candles with their M15/D1 aggregates, (m1, m15, d1),
+    for tests and benchmarks. Each bar opens at the previous close.
+    missing:   minutes left out at random (gaps in the series)
+    decimals:  round prices, so neighbouring bars share levels
+    doji_rate: share of bars that close where they opened
+    """
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 0.00005, n_m1)
+    if doji_rate:
+        steps[rng.random(n_m1) < doji_rate] = 0.0
+    close = 1.1 + np.cumsum(steps)
+    open_ = np.concatenate(([1.1], close[:-1]))[:n_m1]
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, 0.00008, n_m1))
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, 0.00008, n_m1))
+    volume = rng.integers(50, 200, n_m1)
+    timestamps = pd.date_range(start, periods=n_m1 + missing, freq='1min')
+    if missing:
+        timestamps = timestamps.delete(rng.choice(len(timestamps), missing, replace=False))
+    m1 = pd.DataFrame({'timestamp': timestamps, 'open': open_, 'high': high, 'low': low, 'close': close,
+                       'volume': volume})
+    if decimals is not None:
+        m1[['open', 'high', 'low', 'close']] = m1[['open', 'high', 'low', 'close']].round(decimals)
+    agg = {'timestamp': 'first', 'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+    m15 = m1.groupby(m1['timestamp'].dt.floor('15min')).agg(agg).reset_index(drop=True)
+    d1 = m1.groupby(m1['timestamp'].dt.floor('1D')).agg(agg).reset_index(drop=True)
+    return m1, m15, d1